@@ -1 +1,2 @@
-from .ai_simple_searcher import AdvancedAISearcher
\ No newline at end of file
+from .ai_simple_searcher import AdvancedAISearcher
+from .key_sentences import KeySentenceExtractor
@@ -1,29 +1,120 @@
-import string
+import asyncio
+import threading
 
 from langchain_core.language_models import BaseChatModel
-from nltk import sent_tokenize, FreqDist
-import nltk
-nltk.download("stopwords")
-from nltk.corpus import stopwords
 
 from ..query_master import SearchQueryToNSubquery,SearchRetriever,QueryRefiner
+from ..web_search.http_client import SharedHttpClient
+from ..deadline import Deadline
+from ..retrieval.dedup import NearDuplicateFilter
+from .key_sentences import KeySentenceExtractor
 
 class AdvancedAISearcher:
+    TRUNCATED_ANSWER_HEADER = "[No answer within the deadline; key information found:]"
+
     def __init__(self, chunk_overlap=25,
                  chunk_size=250,
                  max_urls=5,
                  n_key_sentences = 25,
-                 topk = 10):
+                 topk = 10,
+                 concurrent = False,
+                 max_concurrency = 8,
+                 dedupe = False,
+                 near_duplicate_threshold = 0.85,
+                 key_sentence_method = "frequency",
+                 mmr_lambda = 0.7):
         self.n_key_sentences = n_key_sentences
         self.chunk_overlap = chunk_overlap
         self.chunk_size = chunk_size
         self.max_urls = max_urls
         self.topk = topk
+        self.concurrent = concurrent
+        self.max_concurrency = max_concurrency
+        # With concurrent sub-queries: give each retrieved chunk to one sub-query only
+        self.dedupe = dedupe
+        # Near-duplicate chunks and key sentences (similarity >= threshold) are dropped; None keeps them
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicates = NearDuplicateFilter(near_duplicate_threshold) if near_duplicate_threshold else None
+        # "frequency", "textrank" or "mmr"; see KeySentenceExtractor
+        self.key_sentences = KeySentenceExtractor(method=key_sentence_method, mmr_lambda=mmr_lambda)
+        self._retriever = None
+        self._retriever_lock = threading.Lock()
+
+    @property
+    def retriever(self) -> SearchRetriever:
+        # Built once per searcher, even when first used from several threads at once;
+        # the embedding model itself comes from the shared ModelRegistry
+        if self._retriever is None:
+            with self._retriever_lock:
+                if self._retriever is None:
+                    self._retriever = SearchRetriever(
+                        chunk_overlap=self.chunk_overlap,
+                        chunk_size=self.chunk_size,
+                        max_urls=self.max_urls,
+                        near_duplicate_threshold=self.near_duplicate_threshold,
+                    )
+        return self._retriever
+
+    def _retrieve(self, query_splits, verbose=False, topk=10):
+        retriever = self.retriever
+        if self.concurrent:
+            # All sub-queries searched together; pages shared between them are fetched and embedded once.
+            all_results = retriever.multi_query_content_retrieval(query_splits, topk=topk, verbose=verbose,
+                                                                  max_concurrency=self.max_concurrency,
+                                                                  dedupe=self.dedupe)
+        else:
+            all_results = (retriever.query_based_content_retrieval(chunk, verbose=verbose, topk=topk)
+                           for chunk in query_splits)
+        return self._merge_results(all_results)
+
+    async def _aretrieve(self, query_splits, verbose=False, topk=10, deadline=None):
+        retriever = self.retriever
+        if self.concurrent:
+            all_results = await retriever.amulti_query_content_retrieval(query_splits, topk=topk, verbose=verbose,
+                                                                         max_concurrency=self.max_concurrency,
+                                                                         deadline=deadline, dedupe=self.dedupe)
+        else:
+            all_results = [await retriever.aquery_based_content_retrieval(chunk, verbose=verbose, topk=topk,
+                                                                          deadline=deadline)
+                           for chunk in query_splits]
+        return self._merge_results(all_results)
+
+    async def _aplan(self, llm, query, verbose, n_splits, deadline):
+        # On timeout the original query stands in for the refined one, and for its splits.
+        refined_query = await deadline.run(QueryRefiner.arefine_query(llm=llm, query=query), "refine",
+                                           fallback=query, share=0.2)
+        if verbose:
+            print(f"Refined Query: {refined_query}")
+
+        query_splits = await deadline.run(SearchQueryToNSubquery.aai_splits(llm=llm, query=refined_query,
+                                                                            n_splits=n_splits),
+                                          "split", fallback={"refined_splits": [refined_query]}, share=0.25)
+        if verbose:
+            print(f"Query Splits: {query_splits}")
+        return query_splits.get("refined_splits", [])
+
+    def _merge_results(self, all_results):
+        ans = []
+        all_urls = []
+        for results in all_results:
+            ans.extend(results.topk_chunks)
+            all_urls.extend(results.urls)
+        if self.near_duplicates is not None:
+            # Sub-queries searched one by one can each return the same syndicated chunk.
+            ans = self.near_duplicates.filter(ans)
+        return ans, all_urls
 
     def generic_search(self, llm: BaseChatModel, query: str,
                verbose:bool = False,
                return_content_list = False,
-                       n_splits = None)-> str:
+                       n_splits = None,
+                       deadline = None)-> str:
+        """``deadline`` (seconds or :class:`Deadline`) bounds the whole call; pass a :class:`Deadline`
+        to read which stages ran short from its ``truncated_stages`` afterwards."""
+        if deadline is not None:
+            return SharedHttpClient.run(self.ageneric_search(llm, query, verbose=verbose,
+                                                             return_content_list=return_content_list,
+                                                             n_splits=n_splits, deadline=deadline))
         refined_query = QueryRefiner.refine_query(llm=llm, query=query)
         if verbose:
             print(f"Refined Query: {refined_query}")
@@ -32,26 +123,36 @@ class AdvancedAISearcher:
                                                         n_splits=n_splits)
         if verbose:
             print(f"Query Splits: {query_splits}")
-        retriever = SearchRetriever(
-            chunk_overlap=self.chunk_overlap,
-            chunk_size=self.chunk_size,
-            max_urls=self.max_urls,
-        )
-        ans = []
-        all_urls = []
-        for chunk in query_splits.get("refined_splits", []):
-            results = retriever.query_based_content_retrieval(chunk,verbose=verbose,topk=self.topk)
-            ans.extend(results.topk_chunks)
-            all_urls.extend(results.urls)
-        join_urls = "\n".join(all_urls)
+        ans, all_urls = self._retrieve(query_splits.get("refined_splits", []), verbose=verbose, topk=self.topk)
+        if return_content_list:
+            return ans,all_urls
+        return self._format_answer("\n".join(ans), all_urls)
+
+    async def ageneric_search(self, llm: BaseChatModel, query: str,
+                              verbose:bool = False,
+                              return_content_list = False,
+                              n_splits = None,
+                              deadline = None)-> str:
+        """Async :meth:`generic_search`."""
+        deadline = Deadline.coerce(deadline)
+        query_splits = await self._aplan(llm, query, verbose, n_splits, deadline)
+        ans, all_urls = await self._aretrieve(query_splits, verbose=verbose, topk=self.topk, deadline=deadline)
         if return_content_list:
             return ans,all_urls
-        ans = "\n".join(ans)
-        final_ans = f"Answer:\n{ans}\n\nURLs:\n{join_urls}"
-        return final_ans
+        return self._format_answer("\n".join(ans), all_urls)
+
+    @staticmethod
+    def _format_answer(context, urls):
+        join_urls = "\n".join(urls)
+        return f"Answer:\n{context}\n\nURLs:\n{join_urls}"
 
     def search(self, llm: BaseChatModel, query: str,
-               verbose:bool = False)-> str:
+               verbose:bool = False,
+               deadline = None)-> str:
+        """``deadline`` (seconds or :class:`Deadline`) bounds the whole call; pass a :class:`Deadline`
+        to read which stages ran short from its ``truncated_stages`` afterwards."""
+        if deadline is not None:
+            return SharedHttpClient.run(self.asearch(llm, query, verbose=verbose, deadline=deadline))
         refined_query = QueryRefiner.refine_query(llm=llm, query=query)
         if verbose:
             print(f"Refined Query: {refined_query}")
@@ -59,74 +160,61 @@ class AdvancedAISearcher:
         query_splits = SearchQueryToNSubquery.ai_splits(llm=llm, query=refined_query)
         if verbose:
             print(f"Query Splits: {query_splits}")
-        retriever = SearchRetriever(
-            chunk_overlap=self.chunk_overlap,
-            chunk_size=self.chunk_size,
-            max_urls=self.max_urls,
-        )
-        ans = []
-        all_urls = []
-        for chunk in query_splits.get("refined_splits", []):
-            results = retriever.query_based_content_retrieval(chunk,verbose=verbose)
-            ans.extend(results.topk_chunks)
-            all_urls.extend(results.urls)
-        join_urls = "\n".join(all_urls)
-
-        all_sentences = []
-        for i, answer in enumerate(ans):
-            all_sentences.extend(self.__preprocess_text(answer, i))
-        key_sentences = self.__extract_key_sentences(all_sentences, n=self.n_key_sentences)
-
-        context = "\n".join(list(set([i[1] for i in key_sentences])))
-        final_ans = f"Answer:\n{context}\n\nURLs:\n{join_urls}"
-        return final_ans
-
-    def __preprocess_text(self,text, i):
-        # Tokenize the text into sentences
-        org_sentences = sent_tokenize(text)
-
-        # Remove punctuation and convert to lowercase
-        sentences = [s.translate(str.maketrans('', '', string.punctuation)).lower() for s in org_sentences]
-
-        # Remove stopwords
-        stop_words = set(stopwords.words('english'))
-        sentences = [' '.join([word for word in s.split() if word not in stop_words]) for s in sentences]
-        sentences = [(i, os, s) for os, s in zip(org_sentences, sentences)]
-        return sentences
-
-    def __extract_key_sentences(self,sentences, n=3):
-        # Combine all sentences
-        all_words = ' '.join([_[1] for _ in sentences]).split()
-
-        # Calculate word frequencies
-        freq_dist = FreqDist(all_words)
-
-        # Score sentences based on word frequencies
-        sentence_scores = []
-        for idx, org_sent, sentence in sentences:
-            score = sum(freq_dist[word] for word in sentence.split())
-            sentence_scores.append((idx, org_sent, sentence, score))
-
-        # Sort sentences by score and return top n
-        return [s for s in sorted(sentence_scores, key=lambda x: x[-1], reverse=True)[:n]]
-
-    def generate_final_answer(self,llm, query,verbose = False,n_splits = None):
+        ans, all_urls = self._retrieve(query_splits.get("refined_splits", []), verbose=verbose)
+        return self._format_answer(self._key_context(ans), all_urls)
+
+    async def asearch(self, llm: BaseChatModel, query: str,
+                      verbose:bool = False,
+                      deadline = None)-> str:
+        """Async :meth:`search`."""
+        deadline = Deadline.coerce(deadline)
+        query_splits = await self._aplan(llm, query, verbose, None, deadline)
+        ans, all_urls = await self._aretrieve(query_splits, verbose=verbose, deadline=deadline)
+        context = await asyncio.get_running_loop().run_in_executor(None, self._key_context, ans)
+        return self._format_answer(context, all_urls)
+
+    def _key_context(self, answers):
+        sentences = list(dict.fromkeys(self.key_sentences.extract(answers, n=self.n_key_sentences)))
+        if self.near_duplicates is not None:
+            sentences = self.near_duplicates.filter(sentences)
+        return "\n".join(sentences)
+
+    def generate_final_answer(self,llm, query,verbose = False,n_splits = None,deadline = None):
+        """``deadline`` (seconds or :class:`Deadline`) bounds the whole call; pass a :class:`Deadline`
+        to read which stages ran short from its ``truncated_stages`` afterwards."""
+        if deadline is not None:
+            return SharedHttpClient.run(self.agenerate_final_answer(llm, query, verbose=verbose,
+                                                                    n_splits=n_splits, deadline=deadline))
         # Preprocess and extract key information
         answers, urls = self.generic_search(llm, query, return_content_list=True,
                                    verbose=verbose,
                                             n_splits = n_splits)
-        all_sentences = []
-        for i, answer in enumerate(answers):
-            all_sentences.extend(self.__preprocess_text(answer, i))
-        key_sentences = self.__extract_key_sentences(all_sentences, n=self.n_key_sentences)
+        context = self._key_context(answers)
+        response = llm.invoke(self._final_prompt(context, query)).content
+        return response
 
-        context = "\n".join(list(set([i[1] for i in key_sentences])))
-        prompt = f"""Based on the following key information:
+    async def agenerate_final_answer(self,llm, query,verbose = False,n_splits = None,deadline = None):
+        """``deadline`` as in :meth:`generate_final_answer`; when the LLM answer itself runs out of time
+        the key sentences are returned under :attr:`TRUNCATED_ANSWER_HEADER` and ``"answer"`` is
+        recorded in ``truncated_stages``."""
+        deadline = Deadline.coerce(deadline)
+        # A quarter of the budget is kept for the final LLM call.
+        answers, urls = await self.ageneric_search(llm, query, return_content_list=True,
+                                                   verbose=verbose,
+                                                   n_splits = n_splits,
+                                                   deadline=deadline.child(share=0.75))
+        context = await asyncio.get_running_loop().run_in_executor(None, self._key_context, answers)
+        response = await deadline.run(llm.ainvoke(self._final_prompt(context, query)), "answer")
+        if response is None:
+            # Out of time: answer with the extracted key sentences instead, saying so.
+            return f"{self.TRUNCATED_ANSWER_HEADER}\n{context}"
+        return response.content
+
+    @staticmethod
+    def _final_prompt(context, query):
+        return f"""Based on the following key information:
 
     {context}
 
     Please provide a brief answer to the query: "{query}"
     Focus only on the most crucial points."""
-
-        response = llm.invoke(prompt).content
-        return response
@@ -0,0 +1,204 @@
+import string
+from functools import lru_cache
+from itertools import chain
+from typing import List
+
+import numpy as np
+
+from ..retrieval.ann_index import top_k_indices
+
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+_SEPARATOR = " \x00 "
+
+
+@lru_cache(maxsize=1)
+def english_stop_words() -> frozenset:
+    import nltk
+
+    nltk.download("stopwords", quiet=True)
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words('english'))
+
+
+class KeySentenceExtractor:
+    """Picks the key sentences of a set of texts from a sparse sentence-by-term count matrix.
+
+    Sentences are stripped of punctuation, lowercased and split, words mapped to
+    term ids in one pass and stopwords masked out, CountVectorizer-style; every
+    method is then a few ``bincount`` products over the ``(sentence, term)`` pairs:
+
+    - ``"frequency"``: a sentence scores the corpus frequency of each of its words.
+    - ``"textrank"``: PageRank over the cosine similarity graph of the sentences.
+    - ``"mmr"``: maximal marginal relevance -- frequency relevance traded against
+      similarity to the sentences already picked (``mmr_lambda`` weighs relevance).
+    """
+
+    METHODS = ("frequency", "textrank", "mmr")
+
+    def __init__(self, method="frequency", mmr_lambda=0.7, damping=0.85, stop_words=None, sentence_splitter=None):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown key sentence method: {method!r}")
+        self.method = method
+        self.mmr_lambda = mmr_lambda
+        self.damping = damping
+        self._stop_words = stop_words
+        self._sentence_splitter = sentence_splitter
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = english_stop_words()
+        return self._stop_words
+
+    def split_sentences(self, texts) -> List[str]:
+        if self._sentence_splitter is None:
+            from nltk import sent_tokenize
+
+            self._sentence_splitter = sent_tokenize
+        return [sentence for text in texts for sentence in self._sentence_splitter(text)]
+
+    def count_pairs(self, sentences):
+        """``(rows, terms, n_terms)``: sentence and term id of every non-stopword occurrence, by sentence.
+
+        The occurrences are the entries of the sentence-by-term count matrix before
+        summing, which every product below can use as they are.
+        """
+        joined = _SEPARATOR.join(sentences)
+        fast = joined.count("\x00") == len(sentences) - 1
+        if fast:
+            # One translate/lower/split over all sentences; the NUL words between them mark the boundaries.
+            words = joined.translate(_PUNCTUATION_TABLE).lower().split()
+        else:
+            # A sentence holds a NUL of its own: split them one by one.
+            tokens = [sentence.translate(_PUNCTUATION_TABLE).lower().split() for sentence in sentences]
+            words = list(chain.from_iterable(tokens))
+        vocabulary = {word: i for i, word in enumerate(dict.fromkeys(words))}
+        terms = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+        if fast:
+            boundaries = terms == vocabulary.get("\x00", -1)
+            rows = np.cumsum(boundaries)
+        else:
+            boundaries = np.zeros(len(terms), dtype=bool)
+            rows = np.repeat(np.arange(len(sentences)), list(map(len, tokens)))
+        stop_words = self.stop_words
+        is_stop = np.fromiter((word in stop_words for word in vocabulary), dtype=bool, count=len(vocabulary))
+        keep = ~(is_stop[terms] | boundaries)
+        return rows[keep], terms[keep], len(vocabulary)
+
+    @staticmethod
+    def _frequency_scores(rows, terms, n_sentences, n_terms):
+        frequency = np.bincount(terms, minlength=n_terms)
+        return np.bincount(rows, weights=frequency[terms], minlength=n_sentences)
+
+    @staticmethod
+    def _unit_weights(rows, terms, n_sentences, n_terms):
+        """Weight of each occurrence so that every sentence's count vector has unit length."""
+        keys, counts = np.unique(rows * max(n_terms, 1) + terms, return_counts=True)
+        norms = np.sqrt(np.bincount(keys // max(n_terms, 1), weights=counts ** 2.0, minlength=n_sentences))
+        return 1.0 / norms[rows], norms > 0
+
+    def _textrank_scores(self, rows, terms, n_sentences, n_terms, tol=1e-8, max_iter=100):
+        weights, non_empty = self._unit_weights(rows, terms, n_sentences, n_terms)
+
+        def similarity_times(x):
+            # Cosine similarities S @ x as X @ (X.T @ x) without forming S, minus the diagonal (no self-loops).
+            term_weights = np.bincount(terms, weights=weights * x[rows], minlength=n_terms)
+            return np.bincount(rows, weights=weights * term_weights[terms], minlength=n_sentences) - non_empty * x
+
+        degree = similarity_times(np.ones(n_sentences))
+        connected = degree > 1e-12
+        rank = np.full(n_sentences, 1.0 / n_sentences)
+        for _ in range(max_iter):
+            share = np.where(connected, rank / np.where(connected, degree, 1.0), 0.0)
+            # Sentences sharing no words with any other spread their rank evenly.
+            updated = (1 - self.damping + self.damping * rank[~connected].sum()) / n_sentences \
+                + self.damping * similarity_times(share)
+            if np.abs(updated - rank).sum() < tol:
+                return updated
+            rank = updated
+        return rank
+
+    def _mmr_order(self, rows, terms, n_sentences, n_terms, n):
+        relevance = self._frequency_scores(rows, terms, n_sentences, n_terms)
+        relevance = relevance / max(relevance.max(), 1e-12)
+        weights, _ = self._unit_weights(rows, terms, n_sentences, n_terms)
+        starts = np.searchsorted(rows, np.arange(n_sentences + 1))
+        redundancy = np.zeros(n_sentences)
+        available = np.ones(n_sentences, dtype=bool)
+        picked = []
+        for _ in range(min(n, n_sentences)):
+            gain = np.where(available, self.mmr_lambda * relevance - (1 - self.mmr_lambda) * redundancy, -np.inf)
+            best = int(np.argmax(gain))
+            picked.append(best)
+            available[best] = False
+            own = slice(starts[best], starts[best + 1])
+            term_weights = np.bincount(terms[own], weights=weights[own], minlength=n_terms)
+            similarity = np.bincount(rows, weights=weights * term_weights[terms], minlength=n_sentences)
+            np.maximum(redundancy, similarity, out=redundancy)
+        return picked
+
+    def rank(self, sentences, n) -> List[int]:
+        """Indices of the ``n`` key sentences, best first (ties keep sentence order)."""
+        if not sentences or n <= 0:
+            return []
+        rows, terms, n_terms = self.count_pairs(sentences)
+        if self.method == "mmr":
+            return self._mmr_order(rows, terms, len(sentences), n_terms, n)
+        if self.method == "textrank":
+            scores = self._textrank_scores(rows, terms, len(sentences), n_terms)
+        else:
+            scores = self._frequency_scores(rows, terms, len(sentences), n_terms)
+        return top_k_indices(scores, n).tolist()
+
+    def extract(self, texts, n=25) -> List[str]:
+        sentences = self.split_sentences(texts)
+        return [sentences[i] for i in self.rank(sentences, n)]
+
+
+if __name__ == '__main__':
+    import random
+    import re
+    import sys
+    import time
+    from collections import Counter
+
+    # python -m pyopengenai.ai_searcher.key_sentences [n_chunks] [n_key_sentences]
+    n_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    rng = random.Random(0)
+    words = [f"term{i}" for i in range(3000)] + ["the", "of", "and", "a", "to", "is", "in", "it"]
+    chunks = [" ".join(" ".join(rng.choice(words) for _ in range(rng.randint(5, 25))).capitalize() + "."
+                       for _ in range(rng.randint(2, 6))) for _ in range(n_chunks)]
+    stop_words = {"the", "of", "and", "a", "to", "is", "in", "it"}
+    try:
+        from nltk import sent_tokenize
+
+        sent_tokenize("Punkt data present?")
+    except LookupError:
+        sent_tokenize = re.compile(r"(?<=[.!?])\s+").split
+        print("nltk punkt data missing; splitting sentences with a regex")
+
+    def previous_key_sentences(texts, n):
+        # The per-chunk preprocessing and dict scoring this module replaces.
+        all_sentences = []
+        for text in texts:
+            originals = sent_tokenize(text)
+            cleaned = [s.translate(str.maketrans('', '', string.punctuation)).lower() for s in originals]
+            stops = set(stop_words)
+            cleaned = [' '.join([word for word in s.split() if word not in stops]) for s in cleaned]
+            all_sentences.extend(zip(originals, cleaned))
+        frequency = Counter(' '.join(s for _, s in all_sentences).split())
+        scored = [(original, sum(frequency[word] for word in s.split())) for original, s in all_sentences]
+        return [original for original, _ in sorted(scored, key=lambda x: x[-1], reverse=True)[:n]]
+
+    start = time.perf_counter()
+    expected = previous_key_sentences(chunks, n)
+    print(f"previous frequency: {(time.perf_counter() - start) * 1000:8.1f} ms")
+    for method in KeySentenceExtractor.METHODS:
+        extractor = KeySentenceExtractor(method, stop_words=stop_words, sentence_splitter=sent_tokenize)
+        start = time.perf_counter()
+        found = extractor.extract(chunks, n)
+        ms = (time.perf_counter() - start) * 1000
+        note = f", same as previous: {found == expected}" if method == "frequency" else ""
+        print(f"{method:>18}: {ms:8.1f} ms for {n_chunks} chunks{note}")
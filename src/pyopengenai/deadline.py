@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+
+class Deadline:
+    """Time budget for one request, shared by every stage of the search pipeline.
+
+    Stages ask for :meth:`budget` before blocking work and call :meth:`truncate`
+    when they cut corners, so ``truncated_stages`` tells the caller which stages
+    ran short. ``Deadline(None)`` never expires.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.truncated_stages = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def coerce(cls, deadline) -> "Deadline":
+        """Accept a :class:`Deadline`, a number of seconds or ``None``."""
+        if isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def budget(self, share=1.0, cap=None):
+        """Seconds a stage may spend: ``share`` of what is left, at most ``cap``; ``None`` if unbounded."""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        remaining *= share
+        return remaining if cap is None else min(remaining, cap)
+
+    def child(self, share=1.0, cap=None) -> "Deadline":
+        """Sub-deadline for a group of stages, leaving the rest for later ones; truncations are shared."""
+        child = Deadline(self.budget(share, cap))
+        child.truncated_stages = self.truncated_stages
+        child._lock = self._lock
+        return child
+
+    def truncate(self, stage):
+        with self._lock:
+            if stage not in self.truncated_stages:
+                self.truncated_stages.append(stage)
+
+    async def run(self, coro, stage, fallback=None, share=1.0, cap=None):
+        """Await ``coro`` within the budget; on timeout record ``stage`` and return ``fallback``."""
+        timeout = self.budget(share, cap)
+        if timeout is not None and timeout <= 0:
+            coro.close()
+            self.truncate(stage)
+            return fallback
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            self.truncate(stage)
+            return fallback
@@ -1,24 +1,27 @@
-import PyPDF2
-from wordllama import WordLlama
 import tiktoken
 import re
 
+from ..retrieval.embedding_cache import cached_embed
+from ..retrieval.model_registry import ModelRegistry
+from ..retrieval.ann_index import IVFFlatIndex
+
+from ..web_search.pdf_extraction import PDFTextExtractor
+
 
 class PDFContentExtractor:
-    def __init__(self, pdf_path, chunk_size=1000):
+    def __init__(self, pdf_path, chunk_size=1000, max_pages=None, nprobe=8):
         self.pdf_path = pdf_path
         self.chunk_size = chunk_size
-        self.wl = WordLlama.load()
+        self.max_pages = max_pages
+        self.nprobe = nprobe
+        self._index = None
+        self.wl = ModelRegistry.get("wordllama")
         self.enc = tiktoken.get_encoding("cl100k_base")
         self.content = self._extract_pdf_content()
         self.chunks = self._create_chunks()
 
     def _extract_pdf_content(self):
-        with open(self.pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            content = ""
-            for page in reader.pages:
-                content += page.extract_text()
+        content = PDFTextExtractor(max_pages=self.max_pages).extract(self.pdf_path)
         return re.sub(r'\s+', ' ', content).strip()
 
     def _create_chunks(self):
@@ -29,9 +32,17 @@ class PDFContentExtractor:
             chunks.append(chunk)
         return chunks
 
+    @property
+    def index(self) -> IVFFlatIndex:
+        # Chunk embeddings come from the shared cache; the index is built on the first query.
+        if self._index is None:
+            self._index = IVFFlatIndex.build(cached_embed(self.wl, self.chunks, norm=True), nprobe=self.nprobe)
+        return self._index
+
     def get_relevant_content(self, query, top_k=5):
-        ranked_chunks = self.wl.rank(query, self.chunks)
-        return [chunk for chunk, score in ranked_chunks[:top_k]]
+        query_embed = cached_embed(self.wl, [query], norm=True)[0]
+        ids, _ = self.index.search(query_embed, top_k)
+        return [self.chunks[i] for i in ids]
 
     def search(self, query, top_k=5):
         relevant_chunks = self.get_relevant_content(query, top_k)
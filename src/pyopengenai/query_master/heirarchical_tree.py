@@ -1,138 +1,365 @@
+import hashlib
+import heapq
 import json
+import logging
 import re
+import shutil
+import threading
+import uuid
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import List
 
 import numpy as np
-from queue import PriorityQueue
-from graphviz import Digraph
-from wordllama import WordLlama
 from wordllama.algorithms import kmeans_clustering
 
+from ..retrieval.embedding_cache import cached_embed, model_fingerprint
+from ..retrieval.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
 
 class HierarchicalSentenceTree:
-    class Node:
-        def __init__(self, embedding, text=None):
-            self.embedding = embedding
-            self.text = text
-            self.children = []
-            self.id = id(self)
+    """Sentence embeddings clustered recursively with k-means and searched best-first.
 
-        def __le__(self, other):
-            return np.linalg.norm(self.embedding) <= np.linalg.norm(other.embedding)
+    The built tree is kept flat: node ``i`` has unit vector ``unit[i]`` and norm
+    ``norms[i]`` (leaves are sentence embeddings, internal nodes cluster means),
+    its children are the contiguous ids ``child_offsets[i]:child_offsets[i + 1]``
+    (nodes are numbered breadth-first) and ``leaf_sentence[i]`` indexes
+    ``sentences`` for leaves and is -1 for clusters.
+    """
 
-        def __lt__(self, other):
-            return np.linalg.norm(self.embedding) < np.linalg.norm(other.embedding)
+    FORMAT_VERSION = 1
+    _ARRAYS = ("unit", "norms", "child_offsets", "leaf_sentence")
 
     def __init__(
         self,
         text_or_chunks: str | List[str],
         max_depth=5,
         min_cluster_size=3,
-        load_tree = True
+        load_tree = True,
+        split_threshold=None
     ):
         self.context = text_or_chunks
         self.max_depth = max_depth
         self.min_cluster_size = min_cluster_size
-        self.root = None
-        self.wl = WordLlama.load()
+        # add() splits a bottom cluster once it holds more sentences than this
+        self.split_threshold = split_threshold or 4 * min_cluster_size
+        self._lock = threading.RLock()
+        self._added_since_rebalance = 0
+        self._rebalancer = None
+        self._stop_rebalancer = None
+        self.unit = None
+        self.norms = None
+        self.child_offsets = None
+        self.leaf_sentence = None
+        self.wl = ModelRegistry.get("wordllama")
         self.load_tree = load_tree
         self.sentences = self._split_sentences()
         self._load_tree()
 
+    @property
+    def n_nodes(self) -> int:
+        return 0 if self.leaf_sentence is None else len(self.leaf_sentence)
+
     def _split_sentences(self):
-        if isinstance(self.context, str):
+        return self._sentences_of(self.context)
+
+    @staticmethod
+    def _sentences_of(text_or_chunks):
+        if isinstance(text_or_chunks, str):
             findings: List = re.findall(r'[^!.?]+[!.?]',
-                                        self.context)
+                                        text_or_chunks)
         else:
-            return self.context
+            return text_or_chunks
         return findings
 
     def build_tree(self, sentences):
-        embeddings = self.wl.embed(sentences, norm=True)
-        self.root = self.Node(np.mean(embeddings, axis=0))
-        queue = [(self.root, embeddings, sentences, 0)]
+        self.sentences = list(sentences)
+        layout = self._build_layout(self.sentences)
+        with self._lock:
+            self._set_layout(*layout)
+            self._added_since_rebalance = 0
+
+    def _build_layout(self, sentences):
+        embeddings = cached_embed(self.wl, sentences, norm=True)
+        if len(sentences) == 0:
+            return np.zeros((0, 0), dtype=np.float32), [], [0]
+        vectors = [np.mean(embeddings, axis=0)]
+        leaf_sentence = [-1]
+        child_offsets = []
+        # Children are numbered when their parent is expanded, so popping in FIFO order visits
+        # nodes in id order and every node's children get a contiguous id range.
+        queue = deque([(np.arange(len(sentences)), 0, False)])
 
         while queue:
-            node, node_embeddings, node_sentences, depth = queue.pop(0)
+            indices, depth, is_leaf = queue.popleft()
+            child_offsets.append(len(vectors))
+            if is_leaf:
+                continue
+
+            if depth >= self.max_depth or len(indices) <= self.min_cluster_size:
+                for i in indices:
+                    vectors.append(embeddings[i])
+                    leaf_sentence.append(int(i))
+                    queue.append((None, depth + 1, True))
+                continue
+
+            for cluster_indices in self._cluster(embeddings[indices]):
+                cluster_indices = indices[cluster_indices]
+                vectors.append(np.mean(embeddings[cluster_indices], axis=0))
+                leaf_sentence.append(-1)
+                queue.append((cluster_indices, depth + 1, False))
 
-            if depth >= self.max_depth or len(node_embeddings) <= self.min_cluster_size:
-                for emb, sent in zip(node_embeddings, node_sentences):
-                    node.children.append(self.Node(emb, sent))
+        child_offsets.append(len(vectors))
+        return np.asarray(vectors, dtype=np.float32), leaf_sentence, child_offsets
+
+    @staticmethod
+    def _cluster(node_embeddings):
+        k = max(2, min(int(len(node_embeddings) ** 0.5), 5))  # Limit max clusters to 5
+        cluster_labels, _ = kmeans_clustering(
+            node_embeddings,
+            k=k,
+            max_iterations=100,
+            tolerance=1e-4,
+            n_init=10,
+            min_iterations=5,
+            random_state=None
+        )
+
+        label_maps = defaultdict(list)
+        for idx, val in enumerate(cluster_labels):
+            label_maps[val].append(idx)
+        return list(label_maps.values())
+
+    def _set_layout(self, vectors, leaf_sentence, child_offsets):
+        norms = np.linalg.norm(vectors, axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+        self.norms = norms.astype(np.float32)
+        self.unit = (vectors / np.maximum(norms, 1e-12)[:, None]).astype(np.float32) if len(vectors) else vectors
+        self.leaf_sentence = np.asarray(leaf_sentence, dtype=np.int64)
+        self.child_offsets = np.asarray(child_offsets, dtype=np.int64)
+
+    def _snapshot(self):
+        # add() and rebalance() swap the arrays under the lock; a search works on one consistent set.
+        with self._lock:
+            return self.unit, self.leaf_sentence, self.child_offsets, self.sentences
+
+    def add(self, text_or_chunks: str | List[str], split_threshold=None) -> int:
+        """Insert new sentences without rebuilding the tree; returns how many were added.
+
+        Only the new sentences are embedded. Each one walks down to the most similar
+        bottom cluster, updating the cluster means on its way, and a cluster reaching
+        more than ``split_threshold`` sentences is split with k-means right away, so
+        the rest of the batch descends into its parts. The tree drifts from what
+        :meth:`build_tree` would produce; :meth:`rebalance` rebuilds it.
+        """
+        new = [sentence for sentence in self._sentences_of(text_or_chunks) if sentence]
+        if not new:
+            return 0
+        embeddings = cached_embed(self.wl, new, norm=True)
+        with self._lock:
+            start = len(self.sentences)
+            # A fresh list: the old one may be the caller's, or in use by a running search.
+            self.sentences = list(self.sentences) + new
+            self._insert(range(start, len(self.sentences)), embeddings, split_threshold)
+            self._added_since_rebalance += len(new)
+        return len(new)
+
+    def _insert(self, sentence_ids, embeddings, split_threshold=None):
+        if self.n_nodes == 0:
+            self._set_layout(*self._build_layout(self.sentences))
+            return
+        split_threshold = split_threshold or self.split_threshold
+        children, vectors, counts, leaf_sentence, depth = self._editable_tree()
+        for sentence, embedding in zip(sentence_ids, np.asarray(embeddings, dtype=np.float64)):
+            node = 0
+            while True:
+                counts[node] += 1
+                vectors[node] += (embedding - vectors[node]) / counts[node]
+                clusters = [child for child in children[node] if leaf_sentence[child] < 0]
+                if not clusters:
+                    break
+                means = np.asarray([vectors[child] for child in clusters])
+                node = clusters[int(np.argmax(means @ embedding / np.maximum(np.linalg.norm(means, axis=1), 1e-12)))]
+            children[node].append(len(vectors))
+            children.append([])
+            vectors.append(embedding)
+            counts.append(1)
+            leaf_sentence.append(int(sentence))
+            depth.append(depth[node] + 1)
+            self._split(node, children, vectors, counts, leaf_sentence, depth, split_threshold)
+        self._set_layout(*self._flatten(children, vectors, leaf_sentence))
+
+    def _editable_tree(self):
+        # Per-node child lists, raw means and sentence counts rebuilt from the flat arrays.
+        offsets = np.asarray(self.child_offsets)
+        n = self.n_nodes
+        children = [list(range(offsets[i], offsets[i + 1])) for i in range(n)]
+        vectors = list(np.asarray(self.unit, dtype=np.float64) * np.asarray(self.norms, dtype=np.float64)[:, None])
+        counts = (np.asarray(self.leaf_sentence) >= 0).astype(np.int64)
+        depth = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            depth[offsets[i]:offsets[i + 1]] = depth[i] + 1
+        for i in range(n - 1, -1, -1):  # children always have larger ids than their parent
+            counts[i] += counts[offsets[i]:offsets[i + 1]].sum()
+        return children, vectors, counts.tolist(), np.asarray(self.leaf_sentence).tolist(), depth.tolist()
+
+    def _split(self, node, children, vectors, counts, leaf_sentence, depth, split_threshold):
+        # Bottom clusters above the threshold get k-means sub-clusters, which are split again if still too big.
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if len(children[node]) <= split_threshold or depth[node] >= self.max_depth:
                 continue
+            leaves = children[node]
+            leaf_vectors = np.asarray([vectors[leaf] for leaf in leaves], dtype=np.float32)
+            groups = self._cluster(leaf_vectors)
+            if len(groups) < 2:
+                continue
+            children[node] = []
+            for members in groups:
+                children[node].append(len(vectors))
+                pending.append(len(vectors))
+                children.append([leaves[m] for m in members])
+                vectors.append(np.mean(leaf_vectors[members], axis=0).astype(np.float64))
+                counts.append(len(members))
+                leaf_sentence.append(-1)
+                depth.append(depth[node] + 1)
 
-            k = max(2, min(int(len(node_embeddings) ** 0.5), 5))  # Limit max clusters to 5
-            cluster_labels, _ = kmeans_clustering(
-                node_embeddings,
-                k=k,
-                max_iterations=100,
-                tolerance=1e-4,
-                n_init=10,
-                min_iterations=5,
-                random_state=None
-            )
-
-            label_maps = defaultdict(list)
-            for idx, val in enumerate(cluster_labels):
-                label_maps[val].append(idx)
-
-            for cluster_indices in label_maps.values():
-                cluster_embeddings = node_embeddings[cluster_indices]
-                cluster_sentences = [node_sentences[i] for i in cluster_indices]
-                child_node = self.Node(np.mean(cluster_embeddings, axis=0))
-                node.children.append(child_node)
-                queue.append((child_node, cluster_embeddings, cluster_sentences, depth + 1))
+    @staticmethod
+    def _flatten(children, vectors, leaf_sentence):
+        # Renumber breadth-first, so children are contiguous again.
+        order = [0]
+        child_offsets = []
+        for node in order:  # grows while iterating: a breadth-first walk
+            child_offsets.append(len(order))
+            order.extend(children[node])
+        child_offsets.append(len(order))
+        return (np.asarray([vectors[node] for node in order], dtype=np.float32),
+                [leaf_sentence[node] for node in order], child_offsets)
+
+    def rebalance(self):
+        """Rebuild the tree from all sentences (embeddings come from the cache) and swap it in.
+
+        Searches and :meth:`add` keep using the old tree meanwhile; sentences added during
+        the rebuild are inserted into the new tree before it replaces the old one.
+        """
+        sentences = self.sentences
+        layout = self._build_layout(sentences)
+        with self._lock:
+            added = self.sentences[len(sentences):]
+            self._set_layout(*layout)
+            self._added_since_rebalance = len(added)
+            if added:
+                self._insert(range(len(sentences), len(self.sentences)), cached_embed(self.wl, added, norm=True))
+
+    def start_rebalancer(self, interval=600, min_growth=0.2):
+        """Every ``interval`` seconds, :meth:`rebalance` if :meth:`add` grew the tree by ``min_growth`` since the last build."""
+        with self._lock:
+            if self._rebalancer is not None and self._rebalancer.is_alive():
+                return self._rebalancer
+            stop = self._stop_rebalancer = threading.Event()
+
+            def run():
+                while not stop.wait(interval):
+                    if self._added_since_rebalance > min_growth * len(self.sentences):
+                        try:
+                            self.rebalance()
+                        except Exception:
+                            logger.exception("Rebalancing the sentence tree failed")
+
+            self._rebalancer = threading.Thread(target=run, name="pyopengenai-tree-rebalancer", daemon=True)
+            self._rebalancer.start()
+            return self._rebalancer
+
+    def stop_rebalancer(self):
+        with self._lock:
+            if self._rebalancer is not None:
+                self._stop_rebalancer.set()
+                self._rebalancer = None
 
     def visualize_tree(self, output_file='sentence_tree'):
+        from graphviz import Digraph
+
         dot = Digraph(comment='Hierarchical Sentence Tree')
         dot.attr(rankdir='TB', size='40,40', dpi='300', fontname='Arial')
 
-        def add_nodes(node, parent=None):
-            if node.text:
-                dot.node(str(node.id), node.text[:50] + '...' if len(node.text) > 50 else node.text,
+        for node in range(self.n_nodes):
+            start, end = self.child_offsets[node], self.child_offsets[node + 1]
+            if self.leaf_sentence[node] >= 0:
+                text = self.sentences[self.leaf_sentence[node]]
+                dot.node(str(node), text[:50] + '...' if len(text) > 50 else text,
                          shape='box', style='filled', fillcolor='lightblue',
                          fontsize='10', width='3', height='0.5')
             else:
-                dot.node(str(node.id), f'Cluster\n{len(node.children)} items',
+                dot.node(str(node), f'Cluster\n{end - start} items',
                          shape='ellipse', style='filled', fillcolor='lightgreen',
                          fontsize='12', width='1.5', height='1.5')
-
-            if parent:
-                dot.edge(str(parent.id), str(node.id))
-
-            for child in node.children:
-                add_nodes(child, node)
-
-        add_nodes(self.root)
+            for child in range(start, end):
+                dot.edge(str(node), str(child))
 
         dot.render(output_file, view=True, format='png', cleanup=True,
                    engine='dot', renderer='cairo', formatter='cairo')
 
     @staticmethod
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    def _best_first(layout, child_scores, root_score, k):
+        # Expands the most similar node first; leaves come out in descending similarity.
+        _, leaf_sentence, child_offsets, sentences = layout
+        results = []
+        heap = [(-root_score, 0)]
+        while heap and len(results) < k:
+            neg_score, node = heapq.heappop(heap)
+            sentence = leaf_sentence[node]
+            if sentence >= 0:
+                results.append((sentences[sentence], -neg_score))
+                continue
+            start = int(child_offsets[node])
+            for child, score in enumerate(child_scores(start, int(child_offsets[node + 1])).tolist(), start):
+                heapq.heappush(heap, (-score, child))
+        return results
 
     def search_tree(self, query_embedding, k=5):
+        layout = self._snapshot()
+        unit = layout[0]
+        if layout[1] is None or len(layout[1]) == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        return self._best_first(layout, lambda start, end: unit[start:end] @ query,
+                                float(unit[0] @ query), k)
+
+    def search_tree_batch(self, query_embeddings, k=5, batch_size=256):
+        """Search many queries at once.
+
+        Each node expanded by any query in a batch is scored against the whole batch
+        with one matrix product, so the upper levels are shared between queries.
+        """
+        layout = self._snapshot()
+        unit = layout[0]
+        if layout[1] is None or len(layout[1]) == 0:
+            return [[] for _ in query_embeddings]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
         results = []
-        pq = PriorityQueue()
-        pq.put((-self.cosine_similarity(query_embedding, self.root.embedding), self.root))
-
-        while not pq.empty() and len(results) < k:
-            _, node = pq.get()
-
-            if node.text:  # Leaf node (sentence)
-                results.append((node.text, self.cosine_similarity(query_embedding, node.embedding)))
-            else:  # Internal node (cluster)
-                for child in sorted(node.children,
-                                    key=lambda x: self.cosine_similarity(query_embedding, x.embedding),
-                                    reverse=True):
-                    pq.put((-self.cosine_similarity(query_embedding, child.embedding), child))
-
+        for i in range(0, len(queries), batch_size):
+            batch = queries[i:i + batch_size]
+            blocks = {}
+
+            def child_scores(column):
+                def scores(start, end):
+                    block = blocks.get(start)
+                    if block is None:
+                        block = blocks[start] = unit[start:end] @ batch.T
+                    return block[:, column]
+                return scores
+
+            root_scores = batch @ unit[0]
+            results.extend(self._best_first(layout, child_scores(j), float(root_scores[j]), k)
+                           for j in range(len(batch)))
         return results
 
     def _query(self, query, k=5):
-        query_embedding = self.wl.embed([query], norm=True)[0]
+        query_embedding = cached_embed(self.wl, [query], norm=True)[0]
         results = self.search_tree(query_embedding, k)
         results.sort(key=lambda x: x[1], reverse=True)
         return results
@@ -146,8 +373,13 @@ class HierarchicalSentenceTree:
     def top_k_with_scores(self,query,k = 5):
         return self._query(query,k)
 
+    def top_k_batch(self, queries: List[str], k=5) -> List[List[str]]:
+        query_embeddings = cached_embed(self.wl, queries, norm=True)
+        return [[text for text, _ in sorted(results, key=lambda x: x[1], reverse=True)]
+                for results in self.search_tree_batch(query_embeddings, k)]
+
     def topk_optimal(self, query):
-        query_embedding = self.wl.embed([query], norm=True)[0]
+        query_embedding = cached_embed(self.wl, [query], norm=True)[0]
 
         # Start with a large k
         initial_k = 50
@@ -175,13 +407,105 @@ class HierarchicalSentenceTree:
         if self.load_tree:
             self.build_tree(self.sentences)
 
+    @staticmethod
+    def corpus_hash(sentences) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for sentence in sentences:
+            digest.update(sentence.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def save(self, path):
+        """Write the built tree to the directory ``path``: one ``.npy`` per array plus sentences and metadata.
+
+        Everything is written to a staging directory next to ``path`` first and renamed into place, so a
+        concurrent :meth:`load` never sees arrays, sentences and metadata from different saves.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        retired = staging.with_name(staging.name + ".old")
+        staging.mkdir()
+        try:
+            with self._lock:
+                self._save(staging)
+            if path.exists():
+                path.rename(retired)
+            staging.rename(path)
+        except BaseException:
+            if retired.exists() and not path.exists():
+                retired.rename(path)
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        # Readers that memory-mapped the old arrays keep them until they let go.
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _save(self, path):
+        for name in self._ARRAYS:
+            np.save(path / f"{name}.npy", np.asarray(getattr(self, name)))
+        (path / "sentences.json").write_text(json.dumps(self.sentences))
+        meta = {
+            "version": self.FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "min_cluster_size": self.min_cluster_size,
+            "corpus_hash": self.corpus_hash(self.sentences),
+            "model": model_fingerprint(self.wl),
+            "n_nodes": self.n_nodes,
+        }
+        (path / "tree.json").write_text(json.dumps(meta, indent=2))
+
+    @classmethod
+    def load(cls, path, text_or_chunks=None, mmap=True) -> "HierarchicalSentenceTree":
+        """Load a tree written by :meth:`save`; arrays are memory-mapped unless ``mmap=False``.
+
+        When ``text_or_chunks`` is given the tree must have been built from that corpus.
+        """
+        path = Path(path)
+        meta = json.loads((path / "tree.json").read_text())
+        if meta.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree format {meta.get('version')!r} in {path}")
+        sentences = json.loads((path / "sentences.json").read_text())
+        if cls.corpus_hash(sentences) != meta["corpus_hash"]:
+            raise ValueError(f"Tree at {path} is corrupt: sentences do not match the stored hash")
+
+        tree = cls(sentences, max_depth=meta["max_depth"], min_cluster_size=meta["min_cluster_size"],
+                   load_tree=False)
+        if text_or_chunks is not None:
+            tree.context = text_or_chunks
+            if cls.corpus_hash(tree._split_sentences()) != meta["corpus_hash"]:
+                raise ValueError(f"Tree at {path} was built from a different corpus")
+        if meta["model"] != model_fingerprint(tree.wl):
+            raise ValueError(f"Tree at {path} was built with another embedding model ({meta['model']})")
+
+        for name in cls._ARRAYS:
+            setattr(tree, name, np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None))
+        n_nodes = meta["n_nodes"]
+        if (len(tree.unit) != n_nodes or len(tree.norms) != n_nodes or len(tree.leaf_sentence) != n_nodes
+                or len(tree.child_offsets) != n_nodes + 1):
+            raise ValueError(f"Tree at {path} is corrupt: arrays do not match its {n_nodes} nodes")
+        if n_nodes and tree.leaf_sentence.max() >= len(sentences):
+            raise ValueError(f"Tree at {path} is corrupt: leaves point past its {len(sentences)} sentences")
+        return tree
+
+    @classmethod
+    def load_or_build(cls, text_or_chunks, path, **kwargs) -> "HierarchicalSentenceTree":
+        """Reuse the tree saved at ``path`` if it matches the corpus, otherwise build and save it."""
+        if (Path(path) / "tree.json").exists():
+            try:
+                return cls.load(path, text_or_chunks)
+            except (ValueError, OSError):
+                pass
+        tree = cls(text_or_chunks, **kwargs)
+        tree.save(path)
+        return tree
+
 # Example usage:
 if __name__ == "__main__":
     # Load sentences
     text = Path("/home/ntlpt59/Downloads/combined_text.txt").read_text()
     print(len(text))
-    # Create and build the tree
-    tree = HierarchicalSentenceTree(text_or_chunks=text)
+    # Build the tree once; later runs (and other processes) memory-map the saved copy
+    tree = HierarchicalSentenceTree.load_or_build(text, Path.home() / ".cache/pyopengenai/combined_text_tree")
 
     # Visualize the tree
     # tree.visualize_tree()
@@ -192,3 +516,8 @@ if __name__ == "__main__":
     for x in top_k_results:
         print(x)
         print('#'*50)
+
+    # Many queries in one call share the expansion of the upper levels
+    queries = [query, "how to stream responses?", "which models support tools?"]
+    for q, results in zip(queries, tree.top_k_batch(queries, 3)):
+        print(q, results)
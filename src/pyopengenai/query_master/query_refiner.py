@@ -25,4 +25,8 @@ class QueryRefiner:
     def refine_query(self,llm:BaseChatModel, query: str) -> str:
         return llm.invoke(DESCRIPTOR_PROMPT.format(query=query)).content
 
+    @classmethod
+    async def arefine_query(self,llm:BaseChatModel, query: str) -> str:
+        return (await llm.ainvoke(DESCRIPTOR_PROMPT.format(query=query))).content
+
 
@@ -5,6 +5,16 @@ from langchain_core.output_parsers import JsonOutputParser
 class SearchQueryToNSubquery:
     @classmethod
     def ai_splits(self,llm: BaseChatModel,query: str,n_splits: int | None = None) -> dict:
+        results = llm.invoke(self._messages(query, n_splits)).content
+        return self._parse(results)
+
+    @classmethod
+    async def aai_splits(self,llm: BaseChatModel,query: str,n_splits: int | None = None) -> dict:
+        results = (await llm.ainvoke(self._messages(query, n_splits))).content
+        return self._parse(results)
+
+    @staticmethod
+    def _messages(query, n_splits):
         if n_splits is None:
             n_splits = ""
         messages = [
@@ -15,8 +25,10 @@ class SearchQueryToNSubquery:
                         "Output JSON format: {\"refined_splits\":[<list_of_better_google_search_queries>]}"},
             {"role": "user", "content": f"Query: {query}"}
         ]
-        results = llm.invoke(messages).content
+        return messages
 
+    @staticmethod
+    def _parse(results) -> dict:
         try:
             output_parser = JsonOutputParser()
             parsed_results = output_parser.parse(results)
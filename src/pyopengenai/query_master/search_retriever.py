@@ -1,8 +1,15 @@
+import asyncio
 import json
 
 from pydantic import BaseModel
-from wordllama import WordLlama
+import numpy as np
 from ..researcher_ai import RealTimeGoogleSearchProvider, UrlTextParser
+from ..web_search.http_client import SharedHttpClient
+from ..deadline import Deadline
+from ..retrieval.embedding_cache import cached_embed
+from ..retrieval.model_registry import ModelRegistry
+from ..retrieval.ann_index import top_k_indices
+from ..retrieval.dedup import NearDuplicateFilter
 from .text_splitter import TextProcessor
 
 
@@ -11,19 +18,35 @@ class SearchRetrieverResult(BaseModel):
     urls: list = []
     all_contents: list = []
     all_splits: list = []
+    truncated_stages: list = []
+    removed_duplicates: int = 0
 
 
 class SearchRetriever:
+    # With less than this many seconds left, PDFs are read only up to low_time_pdf_pages pages
+    low_time_threshold = 5.0
+    low_time_pdf_pages = 10
+
     def __init__(self,chunk_overlap = 25,
 chunk_size = 250,
 max_urls = 5,
-                 extract_pdf=True):
+                 extract_pdf=True,
+                 fetch_deadline=None,
+                 first_k_pages=None,
+                 store=None,
+                 near_duplicate_threshold=None):
         self.chunk_overlap = chunk_overlap
         self.chunk_size = chunk_size
         self.max_urls = max_urls
+        self.fetch_deadline = fetch_deadline
+        self.first_k_pages = first_k_pages
+        # Optional HybridDocumentStore; every fetched page is added to it for later queries
+        self.store = store
+        # Optional: splits this similar to an earlier one (mirrored pages) are dropped before embedding
+        self.near_duplicates = NearDuplicateFilter(near_duplicate_threshold) if near_duplicate_threshold else None
         self.parser = UrlTextParser(extract_pdf=extract_pdf)
         self.searcher = RealTimeGoogleSearchProvider()
-        self.splitter = WordLlama.load()
+        self.splitter = ModelRegistry.get("wordllama")
 
     def fetch_and_store_search_results(self, query, file_name_json):
         urls = self.searcher.perform_search(query,max_urls=self.max_urls)
@@ -32,28 +55,201 @@ max_urls = 5,
             json.dump(contents, f, indent=2)
 
     def query_based_content_retrieval(self, query, topk=10, return_urls=False,
-                                      verbose = False):
-        urls = self.searcher.perform_search(query,max_urls=self.max_urls)
+                                      verbose = False, deadline=None):
+        return SharedHttpClient.run(self.aquery_based_content_retrieval(query, topk=topk, return_urls=return_urls,
+                                                                        verbose=verbose, deadline=deadline))
+
+    async def aquery_based_content_retrieval(self, query, topk=10, return_urls=False,
+                                             verbose = False, deadline=None):
+        """``deadline`` (seconds or :class:`Deadline`) bounds search, fetch and ranking together."""
+        deadline = Deadline.coerce(deadline)
+        urls = await deadline.run(self.searcher.aperform_search(query,max_urls=self.max_urls), "search",
+                                  fallback=[], share=0.5)
         if verbose:
             print(f"URLs found: {urls}")
-        contents = self.parser.parse_html(urls)
+        contents, splits = await self._stream_and_split(urls, deadline)
+        splits, _, removed = await self._adrop_near_duplicates(splits, deadline)
         if verbose:
             print(f"len of contents: {len(contents)}")
-
-        splits = TextProcessor.tokenize_list(contents,chunk_size=self.chunk_size,
-                                             chunk_overlap=self.chunk_overlap)
-        if verbose:
-            print(f"len of splits: {len(splits)}")
-        tokens = self.splitter.topk(query, splits, min(topk, len(splits)-1)) if len(splits)>2 else []
+            print(f"len of splits: {len(splits)} ({removed} near-duplicates removed)")
+        tokens = await self._arank(query, splits, topk, deadline)
         if return_urls:
             return tokens, urls
         return SearchRetrieverResult(
             topk_chunks=tokens,
             urls=urls,
             all_contents=contents,
-            all_splits = splits
+            all_splits = splits,
+            truncated_stages=list(deadline.truncated_stages),
+            removed_duplicates=removed,
         )
 
+    def drop_near_duplicates(self, splits, allowed=None):
+        """Remove near-duplicate splits, keeping the first copy; returns ``(splits, allowed, n_removed)``.
+
+        ``allowed`` lists of split indices (as in :meth:`rank_many`) are remapped so that
+        each still reaches the kept copy of every split it had.
+        """
+        if self.near_duplicates is None or len(splits) < 2:
+            return splits, allowed, 0
+        representatives = self.near_duplicates.representatives(splits)
+        kept = np.flatnonzero(representatives == np.arange(len(splits)))
+        position = np.empty(len(splits), dtype=np.int64)
+        position[kept] = np.arange(len(kept))
+        position = position[representatives].tolist()
+        if allowed is not None:
+            allowed = [list(dict.fromkeys(position[i] for i in ids)) for ids in allowed]
+        return [splits[i] for i in kept], allowed, len(splits) - len(kept)
+
+    async def _adrop_near_duplicates(self, splits, deadline, allowed=None):
+        if self.near_duplicates is None or deadline.expired:
+            return splits, allowed, 0
+        return await asyncio.get_running_loop().run_in_executor(None, self.drop_near_duplicates, splits, allowed)
+
+    async def _arank(self, query, splits, topk, deadline):
+        if len(splits) <= 2:
+            return []
+        k = min(topk, len(splits)-1)
+        if deadline.expired:
+            # No time left to embed: keep the chunks of the pages that arrived first.
+            deadline.truncate("rank")
+            return splits[:k]
+        return await asyncio.get_running_loop().run_in_executor(None, self._topk, query, splits, k)
+
+    def _topk(self, query, splits, k):
+        return self.rank_many([query], splits, k)[0]
+
+    async def _arank_many(self, queries, splits, allowed, topk, deadline, dedupe=False):
+        # Per query, the same rules as _arank over the splits it may use.
+        ks = [min(topk, len(ids) - 1) if len(ids) > 2 else 0 for ids in allowed]
+        if deadline.expired:
+            deadline.truncate("rank")
+            return [[splits[i] for i in ids[:k]] for ids, k in zip(allowed, ks)]
+        return await asyncio.get_running_loop().run_in_executor(None, self.rank_many, queries, splits, ks,
+                                                                allowed, dedupe)
+
+    def rank_many(self, queries, splits, topk=10, allowed=None, dedupe=False):
+        """Rank a pool of splits for many queries at once; returns the top splits of each query.
+
+        Every distinct split is embedded once and all queries are scored with one
+        query-by-split matrix product. ``topk`` is an int or one value per query,
+        ``allowed`` optionally limits query ``i`` to the split indices ``allowed[i]``,
+        and with ``dedupe`` a split is returned for one query only: the one it
+        scores highest for.
+        """
+        unique = list(dict.fromkeys(splits))
+        if not unique or not queries:
+            return [[] for _ in queries]
+        ks = [topk] * len(queries) if isinstance(topk, int) else list(topk)
+        split_embeds = cached_embed(self.splitter, unique, norm=True)
+        query_embeds = cached_embed(self.splitter, list(queries), norm=True)
+        scores = query_embeds @ split_embeds.T
+        if allowed is not None:
+            position = {text: i for i, text in enumerate(unique)}
+            mask = np.zeros(scores.shape, dtype=bool)
+            for row, ids in enumerate(allowed):
+                mask[row, [position[splits[i]] for i in ids]] = True
+            scores = np.where(mask, scores, -np.inf)
+
+        # With dedupe, extra candidates per query stand in for splits taken by other queries.
+        depth = len(queries) if dedupe else 1
+        ranked = []
+        for row, k in zip(scores, ks):
+            best = top_k_indices(row, k * depth)
+            ranked.append(best[np.isfinite(row[best])])
+        if dedupe:
+            pairs = sorted(((-scores[q, i], q, i) for q, best in enumerate(ranked) for i in best.tolist()))
+            taken, ranked = set(), [[] for _ in queries]
+            for _, q, i in pairs:
+                if i not in taken and len(ranked[q]) < ks[q]:
+                    taken.add(i)
+                    ranked[q].append(i)
+        return [[unique[i] for i in best[:k]] for best, k in zip(ranked, ks)]
+
+    def multi_query_content_retrieval(self, queries, topk=10, verbose=False, max_concurrency=None, deadline=None,
+                                      dedupe=False):
+        """Run several queries together: one batched search, each distinct URL fetched and split once.
+
+        Returns one :class:`SearchRetrieverResult` per query, ranked against that query's own URLs;
+        all queries are ranked in one pass (see :meth:`rank_many`, also for ``dedupe``).
+        """
+        return SharedHttpClient.run(self.amulti_query_content_retrieval(queries, topk, verbose, max_concurrency,
+                                                                        deadline, dedupe))
+
+    async def amulti_query_content_retrieval(self, queries, topk=10, verbose=False, max_concurrency=None,
+                                             deadline=None, dedupe=False):
+        deadline = Deadline.coerce(deadline)
+        urls_per_query = await deadline.run(self.searcher.aperform_multi_search(queries, max_urls=self.max_urls),
+                                            "search", fallback=[[] for _ in queries], share=0.5)
+        unique_urls = list(dict.fromkeys(url for urls in urls_per_query for url in urls))
+        if verbose:
+            print(f"URLs found: {sum(map(len, urls_per_query))}, unique: {len(unique_urls)}")
+        pages = await self._fetch_and_split(unique_urls, max_concurrency, deadline)
+
+        pool = []
+        page_ids = {}
+        for url, _, page_splits in pages:
+            page_ids[url] = range(len(pool), len(pool) + len(page_splits))
+            pool.extend(page_splits)
+        owned = []
+        for urls in urls_per_query:
+            wanted = set(urls)
+            owned.append([(url, text) for url, text, _ in pages if url in wanted])
+        allowed = [[i for url, _ in own for i in page_ids[url]] for own in owned]
+        n_allowed = [len(ids) for ids in allowed]
+        pool, allowed, removed = await self._adrop_near_duplicates(pool, deadline, allowed)
+        if verbose and removed:
+            print(f"Near-duplicate splits removed: {removed}")
+        ranked = await self._arank_many(queries, pool, allowed, topk, deadline, dedupe)
+
+        return [SearchRetrieverResult(topk_chunks=tokens, urls=urls,
+                                      all_contents=[text for _, text in own],
+                                      all_splits=[pool[i] for i in ids],
+                                      truncated_stages=list(deadline.truncated_stages),
+                                      removed_duplicates=n - len(ids))
+                for tokens, urls, own, ids, n in zip(ranked, urls_per_query, owned, allowed, n_allowed)]
+
+    async def _fetch_and_split(self, urls, max_concurrency=None, deadline=None):
+        # Pages are split as they arrive, while slower URLs are still downloading.
+        loop = asyncio.get_running_loop()
+        fetch_deadline = self.fetch_deadline
+        url_fetch_timeout = 10
+        max_pdf_pages = None
+        if deadline is not None and deadline.bounded:
+            # Keep a tenth of the remaining time for splitting and ranking.
+            budget = deadline.budget(share=0.9)
+            fetch_deadline = budget if fetch_deadline is None else min(fetch_deadline, budget)
+            url_fetch_timeout = max(0.1, min(url_fetch_timeout, budget))
+            if deadline.remaining() < self.low_time_threshold and any(
+                    self.parser._is_pdf_url(self.parser._arxiv_url_fix(url)) for url in urls):
+                max_pdf_pages = self.low_time_pdf_pages
+                deadline.truncate("extract")
+        on_timeout = (lambda skipped: deadline.truncate("fetch")) if deadline is not None else None
+
+        fetched = []
+        split_jobs = []
+        async for url, text in self.parser.aiter_parse(urls, deadline=fetch_deadline,
+                                                       first_k=self.first_k_pages,
+                                                       url_fetch_timeout=url_fetch_timeout,
+                                                       max_concurrency=max_concurrency,
+                                                       max_pdf_pages=max_pdf_pages,
+                                                       on_timeout=on_timeout):
+            fetched.append((url, text))
+            split_jobs.append(loop.run_in_executor(None, TextProcessor.tokenize_text, text,
+                                                   self.chunk_size, self.chunk_overlap) if text else None)
+        if self.store is not None:
+            await loop.run_in_executor(None, self.store.add_many, [(url, text) for url, text in fetched if text])
+        page_splits = await asyncio.gather(*[job for job in split_jobs if job is not None])
+        page_splits = iter(page_splits)
+        return [(url, text, next(page_splits) if job is not None else [])
+                for (url, text), job in zip(fetched, split_jobs)]
+
+    async def _stream_and_split(self, urls, deadline=None):
+        pages = await self._fetch_and_split(urls, deadline=deadline)
+        contents = [text for _, text, _ in pages]
+        splits = [split for _, _, page_splits in pages for split in page_splits]
+        return contents, splits
+
 
 # Example usage
 if __name__ == "__main__":
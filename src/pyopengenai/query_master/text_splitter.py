@@ -1,27 +1,28 @@
+from functools import lru_cache
 from typing import List
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from ..retrieval.chunking import SpanChunker
+from ..retrieval.dedup import NearDuplicateFilter
+
+
+@lru_cache(maxsize=32)
+def _chunker(chunk_size, chunk_overlap) -> SpanChunker:
+    return SpanChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
 
 class TextProcessor:
     @staticmethod
     def tokenize_text(text, chunk_size=100, chunk_overlap=20):
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ".", "!", "?", " ", ""]
-        )
-        return text_splitter.split_text(text)
+        return _chunker(chunk_size, chunk_overlap).split_text(text)
 
     @staticmethod
     def tokenize_list(content: List | None = None,
                        chunk_size: int = 100,
-                       chunk_overlap: int = 20
+                       chunk_overlap: int = 20,
+                       near_duplicate_threshold: float | None = None
                        ):
         contents = [x for x in content if x]
-        splits = []
-        for x in contents:
-            splits.extend(TextProcessor.tokenize_text(x,chunk_overlap=chunk_overlap,chunk_size=chunk_size))
+        splits = _chunker(chunk_size, chunk_overlap).split_texts(contents)
+        if near_duplicate_threshold:
+            splits = NearDuplicateFilter(near_duplicate_threshold).filter(splits)
         return splits
-
-
@@ -1,17 +1,48 @@
 import re
+import time
 from typing import List
 import concurrent.futures
-import torch
-from wordllama import WordLlama
+
+import numpy as np
+
+from ..retrieval.embedding_cache import EmbeddingCache, cached_embed
+from ..retrieval.model_registry import ModelRegistry
+from ..retrieval.ann_index import IVFFlatIndex
+from ..retrieval.quantization import QuantizedIndex
 
 class WordLLamaRetriever:
-    def __init__(self, text, batch_size=32):
-        self.wl = WordLlama.load()
+    """Top-k sentence retrieval over a text with WordLlama embeddings.
+
+    Sentence embeddings are written in order into one preallocated ``(n, dim)``
+    array of ``dtype`` (``np.float16`` halves it while the index is built). With
+    ``batch_size=None`` the first batches double in size while throughput keeps
+    improving and the rest of the text is embedded at the best size found.
+
+    Once built, the index holds the only copy of the vectors and ``embeds`` is
+    ``None``: the :class:`IVFFlatIndex` keeps normalized float32 rows, while
+    ``quantization="int8"`` or ``"binary"`` keeps only compressed codes in a
+    :class:`QuantizedIndex`, rescoring shortlisted sentences with their exact
+    embeddings re-embedded on demand. Sentence embeddings bypass the shared
+    in-memory cache, which would otherwise keep every vector resident a second time.
+    """
+
+    min_batch_size = 32
+    max_batch_size = 4096
+
+    def __init__(self, text, batch_size=None, nprobe=8, dtype=np.float32, max_workers=None,
+                 quantization=None, oversample=None):
+        self.wl = ModelRegistry.get("wordllama")
         self.text = text
         self.embeds = None
         self.sents = None
+        self.index = None
+        self.nprobe = nprobe
         self.batch_size = batch_size
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.dtype = np.dtype(dtype)
+        self.max_workers = max_workers
+        self.quantization = quantization
+        self.oversample = oversample
+        self._cache = EmbeddingCache(cache_dir=EmbeddingCache.default().cache_dir, max_memory_items=0)
         self.__build_embeds()
 
     @staticmethod
@@ -19,52 +50,73 @@ class WordLLamaRetriever:
         return re.findall(r'[^!.?]+[!.?]', text) if isinstance(text, str) else text
 
     def embed_batch(self, sents_batch):
-        with torch.no_grad():
-            return torch.tensor(self.wl.embed(sents_batch)).to(self.device)
+        return cached_embed(self.wl, sents_batch, norm=True, cache=self._cache)
 
     def get_embeds(self, text) -> tuple:
+        """Return ``(embeds, sents)``: row ``i`` of the normalized embeddings belongs to ``sents[i]``."""
         sents: List = self._split_sentences(text)
-        embeds = []
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = []
-            for i in range(0, len(sents), self.batch_size):
-                sents_batch = sents[i:i + self.batch_size]
-                futures.append(executor.submit(self.embed_batch, sents_batch))
-
-            for future in concurrent.futures.as_completed(futures):
-                embeds.append(future.result())
-
-        if embeds:
-            embeds = torch.cat(embeds, dim=0)
-        else:
-            embeds = None
-
+        if not sents:
+            return None, sents
+
+        embeds = None
+        batch_size = self.batch_size or self.min_batch_size
+        tuning = self.batch_size is None
+        best_rate, best_size = 0.0, batch_size
+        start = 0
+        while start < len(sents) and (tuning or embeds is None):
+            stop = min(start + batch_size, len(sents))
+            began = time.perf_counter()
+            batch = self.embed_batch(sents[start:stop])
+            rate = (stop - start) / max(time.perf_counter() - began, 1e-9)
+            if embeds is None:
+                embeds = np.empty((len(sents), batch.shape[1]), dtype=self.dtype)
+            embeds[start:stop] = batch
+            start = stop
+            if not tuning:
+                continue
+            # Keep doubling only while it pays off by more than 10%.
+            if rate > 1.1 * best_rate and batch_size < self.max_batch_size:
+                best_rate, best_size = rate, batch_size
+                batch_size = min(2 * batch_size, self.max_batch_size)
+            else:
+                batch_size = best_size if rate <= best_rate else batch_size
+                tuning = False
+        self.tuned_batch_size = batch_size
+
+        def fill(lo):
+            hi = min(lo + batch_size, len(sents))
+            embeds[lo:hi] = self.embed_batch(sents[lo:hi])
+
+        # Every batch writes its own rows, so completion order does not matter.
+        if start < len(sents):
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+                list(executor.map(fill, range(start, len(sents), batch_size)))
         return embeds, sents
 
     def top_k(self, query, k=5):
-        q_embeds, _ = self.get_embeds(query)
-
-        if self.embeds is None or q_embeds is None:
+        if self.index is None:
             return []
 
-        # Normalize query embeddings
-        q_embeds = torch.nn.functional.normalize(q_embeds, p=2, dim=1)
-
-        # Compute cosine similarity
-        similarity = torch.mm(self.embeds, q_embeds.t())
-
-        # Get top k similarities and indices
-        top_k_similarities, top_k_indices = torch.topk(similarity.squeeze(), k)
+        query_embed = self.embed_batch([query])[0]
+        if self.quantization:
+            top_k_indices, _ = self.index.search(query_embed, k)
+        else:
+            # IVF index over the sentence embeddings; exact for small texts
+            top_k_indices, _ = self.index.search(query_embed, k, nprobe=self.nprobe)
 
         top_sents = [self.sents[i] for i in top_k_indices]
         return top_sents
 
     def __build_embeds(self):
         self.embeds, self.sents = self.get_embeds(self.text)
-        if self.embeds is not None:
-            # Normalize embeddings
-            self.embeds = torch.nn.functional.normalize(self.embeds, p=2, dim=1)
+        if self.embeds is None:
+            return
+        if self.quantization:
+            self.index = QuantizedIndex.build(self.embeds, mode=self.quantization, oversample=self.oversample,
+                                              full_precision=lambda ids: self.embed_batch([self.sents[i] for i in ids]))
+        else:
+            self.index = IVFFlatIndex.build(self.embeds, nprobe=self.nprobe)
+        self.embeds = None
 
 if __name__ == '__main__':
     import time
@@ -80,5 +132,5 @@ if __name__ == '__main__':
     sents = ht.top_k("what is date of coo?")
     query_time = time.time() - query_time
 
-    print(f"Build time: {build_time:.2f} seconds")
+    print(f"Build time: {build_time:.2f} seconds (batch size {ht.tuned_batch_size})")
     print(f"Query time: {query_time:.2f} seconds")
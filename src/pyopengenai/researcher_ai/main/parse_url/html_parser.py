@@ -1,32 +1,45 @@
 import asyncio
+import functools
 from dataclasses import dataclass
 import aiohttp
-from io import BytesIO
-import PyPDF2
 from tqdm import tqdm
 from ....web_search import FastHTMLParserV3
+from ....web_search.http_client import SharedHttpClient
+from ....web_search.page_cache import PageCache
+from ....web_search.pdf_extraction import PDFTextExtractor
 
 from .base import BaseHtmlParser
 
 
 @dataclass
 class UrlTextParser(BaseHtmlParser):
-    def __init__(self,extract_pdf=True):
+    def __init__(self,extract_pdf=True, page_cache=None, max_pdf_pages=None, pdf_extraction_mode="thread",
+                 pdf_fetch_timeout=30):
         self.extract_pdf = extract_pdf
+        # Seconds to download one PDF outside aiter_parse, which uses its url_fetch_timeout instead
+        self.pdf_fetch_timeout = pdf_fetch_timeout
+        self.page_cache = PageCache.default() if page_cache is True else page_cache
+        # pdf_extraction_mode="process" spreads pages over cores; the calling script then needs a __main__ guard
+        self.pdf_extractor = PDFTextExtractor(mode=pdf_extraction_mode, max_pages=max_pdf_pages)
+        self._pdf_cache_kind = "pdf" if max_pdf_pages is None else f"pdf-{max_pdf_pages}p"
     def parse_single_html(self,url:str):
         res = self.parse_html([url])
         if res:
             return res[0]
         return ""
     def parse_html(self, urls: list) -> list:
-        return asyncio.run(self._async_html_parser(urls))
+        # Runs on the shared background loop so pooled connections survive between calls.
+        return SharedHttpClient.run(self._async_html_parser(urls))
+
+    async def aparse_html(self, urls: list) -> list:
+        return await self._async_html_parser(urls)
 
     async def _async_html_parser(self, urls):
         html_urls = []
         pdf_urls = []
         for url in tqdm(urls,desc = "processing urls",unit = 'url'):
             url = self._arxiv_url_fix(url)
-            if '/pdf' in url or url.lower().endswith('.pdf'):
+            if self._is_pdf_url(url):
                 pdf_urls.append(url)
             else:
                 html_urls.append(url)
@@ -34,7 +47,7 @@ class UrlTextParser(BaseHtmlParser):
         results = []
 
         if html_urls:
-            fetcher = FastHTMLParserV3(urls=html_urls)
+            fetcher = FastHTMLParserV3(urls=html_urls, page_cache=self.page_cache)
             html_results = await fetcher.fetch_content()
             results.extend(html_results)
 
@@ -44,24 +57,97 @@ class UrlTextParser(BaseHtmlParser):
 
         return results
 
+    async def aiter_parse(self, urls: list, deadline: float | None = None, first_k: int | None = None,
+                          url_fetch_timeout=10, max_concurrency: int | None = None,
+                          max_pdf_pages: int | None = None, on_timeout=None):
+        """Yield ``(url, text)`` pairs in completion order instead of waiting for the slowest URL.
+
+        ``url`` is the URL as passed in, even when an arXiv page was fetched as its PDF.
+
+        ``deadline`` bounds the whole iteration in seconds and ``first_k`` stops after that many
+        non-empty texts; outstanding fetches are cancelled in both cases. ``max_concurrency``
+        caps how many URLs are fetched at once and ``max_pdf_pages`` how many pages of each PDF
+        are read. ``on_timeout`` is called with the URLs abandoned when ``deadline`` expires.
+        """
+        loop = asyncio.get_running_loop()
+        stop_at = None if deadline is None else loop.time() + deadline
+        session = await SharedHttpClient.get_session()
+        fetcher = FastHTMLParserV3(urls=[], page_cache=self.page_cache)
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+
+        pending = {}
+        for url in urls:
+            fixed_url = self._arxiv_url_fix(url)
+            if self._is_pdf_url(fixed_url):
+                if not self.extract_pdf:
+                    continue
+                coro = self._fetch_pdf(session, fixed_url, max_pages=max_pdf_pages, timeout=url_fetch_timeout)
+            else:
+                coro = fetcher._fetch_url(session, fixed_url, url_fetch_timeout)
+            if semaphore is not None:
+                coro = limited(coro)
+            pending[asyncio.ensure_future(coro)] = url
+
+        n_good = 0
+        try:
+            while pending:
+                timeout = None if stop_at is None else stop_at - loop.time()
+                if timeout is not None and timeout <= 0:
+                    if on_timeout is not None:
+                        on_timeout(list(pending.values()))
+                    break
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        print(f"Unexpected error fetching {url}: {str(e)}")
+                        text = ""
+                    yield url, text
+                    if text:
+                        n_good += 1
+                        if first_k is not None and n_good >= first_k:
+                            return
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def _fetch_pdf_content(self, pdf_urls):
-        async def fetch_pdf(session, url):
-            async with session.get(url) as response:
-                if response.status == 200:
-                    pdf_content = await response.read()
-                    pdf_file = BytesIO(pdf_content)
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text()
-                    return text
-                else:
+        session = await SharedHttpClient.get_session()
+        tasks = [self._fetch_pdf(session, url) for url in pdf_urls]
+        results = await asyncio.gather(*tasks)
+        return results
+
+    async def _fetch_pdf(self, session, url, max_pages=None, timeout=None):
+        if max_pages is not None and self.pdf_extractor.max_pages is not None:
+            max_pages = min(max_pages, self.pdf_extractor.max_pages)
+        extract = functools.partial(self._extract_pdf_text, max_pages=max_pages)
+        # Bounds the download; extraction runs after the response is read.
+        timeout = aiohttp.ClientTimeout(total=self.pdf_fetch_timeout if timeout is None else timeout)
+        try:
+            if self.page_cache is not None:
+                kind = self._pdf_cache_kind if max_pages is None else f"pdf-{max_pages}p"
+                return await self.page_cache.fetch_text(session, url, kind, extract, timeout=timeout)
+            async with session.get(url, timeout=timeout) as response:
+                if response.status != 200:
                     return ""
+                pdf_content = await response.read()
+            return await extract(pdf_content)
+        except asyncio.TimeoutError:
+            print(f"Timeout error for {url}")
+            return ""
+
+    async def _extract_pdf_text(self, pdf_content, encoding=None, max_pages=None):
+        return await self.pdf_extractor.aextract(pdf_content, max_pages=max_pages)
 
-        async with aiohttp.ClientSession() as session:
-            tasks = [fetch_pdf(session, url) for url in pdf_urls]
-            results = await asyncio.gather(*tasks)
-            return results
+    @staticmethod
+    def _is_pdf_url(url):
+        return '/pdf' in url or url.lower().endswith('.pdf')
 
     def _arxiv_url_fix(self, url):
         if 'https://arxiv.org/abs/' in url and self.extract_pdf:
@@ -14,42 +14,107 @@ class GoogleSearch(Searcher):
     def perform_batch_search(self, batch_queries: List[str]) -> List[str]:
         pass
 
-import asyncio
 from typing import List
 from ....web_search import OptimizedMultiQuerySearcher
+from ....web_search.http_client import SharedHttpClient
+from ....web_search.search_cache import SearchResultCache
 
 class RealTimeGoogleSearchProvider(Searcher):
     def __init__(self, search_provider="google",chromedriver_path="/usr/local/bin/chromedriver", max_workers=None,
-                 animation = False):
+                 animation = False,
+                 pool_size = 2,
+                 max_pages_per_driver = 50,
+                 backend = "selenium",
+                 cache: bool | SearchResultCache = True,
+                 num_results = 10,
+                 wait_timeout = 5):
         self.search_provider = search_provider
         self.chromedriver_path = chromedriver_path
         self.max_workers = max_workers
         self.animation = animation
+        self.pool_size = pool_size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.backend = backend
+        self.num_results = num_results
+        self.wait_timeout = wait_timeout
+        if cache is True:
+            self.cache = SearchResultCache.default()
+        elif cache is False:
+            self.cache = None
+        else:
+            self.cache = cache
+
+    def _searcher(self) -> OptimizedMultiQuerySearcher:
+        # Searchers are cheap: Chrome drivers live in the process-wide ChromeDriverPool.
+        return OptimizedMultiQuerySearcher(chromedriver_path=self.chromedriver_path,
+                                           max_workers=self.max_workers,
+                                           animation=self.animation,
+                                           pool_size=self.pool_size,
+                                           max_pages_per_driver=self.max_pages_per_driver,
+                                           backend=self.backend,
+                                           wait_timeout=self.wait_timeout)
 
+    def _cache_get(self, query):
+        if self.cache is None:
+            return None
+        return self.cache.get(query, self.search_provider, self.num_results)
+
+    def _cache_set(self, query, urls):
+        if self.cache is not None and urls:
+            self.cache.set(query, urls, self.search_provider, self.num_results)
 
     def perform_search(self, query: str,max_urls=5) -> List[str]:
-        with OptimizedMultiQuerySearcher(chromedriver_path=self.chromedriver_path,
-                                                    max_workers=self.max_workers,
-                                                    animation=self.animation) as searcher:
-            return searcher.search_single_query(query,search_provider=self.search_provider).urls[:max_urls]
-
-
-    async def _async_batch_search(self, batch_queries,max_urls=5) -> List[str]:
-        with OptimizedMultiQuerySearcher(chromedriver_path=self.chromedriver_path,
-                                         max_workers=self.max_workers,
-                                         animation=self.animation) as searcher:
-            all_urls = await searcher.search_multiple_queries(
-                queries=batch_queries,
-                search_provider=self.search_provider
-            )
-            all_urls = [url.urls for url in all_urls]
-            filtered_urls = [y for x in zip(*all_urls) for y in x]
-            filtered_urls = [self.extract_until_hash(x) if self.is_hash(x) else x for x in filtered_urls]
-            filtered_urls = [_ for _ in filtered_urls if _]
-            return filtered_urls[:max_urls]
+        urls = self._cache_get(query)
+        if urls is None:
+            with self._searcher() as searcher:
+                urls = searcher.search_single_query(query, num_results=self.num_results,
+                                                    search_provider=self.search_provider).urls
+            self._cache_set(query, urls)
+        return urls[:max_urls]
+
+    async def aperform_search(self, query: str, max_urls=5) -> List[str]:
+        urls = self._cache_get(query)
+        if urls is None:
+            with self._searcher() as searcher:
+                result = await searcher.asearch_single_query(query, num_results=self.num_results,
+                                                             search_provider=self.search_provider)
+            urls = result.urls
+            self._cache_set(query, urls)
+        return urls[:max_urls]
+
+    async def _search_many(self, queries) -> List[List[str]]:
+        all_urls = [self._cache_get(query) for query in queries]
+        missing = list(dict.fromkeys(query for query, urls in zip(queries, all_urls) if urls is None))
+        if missing:
+            with self._searcher() as searcher:
+                results = await searcher.search_multiple_queries(
+                    queries=missing,
+                    num_results=self.num_results,
+                    search_provider=self.search_provider
+                )
+            fresh = {}
+            for query, result in zip(missing, results):
+                fresh[query] = result.urls
+                self._cache_set(query, result.urls)
+            all_urls = [fresh[query] if urls is None else urls for query, urls in zip(queries, all_urls)]
+        return all_urls
+
+    async def aperform_multi_search(self, queries, max_urls=None) -> List[List[str]]:
+        """Search all ``queries`` together and return one URL list per query."""
+        all_urls = await self._search_many(queries)
+        all_urls = [[self.extract_until_hash(x) if self.is_hash(x) else x for x in urls] for urls in all_urls]
+        return [[x for x in urls if x][:max_urls] for urls in all_urls]
+
+    async def aperform_batch_search(self, batch_queries,max_urls=5) -> List[str]:
+        all_urls = await self._search_many(batch_queries)
+        filtered_urls = [y for x in zip(*all_urls) for y in x]
+        filtered_urls = [self.extract_until_hash(x) if self.is_hash(x) else x for x in filtered_urls]
+        filtered_urls = [_ for _ in filtered_urls if _]
+        return filtered_urls[:max_urls]
 
     def perform_batch_search(self, batch_queries,max_urls=5) -> List[str]:
-        return asyncio.run(self._async_batch_search(batch_queries,max_urls=max_urls))
+        # Not asyncio.run: that fails when the caller already runs an event loop (Jupyter, FastAPI)
+        return SharedHttpClient.run(self.aperform_batch_search(batch_queries,max_urls=max_urls))
 
     def is_hash(self, x):
         return '#' in x
@@ -0,0 +1,11 @@
+from .embedding_cache import EmbeddingCache, cached_embed
+from .model_registry import ModelRegistry
+from .hybrid_store import HybridDocumentStore, HybridHit
+from .ann_index import IVFFlatIndex, top_k_indices
+from .quantization import QuantizedIndex, quantize_int8, quantize_binary
+from .chunking import SpanChunker, Span
+from .dedup import NearDuplicateFilter, DedupStats
+
+__all__ = ['EmbeddingCache', 'cached_embed', 'ModelRegistry', 'HybridDocumentStore', 'HybridHit',
+           'IVFFlatIndex', 'top_k_indices', 'QuantizedIndex', 'quantize_int8', 'quantize_binary',
+           'SpanChunker', 'Span', 'NearDuplicateFilter', 'DedupStats']
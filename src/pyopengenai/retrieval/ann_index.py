@@ -0,0 +1,228 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first, without sorting the whole array.
+
+    Ties are broken by index, as a stable ``argsort`` would.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    top = np.concatenate([above, np.flatnonzero(scores == kth)[:k - len(above)]])
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _appended(buffer, size, rows):
+    """``buffer`` with ``rows`` written after its first ``size`` rows; grown geometrically when full."""
+    end = size + len(rows)
+    if end > len(buffer) or not buffer.flags.writeable:
+        grown = np.empty((max(end, 2 * len(buffer)),) + rows.shape[1:], dtype=rows.dtype)
+        if size:
+            grown[:size] = buffer[:size]
+        buffer = grown
+    buffer[size:end] = rows
+    return buffer
+
+
+class IVFFlatIndex:
+    """Inverted-file index over normalized vectors (inner product = cosine similarity).
+
+    Vectors are clustered into ``n_lists`` cells with spherical k-means and stored
+    grouped by cell; a query scans only the ``nprobe`` cells whose centroids are
+    closest. ``nprobe`` is the recall/latency knob: ``nprobe == n_lists`` is an
+    exact search. Indexes smaller than ``exact_threshold`` skip clustering and are
+    always searched exactly. The centroids are retrained on all vectors whenever
+    the index has grown ``retrain_factor`` times since they were last trained
+    (``None`` keeps the first ones).
+    """
+
+    def __init__(self, n_lists=None, nprobe=8, exact_threshold=10_000, n_iter=10, seed=0, retrain_factor=4):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+        self.n_iter = n_iter
+        self.seed = seed
+        self.retrain_factor = retrain_factor
+        self.centroids = None
+        # The first _size rows of these buffers are in use; appends fill their spare capacity.
+        # Once trained, rows [0, _n_grouped) are sorted by cell, cell c at _offsets[c]:_offsets[c + 1],
+        # and _ids/_cells give each row's id and cell; rows appended since are grouped in batches.
+        self._rows = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._cells = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._n_grouped = 0
+        self._offsets = None
+        self._trained_size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def is_exact(self) -> bool:
+        return self.centroids is None
+
+    @classmethod
+    def build(cls, vectors, **kwargs) -> "IVFFlatIndex":
+        index = cls(**kwargs)
+        index.add(vectors)
+        return index
+
+    def _train(self, vectors):
+        n = len(vectors)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[rng.choice(n, min(n, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+    def _assign(self, vectors, batch_size=65_536):
+        return np.concatenate([np.argmax(vectors[i:i + batch_size] @ self.centroids.T, axis=1)
+                               for i in range(0, len(vectors), batch_size)]) if len(vectors) else \
+            np.zeros(0, dtype=np.int64)
+
+    def add(self, vectors):
+        """Append vectors (normalized here); ids continue from the current size."""
+        vectors = normalize_rows(np.atleast_2d(vectors))
+        if len(vectors) == 0:
+            return
+        start = self._size
+        self._rows = _appended(self._rows, start, vectors)
+        self._size += len(vectors)
+        if self.centroids is None:
+            if self._size >= self.exact_threshold:
+                self._retrain(np.arange(self._size))
+            return
+        self._ids = _appended(self._ids, start, np.arange(start, self._size))
+        if self.retrain_factor and self._size >= self.retrain_factor * self._trained_size:
+            self._retrain(self._ids[:self._size])
+            return
+        self._cells = _appended(self._cells, start, self._assign(vectors))
+        if self._size - self._n_grouped > self._size // 8:
+            self._group()
+
+    def _retrain(self, ids):
+        rows = self._rows[:self._size]
+        self._train(rows)
+        self._ids, self._cells = ids, self._assign(rows)
+        self._trained_size = self._size
+        self._group()
+
+    def _group(self):
+        """Sort the rows by cell (and by id within a cell); one pass over the vectors."""
+        n = self._size
+        order = np.argsort(self._cells[:n] * n + self._ids[:n])
+        self._rows = self._rows[:n][order]
+        self._ids = self._ids[:n][order]
+        self._cells = self._cells[:n][order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(self._cells, minlength=len(self.centroids)))])
+        self._n_grouped = n
+
+    def search(self, query, k=10, nprobe=None):
+        """Return ``(ids, scores)`` of the ``k`` nearest vectors; a 2-D ``query`` returns one pair per row."""
+        query = np.asarray(query, dtype=np.float32)
+        if query.ndim == 2:
+            return [self.search(row, k, nprobe) for row in query]
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        if self._size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if self.centroids is None:
+            scores = self._rows[:self._size] @ query
+            ids = top_k_indices(scores, k)
+            return ids, scores[ids]
+
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        cells = top_k_indices(self.centroids @ query, nprobe)
+        # Each probed cell is a contiguous block of rows; rows added since the last grouping are picked out.
+        blocks = [np.arange(self._offsets[c], self._offsets[c + 1]) for c in cells]
+        blocks.append(self._n_grouped + np.flatnonzero(np.isin(self._cells[self._n_grouped:self._size], cells)))
+        positions = np.concatenate(blocks)
+        scores = np.concatenate([self._rows[self._offsets[c]:self._offsets[c + 1]] @ query for c in cells]
+                                + [self._rows[blocks[-1]] @ query])
+        best = top_k_indices(scores, k)
+        return self._ids[positions[best]], scores[best]
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        if self.centroids is not None and self._n_grouped < self._size:
+            self._group()
+        meta = {"n_lists": self.n_lists, "nprobe": self.nprobe, "exact_threshold": self.exact_threshold,
+                "n_iter": self.n_iter, "seed": self.seed, "retrain_factor": self.retrain_factor,
+                "trained": self.centroids is not None, "trained_size": self._trained_size}
+        (path / "ann.json").write_text(json.dumps(meta))
+        # Trained indexes are saved grouped by cell, so a memory-mapped load reads each probed cell in one run.
+        np.save(path / "vectors.npy", self._rows[:self._size])
+        if self.centroids is not None:
+            np.save(path / "centroids.npy", self.centroids)
+            np.save(path / "ids.npy", self._ids[:self._size])
+            np.save(path / "assignments.npy", self._cells[:self._size])
+
+    @classmethod
+    def load(cls, path, mmap=True) -> "IVFFlatIndex":
+        path = Path(path)
+        meta = json.loads((path / "ann.json").read_text())
+        trained = meta.pop("trained")
+        trained_size = meta.pop("trained_size")
+        index = cls(**meta)
+        index._rows = np.load(path / "vectors.npy", mmap_mode="r" if mmap else None)
+        index._size = len(index._rows)
+        if trained:
+            index.centroids = np.load(path / "centroids.npy")
+            index._ids = np.load(path / "ids.npy")
+            index._cells = np.load(path / "assignments.npy")
+            index._offsets = np.concatenate([[0], np.cumsum(np.bincount(index._cells,
+                                                                         minlength=len(index.centroids)))])
+            index._n_grouped = index._size
+            index._trained_size = trained_size
+        return index
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    # python -m pyopengenai.retrieval.ann_index [n_vectors] [dim]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    rng = np.random.default_rng(0)
+    centers = normalize_rows(rng.normal(size=(512, dim)))
+    data = normalize_rows(centers[rng.integers(0, 512, n)] + 0.6 / np.sqrt(dim) * rng.normal(size=(n, dim)))
+    queries = normalize_rows(data[rng.choice(n, 200, replace=False)] + 0.3 / np.sqrt(dim) * rng.normal(size=(200, dim)))
+    k = 10
+
+    start = time.perf_counter()
+    exact = [top_k_indices(data @ q, k) for q in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"exact: {exact_ms:.2f} ms/query")
+
+    start = time.perf_counter()
+    index = IVFFlatIndex.build(data)
+    print(f"build: {time.perf_counter() - start:.2f}s, {len(index.centroids)} lists")
+    for nprobe in (1, 4, 8, 16, 32, len(index.centroids)):
+        start = time.perf_counter()
+        found = [index.search(q, k, nprobe=nprobe)[0] for q in queries]
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, exact)])
+        print(f"nprobe={nprobe:>3}: {ms:.2f} ms/query, recall@{k}={recall:.3f}, speedup={exact_ms / ms:.1f}x")
@@ -0,0 +1,229 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, NamedTuple
+
+# Line breaks (paragraph breaks when two) and sentence ends. The leading character class lets
+# the regex engine skip straight to candidates, which is several times faster than an alternation.
+_BOUNDARY_RE = re.compile(r"[\n.!?](?:(?<=\n)(?:[ \t]*\n)?|[.!?\"')\]]*(?=\s))")
+_NON_SPACE_RE = re.compile(r"\S")
+
+
+class Span(NamedTuple):
+    doc_id: int
+    start: int
+    end: int
+
+
+class SpanChunker:
+    """Splits text into overlapping chunks described by ``(doc_id, start, end)`` offsets.
+
+    One pass of a precompiled regex finds paragraph, line and sentence boundaries;
+    each chunk then ends at the strongest boundary that keeps it within
+    ``chunk_size``, falling back to a word break and finally a hard cut, like
+    LangChain's recursive splitter but without copying text until asked to.
+
+    ``unit`` is ``"chars"`` or ``"tokens"``. Tokens are estimated from the UTF-8
+    length (``bytes_per_token``) unless ``tokenizer`` is given: a callable
+    returning the token count of a string, or a tiktoken encoding name, for
+    exact counts.
+    """
+
+    def __init__(self, chunk_size=250, chunk_overlap=25, unit="chars", bytes_per_token=4.0, tokenizer=None):
+        if unit not in ("chars", "tokens"):
+            raise ValueError(f"Unknown chunk unit: {unit!r}")
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.unit = unit
+        self.bytes_per_token = bytes_per_token
+        if isinstance(tokenizer, str):
+            tokenizer = self._tiktoken_counter(tokenizer)
+        self.tokenizer = tokenizer
+
+    @staticmethod
+    def _tiktoken_counter(encoding_name):
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+    def length(self, text: str) -> float:
+        if self.unit == "chars":
+            return len(text)
+        if self.tokenizer is not None:
+            return self.tokenizer(text)
+        return len(text.encode("utf-8")) / self.bytes_per_token
+
+    @staticmethod
+    def _boundaries(text):
+        """Cut offsets of paragraph breaks, line breaks and sentence ends, in decreasing order of preference."""
+        paragraphs, lines, sentences = [], [], []
+        for match in _BOUNDARY_RE.finditer(text):
+            start, end = match.span()
+            if text[start] != "\n":
+                sentences.append(end)  # right after the punctuation
+            elif end - start > 1:
+                paragraphs.append(start)  # before the newline
+            else:
+                lines.append(start)
+        return paragraphs, lines, sentences
+
+    def _limit(self, text, start, chars_per_unit):
+        """Furthest end offset whose chunk should fit in ``chunk_size``."""
+        end = min(len(text), start + max(1, int(self.chunk_size * chars_per_unit)))
+        if self.unit == "tokens" and self.tokenizer is None:
+            budget = self.chunk_size * self.bytes_per_token
+            n_bytes = len(text[start:end].encode("utf-8"))
+            while n_bytes > budget and end - start > 1:
+                # Multi-byte characters: shrink proportionally until the bytes fit.
+                end = start + max(1, min(end - start - 1, int((end - start) * budget / n_bytes)))
+                n_bytes = len(text[start:end].encode("utf-8"))
+        return end
+
+    @staticmethod
+    def _cut(text, levels, start, limit):
+        """End of the chunk starting at ``start``, and the boundary list it was cut at (``None`` for words)."""
+        for positions in levels:
+            i = bisect_right(positions, limit) - 1
+            if i >= 0 and positions[i] > start:
+                return positions[i], positions
+        space = text.rfind(" ", start + 1, limit + 1)
+        return (space if space > start else limit), None
+
+    @staticmethod
+    def _skip_space(text, i):
+        match = _NON_SPACE_RE.search(text, i)
+        return match.start() if match else len(text)
+
+    def spans(self, text: str, doc_id=0) -> List[Span]:
+        spans = []
+        n = len(text)
+        levels = self._boundaries(text)
+        # Characters per unit; refined from each exactly counted chunk.
+        chars_per_unit = 1.0 if self.unit == "chars" else self.bytes_per_token
+        start = self._skip_space(text, 0)
+        while start < n:
+            limit = self._limit(text, start, chars_per_unit)
+            end, cut_at = (n, None) if limit >= n else self._cut(text, levels, start, limit)
+            if self.tokenizer is not None and self.unit == "tokens":
+                size = self.tokenizer(text[start:end])
+                while size > self.chunk_size and end - start > 1:
+                    limit = start + max(1, min(end - start - 1, int((end - start) * self.chunk_size / size)))
+                    end, cut_at = self._cut(text, levels, start, limit)
+                    size = self.tokenizer(text[start:end])
+                chars_per_unit = max((end - start) / max(size, 1), 1.0)
+
+            stop = end
+            while stop > start and text[stop - 1].isspace():
+                stop -= 1
+            spans.append(Span(doc_id, start, stop))
+            if end >= n:
+                break
+
+            next_start = end
+            if self.chunk_overlap:
+                # As in LangChain, the overlap is made of whole pieces of the level the chunk was cut at:
+                # the sentences (or words) that end this chunk and fit in chunk_overlap.
+                back = max(start + 1, end - int(self.chunk_overlap * chars_per_unit))
+                if cut_at is None:
+                    space = text.find(" ", back - 1, end)
+                    if space != -1:
+                        next_start = space + 1
+                else:
+                    i = bisect_left(cut_at, back)
+                    if i < len(cut_at) and cut_at[i] < end:
+                        next_start = cut_at[i]
+            start = self._skip_space(text, next_start)
+        return spans
+
+    def iter_spans(self, texts: Iterable[str]) -> Iterator[Span]:
+        for doc_id, text in enumerate(texts):
+            if text:
+                yield from self.spans(text, doc_id)
+
+    @staticmethod
+    def text_of(span: Span, texts) -> str:
+        return texts[span.doc_id][span.start:span.end]
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for _, start, end in self.spans(text)]
+
+    def split_texts(self, texts: List[str]) -> List[str]:
+        return [texts[doc_id][start:end] for doc_id, start, end in self.iter_spans(texts)]
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from pathlib import Path
+
+    # python -m pyopengenai.retrieval.chunking [text file] [chunk_size] [chunk_overlap]
+    if len(sys.argv) > 1 and Path(sys.argv[1]).exists():
+        corpus = Path(sys.argv[1]).read_text()
+    else:
+        import random
+
+        rng = random.Random(0)
+        words = [w for w in "the of search retrieval embedding page crawl results query model ranking chunk "
+                            "sentence paragraph vector index server network latency answer context".split()]
+        paragraphs = []
+        while sum(map(len, paragraphs)) < 8_000_000:
+            sentences = (" ".join(rng.choice(words) for _ in range(rng.randint(5, 30))).capitalize()
+                         + rng.choice(".!?") for _ in range(rng.randint(1, 12)))
+            paragraphs.append(" ".join(sentences))
+        corpus = "\n\n".join(paragraphs)
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    chunk_overlap = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+    print(f"corpus: {len(corpus) / 1e6:.1f}M chars")
+
+    def report(name, run, size=len):
+        start = time.perf_counter()
+        chunks = run()
+        seconds = time.perf_counter() - start
+        sizes = [size(chunk) for chunk in chunks]
+        print(f"{name:<48} {seconds:7.2f}s  {len(chunks):>7} chunks, mean {sum(sizes) / len(sizes):6.1f} chars, "
+              f"max {max(sizes)}")
+
+    chunker = SpanChunker(chunk_size, chunk_overlap)
+    report("SpanChunker spans (chars)", lambda: chunker.spans(corpus), size=lambda span: span.end - span.start)
+    report("SpanChunker split_text (chars)", lambda: chunker.split_text(corpus))
+    report("SpanChunker split_text (tokens~)", lambda: SpanChunker(chunk_size, chunk_overlap,
+                                                                   unit="tokens").split_text(corpus))
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        print("langchain_text_splitters not installed; skipping the comparison")
+        sys.exit()
+
+    separators = ["\n\n", "\n", ".", "!", "?", " ", ""]
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators)
+    report("RecursiveCharacterTextSplitter", lambda: splitter.split_text(corpus))
+    # Same token estimate on both sides: LangChain calls its length function on every piece and merge.
+    estimate = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators,
+                                              length_function=lambda text: len(text.encode("utf-8")) / 4)
+    report("RecursiveCharacterTextSplitter (tokens~)", lambda: estimate.split_text(corpus))
+
+    # A crawl as many pages, with a splitter built per page as TextProcessor used to.
+    pages = [corpus[i:i + 20_000] for i in range(0, len(corpus), 20_000)]
+    report(f"SpanChunker split_texts ({len(pages)} pages)", lambda: chunker.split_texts(pages))
+    report(f"LangChain per page ({len(pages)} pages)", lambda: [chunk for page in pages for chunk in
+                                                             RecursiveCharacterTextSplitter(
+                                                                 chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                                                 separators=separators).split_text(page)])
+    # Exact counting with a stand-in tokenizer, to compare how often each side calls it.
+    count_tokens = re.compile(r"\w+|[^\w\s]").findall
+    report("SpanChunker (regex tokenizer)", lambda: SpanChunker(
+        chunk_size, chunk_overlap, unit="tokens", tokenizer=lambda text: len(count_tokens(text))).split_text(corpus))
+    report("RecursiveCharacterTextSplitter (regex tokenizer)", lambda: RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators,
+        length_function=lambda text: len(count_tokens(text))).split_text(corpus))
+    try:
+        token_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=chunk_size,
+                                                                              chunk_overlap=chunk_overlap)
+        exact = SpanChunker(chunk_size, chunk_overlap, unit="tokens", tokenizer="gpt2")
+    except Exception as e:
+        print(f"tiktoken comparison skipped: {e.__class__.__name__}")
+    else:
+        report("RecursiveCharacterTextSplitter (tiktoken)", lambda: token_splitter.split_text(corpus))
+        report("SpanChunker split_text (tiktoken)", lambda: exact.split_text(corpus))
@@ -0,0 +1,233 @@
+import math
+import re
+from typing import List, NamedTuple
+
+import numpy as np
+
+from .quantization import _POPCOUNT
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class DedupStats(NamedTuple):
+    total: int
+    kept: int
+    removed: int
+
+
+def _popcount64(x):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return _POPCOUNT[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1)
+
+
+def _mix64(x):
+    # splitmix64 finalizer: turns word ids and their combinations into well-spread 64-bit hashes.
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def shingle_hashes(texts, size=3):
+    """64-bit hashes of the ``size``-word shingles of each text (lowercased), and where each text's start.
+
+    Returns ``(hashes, offsets)``; a text shorter than ``size`` words is one shingle.
+    Words are numbered per call, so hashes only compare within one call.
+    """
+    vocabulary = {}
+    ids, lengths = [], []
+    for text in texts:
+        words = _WORD_RE.findall(text.lower())
+        ids.extend([vocabulary.setdefault(word, len(vocabulary)) for word in words])
+        # `size` padding ids (negative, unlike word ids) after every text keep each shingle window,
+        # including the single one of a text with fewer words, inside its own text.
+        ids.extend(range(-1, -size - 1, -1))
+        lengths.append(len(words))
+    lengths = np.array(lengths, dtype=np.int64)
+    padded = np.array(ids, dtype=np.int64).astype(np.uint64)
+    windows = len(padded) - size + 1
+    hashes = _mix64(padded[:windows] + np.uint64(1))
+    for k in range(1, size):
+        hashes = _mix64(hashes ^ padded[k:k + windows])
+    counts = np.maximum(lengths - size + 1, 1)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths + size)[:-1]]).astype(np.int64)
+    positions = np.repeat(starts - offsets, counts) + np.arange(int(counts.sum()))
+    return hashes[positions], offsets
+
+
+def _blocks(offsets, n_hashes, width):
+    # Ranges of whole texts whose shingles x `width` 32-bit values make ~1 MiB, to stay in cache:
+    # (first text, end text, first hash, end hash).
+    block = max(1, 2 ** 18 // width)
+    ends = np.append(offsets[1:], n_hashes)
+    first = 0
+    while first < len(offsets):
+        end = max(first + 1, int(np.searchsorted(ends, offsets[first] + block, side="right")))
+        yield first, end, int(offsets[first]), int(ends[end - 1])
+        first = end
+
+
+def minhash_signatures(texts, num_perm=128, shingle_size=3, seed=0) -> np.ndarray:
+    """``(len(texts), num_perm)`` uint32 MinHash signatures.
+
+    Each permutation is ``a * h + b`` modulo 2**32 over the (already mixed) shingle hashes.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint32) | np.uint32(1)
+    b = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint32)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    if not len(signatures):
+        return signatures
+    hashes, offsets = shingle_hashes(texts, shingle_size)
+    hashes = (hashes >> np.uint64(32)).astype(np.uint32)
+    for first, end, lo, hi in _blocks(offsets, len(hashes), num_perm):
+        permuted = hashes[lo:hi, None] * a
+        permuted += b
+        signatures[first:end] = np.minimum.reduceat(permuted, offsets[first:end] - lo, axis=0)
+    return signatures
+
+
+def simhash_signatures(texts, shingle_size=3) -> np.ndarray:
+    """``(len(texts), 8)`` uint8 SimHash fingerprints: 64 majority votes over the shingle hash bits."""
+    signatures = np.empty((len(texts), 8), dtype=np.uint8)
+    if not len(signatures):
+        return signatures
+    hashes, offsets = shingle_hashes(texts, shingle_size)
+    counts = np.diff(np.append(offsets, len(hashes)))
+    for first, end, lo, hi in _blocks(offsets, len(hashes), 16):
+        bits = np.unpackbits(hashes[lo:hi].view(np.uint8).reshape(-1, 8), axis=1)
+        ones = np.add.reduceat(bits, offsets[first:end] - lo, axis=0, dtype=np.int32)
+        signatures[first:end] = np.packbits(2 * ones > counts[first:end, None], axis=1)
+    return signatures
+
+
+class NearDuplicateFilter:
+    """Drops chunks that nearly repeat an earlier one, e.g. from mirrored or syndicated pages.
+
+    ``method="minhash"`` estimates the Jaccard similarity of word shingles from
+    ``num_perm`` MinHash values and finds candidates with LSH banding;
+    ``method="simhash"`` compares 64-bit SimHash fingerprints, the similarity
+    being the fraction of equal bits. A chunk whose similarity to an earlier kept
+    chunk reaches ``threshold`` is a duplicate; the first copy is kept.
+    ``stats`` counts the chunks of the last call.
+    """
+
+    METHODS = ("minhash", "simhash")
+
+    def __init__(self, threshold=0.85, method="minhash", num_perm=128, shingle_size=3, seed=0):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown near-duplicate method: {method!r}")
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.method = method
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = self._banding(threshold, num_perm)
+        self._band_weights = np.random.default_rng(seed + 1).integers(
+            1, 2 ** 63, self.rows, dtype=np.uint64) | np.uint64(1)
+        self.stats = DedupStats(0, 0, 0)
+
+    @staticmethod
+    def _banding(threshold, num_perm, recall=0.99):
+        """LSH bands x rows: the most rows per band that still pair chunks at ``threshold`` with ``recall``."""
+        for rows in range(num_perm, 0, -1):
+            if num_perm % rows == 0 and 1 - (1 - threshold ** rows) ** (num_perm // rows) >= recall:
+                return num_perm // rows, rows
+        return num_perm, 1
+
+    def representatives(self, texts) -> np.ndarray:
+        """For each text, the index of the earlier kept text it duplicates, or its own index."""
+        texts = list(texts)
+        if self.method == "minhash":
+            representatives = self._minhash_representatives(texts)
+        else:
+            representatives = self._simhash_representatives(texts)
+        kept = int(np.count_nonzero(representatives == np.arange(len(texts))))
+        self.stats = DedupStats(len(texts), kept, len(texts) - kept)
+        return representatives
+
+    def filter(self, texts) -> List[str]:
+        texts = list(texts)
+        representatives = self.representatives(texts)
+        return [text for i, text in enumerate(texts) if representatives[i] == i]
+
+    def _minhash_representatives(self, texts):
+        n = len(texts)
+        representatives = np.arange(n)
+        signatures = minhash_signatures(texts, self.num_perm, self.shingle_size, self.seed)
+        # One key per band: its rows folded into a single integer (collisions only add candidates).
+        keys = (signatures.reshape(n, self.bands, self.rows).astype(np.uint64) * self._band_weights).sum(
+            axis=2, dtype=np.uint64).tolist()
+        min_equal = math.ceil(self.threshold * self.num_perm - 1e-9)
+        buckets = [{} for _ in range(self.bands)]
+        for i, row in enumerate(keys):
+            candidates = {j for bucket, key in zip(buckets, row) for j in bucket.get(key, ())}
+            if candidates:
+                candidates = np.array(sorted(candidates))
+                equal = np.count_nonzero(signatures[candidates] == signatures[i], axis=1)
+                matches = candidates[equal >= min_equal]
+                if len(matches):
+                    representatives[i] = matches[0]
+                    continue
+            for bucket, key in zip(buckets, row):
+                bucket.setdefault(key, []).append(i)
+        return representatives
+
+    def _simhash_representatives(self, texts, block=1024):
+        n = len(texts)
+        representatives = np.arange(n)
+        fingerprints = simhash_signatures(texts, self.shingle_size).view(np.uint64)[:, 0]
+        max_distance = int((1 - self.threshold) * 64 + 1e-9)
+        # All pairs, a block of rows at a time against the earlier fingerprints, then keep-first in order.
+        earlier_matches = [()] * n
+        for start in range(0, n, block):
+            rows = fingerprints[start:start + block]
+            distances = _popcount64(rows[:, None] ^ fingerprints[None, :start + len(rows)])
+            near = (distances <= max_distance) & (np.arange(start + len(rows)) < np.arange(start, start + len(rows))[:, None])
+            for offset in np.flatnonzero(near.any(axis=1)):
+                earlier_matches[start + offset] = np.flatnonzero(near[offset])
+        for i, matches in enumerate(earlier_matches):
+            for j in matches:
+                if representatives[j] == j:
+                    representatives[i] = j
+                    break
+        return representatives
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+
+    # python -m pyopengenai.retrieval.dedup [n_chunks] [duplicate fraction]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    duplicate_fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    originals = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(30, 50))) for _ in range(n)]
+    chunks, is_copy = [], []
+    for text in originals:
+        if chunks and rng.random() < duplicate_fraction:
+            # A syndicated copy: an earlier original with one word changed.
+            words = rng.choice([chunk for chunk, copy in zip(chunks[-200:], is_copy[-200:]) if not copy]
+                               or chunks[:1]).split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            chunks.append(" ".join(words))
+            is_copy.append(True)
+        else:
+            chunks.append(text)
+            is_copy.append(False)
+
+    for method in NearDuplicateFilter.METHODS:
+        dedup = NearDuplicateFilter(0.8, method=method)
+        start = time.perf_counter()
+        representatives = dedup.representatives(chunks)
+        seconds = time.perf_counter() - start
+        removed = representatives != np.arange(len(chunks))
+        caught = np.mean(removed[np.array(is_copy)])
+        false = np.count_nonzero(removed[~np.array(is_copy)])
+        print(f"{method:>8}: {seconds:6.2f}s for {len(chunks)} chunks, {dedup.stats}, "
+              f"copies caught {caught:.3f}, originals removed {false}")
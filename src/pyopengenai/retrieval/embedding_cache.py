@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def text_key(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_fingerprints = weakref.WeakKeyDictionary()
+
+
+def model_fingerprint(model) -> str:
+    """Stable id for an embedding model instance, used as the cache namespace."""
+    try:
+        cached = _fingerprints.get(model)
+    except TypeError:
+        cached = None
+    if cached is not None:
+        return cached
+
+    if hasattr(model, "model_name"):  # fastembed.TextEmbedding
+        fingerprint = f"fastembed-{model.model_name}"
+    elif hasattr(model, "embedding"):  # wordllama.WordLlamaInference
+        matrix = np.asarray(model.embedding)
+        digest = hashlib.blake2b(matrix[:256].tobytes(), digest_size=8).hexdigest()
+        binary = "-binary" if getattr(model, "binary", False) else ""
+        fingerprint = f"wordllama-{matrix.shape[0]}x{matrix.shape[1]}{binary}-{digest}"
+    else:
+        fingerprint = type(model).__name__
+
+    try:
+        _fingerprints[model] = fingerprint
+    except TypeError:
+        pass
+    return fingerprint
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock on ``path`` shared with other processes."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _DiskTier:
+    """Append-only vector file plus a ``key row`` index, memory-mapped for reads.
+
+    Float vectors are stored as float16, anything else (e.g. binary WordLlama
+    codes) in its own dtype. Appends take a lock file, so several processes can
+    share a directory: each key's row comes from the vector file's size at the
+    time of its append, and keys appended elsewhere are picked up from the index.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = directory / "index.txt"
+        self.vectors_path = directory / "vectors.bin"
+        self.meta_path = directory / "meta.json"
+        self.lock_path = directory / "lock"
+        self.dim = None
+        self.dtype = None
+        self.rows = {}
+        self._index_offset = 0
+        self._mmap = None
+        self._refresh()
+
+    @property
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    def _refresh(self):
+        """Read the index lines appended since the last refresh, by this or any other process."""
+        if self.dim is None and self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            self.dim, self.dtype = meta["dim"], np.dtype(meta["dtype"])
+        if self.dim is None or not self.index_path.exists() \
+                or os.path.getsize(self.index_path) == self._index_offset:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        # A line still being written (or cut short by a crash) has no newline yet.
+        data = data[:data.rfind(b"\n") + 1]
+        self._index_offset += len(data)
+        for line in data.decode().splitlines():
+            key, _, row = line.partition(" ")
+            if row.isdigit():
+                self.rows.setdefault(key, int(row))
+
+    def _vectors(self, max_row):
+        if self._mmap is None or len(self._mmap) <= max_row:
+            n_rows = os.path.getsize(self.vectors_path) // self._row_bytes
+            self._mmap = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(n_rows, self.dim))
+        return self._mmap
+
+    def get(self, keys):
+        if any(key not in self.rows for key in keys):
+            self._refresh()
+        found = {key: self.rows[key] for key in keys if key in self.rows}
+        if not found:
+            return {}
+        vectors = self._vectors(max(found.values()))
+        dtype = np.float32 if self.dtype == np.float16 else self.dtype
+        return {key: np.array(vectors[row], dtype=dtype) for key, row in found.items()}
+
+    def add(self, keys, vectors: np.ndarray):
+        with _file_lock(self.lock_path):
+            self._refresh()
+            new = [i for i, key in enumerate(keys) if key not in self.rows]
+            if not new:
+                return
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self.dtype = np.dtype(np.float16 if vectors.dtype.kind == "f" else vectors.dtype)
+                tmp = self.meta_path.with_suffix(".tmp")
+                tmp.write_text(json.dumps({"dim": self.dim, "dtype": self.dtype.name}))
+                os.replace(tmp, self.meta_path)
+            with open(self.vectors_path, "a+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                start = end // self._row_bytes
+                if end != start * self._row_bytes:  # a crashed partial row
+                    f.truncate(start * self._row_bytes)
+                f.write(np.ascontiguousarray(vectors[new], dtype=self.dtype).tobytes())
+            with open(self.index_path, "a+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                prefix = b""
+                if end:
+                    f.seek(end - 1)
+                    prefix = b"" if f.read(1) == b"\n" else b"\n"
+                f.write(prefix + "".join(f"{keys[i]} {start + j}\n" for j, i in enumerate(new)).encode())
+        for j, i in enumerate(new):
+            self.rows[keys[i]] = start + j
+
+
+class EmbeddingCache:
+    """Embedding cache keyed by (model id, text hash).
+
+    Lookups go through an in-memory LRU first and then, when ``cache_dir`` is set,
+    a memory-mapped store per model (float16 for float embeddings). Only the
+    misses are passed to the embedding function, in one batch.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, cache_dir=None, max_memory_items=100_000):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir is not None else None
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._disk = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @classmethod
+    def set_default(cls, cache: "EmbeddingCache"):
+        with cls._default_lock:
+            cls._default = cache
+
+    def _disk_tier(self, model_id):
+        if self.cache_dir is None:
+            return None
+        tier = self._disk.get(model_id)
+        if tier is None:
+            tier = _DiskTier(self.cache_dir / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id))
+            self._disk[model_id] = tier
+        return tier
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def embed(self, texts: List[str], embed_fn: Callable[[List[str]], np.ndarray], model_id: str) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        keys = [(model_id, text_key(text)) for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            disk = self._disk_tier(model_id)
+            if disk is not None:
+                missing = [key[1] for key in keys if key not in found]
+                for hash_key, vector in disk.get(missing).items():
+                    found[(model_id, hash_key)] = vector
+                    self._remember((model_id, hash_key), vector)
+
+        miss_positions = {}
+        for i, key in enumerate(keys):
+            if key not in found:
+                miss_positions.setdefault(key, i)
+        if miss_positions:
+            fresh = np.asarray(embed_fn([texts[i] for i in miss_positions.values()]))
+            if fresh.dtype.kind == "f":
+                fresh = fresh.astype(np.float32, copy=False)
+            with self._lock:
+                for key, vector in zip(miss_positions, fresh):
+                    found[key] = vector
+                    self._remember(key, vector)
+                if disk is not None:
+                    disk.add([key[1] for key in miss_positions], fresh)
+
+        with self._lock:
+            self.hits += len(keys) - len(miss_positions)
+            self.misses += len(miss_positions)
+        return np.stack([found[key] for key in keys])
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "memory_items": len(self._memory)}
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def cached_embed(model, texts, norm=False, cache: EmbeddingCache | None = None) -> np.ndarray:
+    """Embed ``texts`` with a WordLlama or fastembed model through an :class:`EmbeddingCache`."""
+    if isinstance(texts, str):
+        texts = [texts]
+    cache = cache or EmbeddingCache.default()
+    if hasattr(model, "model_name"):
+        embed_fn = lambda batch: np.array(list(model.embed(batch)))
+    else:
+        embed_fn = lambda batch: model.embed(batch)
+    vectors = cache.embed(list(texts), embed_fn, model_fingerprint(model))
+    if norm and len(vectors):
+        vectors = _normalize(vectors)
+    return vectors
@@ -0,0 +1,298 @@
+import json
+import math
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from .embedding_cache import cached_embed, model_fingerprint
+from .model_registry import ModelRegistry
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def bm25_tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def split_words(text: str, chunk_size=250, chunk_overlap=25) -> List[str]:
+    """Fallback chunker: windows of ``chunk_size`` words overlapping by ``chunk_overlap``."""
+    words = text.split()
+    step = max(1, chunk_size - chunk_overlap)
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, max(len(words) - chunk_overlap, 1), step)
+            if words[i:i + chunk_size]]
+
+
+class HybridHit(BaseModel):
+    url: str
+    text: str
+    score: float
+    bm25_rank: int | None = None
+    dense_rank: int | None = None
+
+
+class HybridDocumentStore:
+    """Incremental document store answering BM25 + dense queries fused with reciprocal-rank fusion.
+
+    Pages are split into chunks; every chunk gets postings in an inverted BM25
+    index and a row in a dense embedding matrix. Deleting (or re-adding) a URL
+    tombstones its chunks, which :meth:`compact` later drops. :meth:`save`
+    writes the store to ``path`` and :meth:`open` loads it back, so pages
+    gathered in earlier sessions can be queried without fetching them again.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path=None, embed_model=None, chunk_size=250, chunk_overlap=25, splitter=None,
+                 k1=1.5, b=0.75, rrf_k=60):
+        self.path = Path(path).expanduser() if path is not None else None
+        self._embed_model = embed_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.splitter = splitter or (lambda text: split_words(text, self.chunk_size, self.chunk_overlap))
+        self.k1 = k1
+        self.b = b
+        self.rrf_k = rrf_k
+
+        self.chunk_urls: List[str] = []
+        self.chunk_texts: List[str] = []
+        self.chunk_lengths: List[int] = []
+        self.alive: List[bool] = []
+        self.docs = {}  # url -> chunk ids
+        self.postings = {}  # term -> {chunk id: term frequency}
+        self._total_length = 0
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.RLock()
+
+    @property
+    def embed_model(self):
+        if self._embed_model is None:
+            self._embed_model = ModelRegistry.get("wordllama")
+        return self._embed_model
+
+    def __len__(self):
+        return len(self.docs)
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self.chunk_texts) - self.alive.count(False)
+
+    def _embed(self, texts) -> np.ndarray:
+        return cached_embed(self.embed_model, texts, norm=True).astype(np.float32, copy=False)
+
+    def _append_vectors(self, vectors: np.ndarray):
+        n = len(self.chunk_texts) - len(vectors)
+        if self._vectors.shape[1] != vectors.shape[1]:
+            self._vectors = np.zeros((max(16, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        if n + len(vectors) > len(self._vectors):
+            grown = np.zeros((max(2 * len(self._vectors), n + len(vectors)), vectors.shape[1]), dtype=np.float32)
+            grown[:n] = self._vectors[:n]
+            self._vectors = grown
+        self._vectors[n:n + len(vectors)] = vectors
+
+    def add(self, url: str, text: str) -> int:
+        return self.add_many([(url, text)])
+
+    def add_many(self, pages: Iterable[Tuple[str, str]]) -> int:
+        """Add ``(url, text)`` pages, replacing URLs already stored; returns the number of new chunks.
+
+        A URL given more than once keeps only its last text.
+        """
+        staged = {}
+        for url, text in pages:
+            staged.pop(url, None)
+            staged[url] = [chunk for chunk in (self.splitter(text) if text else []) if chunk.strip()]
+        staged = list(staged.items())
+        new_texts = [chunk for _, chunks in staged for chunk in chunks]
+        vectors = self._embed(new_texts) if new_texts else None
+
+        with self._lock:
+            for url, _ in staged:
+                self._delete(url)
+            for url, chunks in staged:
+                ids = self.docs.setdefault(url, [])
+                for chunk in chunks:
+                    chunk_id = len(self.chunk_texts)
+                    tokens = bm25_tokenize(chunk)
+                    for term, tf in Counter(tokens).items():
+                        self.postings.setdefault(term, {})[chunk_id] = tf
+                    self.chunk_urls.append(url)
+                    self.chunk_texts.append(chunk)
+                    self.chunk_lengths.append(len(tokens))
+                    self.alive.append(True)
+                    self._total_length += len(tokens)
+                    ids.append(chunk_id)
+            if vectors is not None:
+                self._append_vectors(vectors)
+        return len(new_texts)
+
+    def delete(self, url: str) -> bool:
+        with self._lock:
+            return self._delete(url)
+
+    def _delete(self, url) -> bool:
+        ids = self.docs.pop(url, None)
+        if ids is None:
+            return False
+        for chunk_id in ids:
+            for term in set(bm25_tokenize(self.chunk_texts[chunk_id])):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.alive[chunk_id] = False
+            self._total_length -= self.chunk_lengths[chunk_id]
+        return True
+
+    def _bm25_scores(self, query) -> np.ndarray:
+        n_total = len(self.chunk_texts)
+        scores = np.zeros(n_total, dtype=np.float32)
+        n_alive = self.n_chunks
+        if n_alive == 0:
+            return scores
+        lengths = np.asarray(self.chunk_lengths, dtype=np.float32)
+        avg_length = max(self._total_length / n_alive, 1e-9)
+        for term in set(bm25_tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            idf = math.log(1 + (n_alive - len(postings) + 0.5) / (len(postings) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[ids] / avg_length)
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def _dense_scores(self, query) -> np.ndarray:
+        n_total = len(self.chunk_texts)
+        if n_total == 0:
+            return np.zeros(0, dtype=np.float32)
+        query_vector = self._embed([query])[0]
+        return self._vectors[:n_total] @ query_vector
+
+    @staticmethod
+    def _ranking(scores, mask, n):
+        scores = np.where(mask, scores, -np.inf)
+        n = min(n, int(mask.sum()))
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-scores, n - 1)[:n]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def search(self, query: str, k=10, mode="hybrid", candidates=100) -> List[HybridHit]:
+        """``mode`` is ``"hybrid"``, ``"bm25"`` or ``"dense"``; each side contributes ``candidates`` to the fusion."""
+        if mode not in ("hybrid", "bm25", "dense"):
+            raise ValueError(f"Unknown search mode: {mode!r}")
+        with self._lock:
+            alive = np.asarray(self.alive, dtype=bool)
+            if not alive.any():
+                return []
+            bm25_ranks, dense_ranks = {}, {}
+            if mode in ("hybrid", "bm25"):
+                bm25 = self._bm25_scores(query)
+                order = self._ranking(bm25, alive & (bm25 > 0), candidates if mode == "hybrid" else k)
+                bm25_ranks = {int(chunk_id): rank for rank, chunk_id in enumerate(order)}
+            if mode in ("hybrid", "dense"):
+                order = self._ranking(self._dense_scores(query), alive, candidates if mode == "hybrid" else k)
+                dense_ranks = {int(chunk_id): rank for rank, chunk_id in enumerate(order)}
+
+            fused = {}
+            for ranks in (bm25_ranks, dense_ranks):
+                for chunk_id, rank in ranks.items():
+                    fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+            return [HybridHit(url=self.chunk_urls[chunk_id], text=self.chunk_texts[chunk_id], score=score,
+                              bm25_rank=bm25_ranks.get(chunk_id), dense_rank=dense_ranks.get(chunk_id))
+                    for chunk_id, score in best]
+
+    def compact(self):
+        """Drop tombstoned chunks and renumber the rest."""
+        with self._lock:
+            keep = [i for i, is_alive in enumerate(self.alive) if is_alive]
+            if len(keep) == len(self.alive):
+                return
+            remap = {old: new for new, old in enumerate(keep)}
+            vectors = self._vectors[keep] if len(self._vectors) else self._vectors
+            self.chunk_urls = [self.chunk_urls[i] for i in keep]
+            self.chunk_texts = [self.chunk_texts[i] for i in keep]
+            self.chunk_lengths = [self.chunk_lengths[i] for i in keep]
+            self.alive = [True] * len(keep)
+            self.docs = {url: [remap[i] for i in ids] for url, ids in self.docs.items()}
+            self.postings = {term: {remap[i]: tf for i, tf in postings.items()}
+                             for term, postings in self.postings.items()}
+            self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def save(self, path=None):
+        """Write the store to ``path``; both files go to a staging directory renamed into place together."""
+        path = Path(path).expanduser() if path is not None else self.path
+        if path is None:
+            raise ValueError("No path given to save the store to")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        retired = staging.with_name(staging.name + ".old")
+        staging.mkdir()
+        try:
+            with self._lock:
+                self._save(staging)
+            if path.exists():
+                path.rename(retired)
+            staging.rename(path)
+        except BaseException:
+            if retired.exists() and not path.exists():
+                retired.rename(path)
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _save(self, path):
+        if self.alive.count(False) > len(self.alive) // 2:
+            self.compact()
+        n_total = len(self.chunk_texts)
+        state = {
+            "version": self.VERSION,
+            "model": model_fingerprint(self.embed_model) if n_total else None,
+            "chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap,
+            "k1": self.k1, "b": self.b, "rrf_k": self.rrf_k,
+            "chunk_urls": self.chunk_urls, "chunk_texts": self.chunk_texts, "alive": self.alive,
+        }
+        np.save(path / "vectors.npy", self._vectors[:n_total])
+        (path / "store.json").write_text(json.dumps(state))
+
+    @classmethod
+    def open(cls, path, embed_model=None, splitter=None) -> "HybridDocumentStore":
+        """Load the store saved at ``path``, or start an empty one that will be saved there."""
+        path = Path(path).expanduser()
+        if not (path / "store.json").exists():
+            return cls(path=path, embed_model=embed_model, splitter=splitter)
+        state = json.loads((path / "store.json").read_text())
+        if state.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported store version {state.get('version')!r} at {path}")
+        store = cls(path=path, embed_model=embed_model, splitter=splitter,
+                    chunk_size=state["chunk_size"], chunk_overlap=state["chunk_overlap"],
+                    k1=state["k1"], b=state["b"], rrf_k=state["rrf_k"])
+        store.chunk_urls = state["chunk_urls"]
+        store.chunk_texts = state["chunk_texts"]
+        store.alive = state["alive"]
+        for chunk_id, (url, text, is_alive) in enumerate(zip(store.chunk_urls, store.chunk_texts, store.alive)):
+            tokens = bm25_tokenize(text)
+            store.chunk_lengths.append(len(tokens))
+            if not is_alive:
+                continue
+            store.docs.setdefault(url, []).append(chunk_id)
+            store._total_length += len(tokens)
+            for term, tf in Counter(tokens).items():
+                store.postings.setdefault(term, {})[chunk_id] = tf
+
+        vectors = np.load(path / "vectors.npy")
+        if store.chunk_texts and state["model"] != model_fingerprint(store.embed_model):
+            # Saved with another embedding model: the dense side has to be rebuilt.
+            vectors = store._embed(store.chunk_texts)
+        store._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        return store
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+def _load_wordllama(**kwargs):
+    from wordllama import WordLlama
+    return WordLlama.load(**kwargs)
+
+
+def _load_fastembed(**kwargs):
+    from fastembed import TextEmbedding
+    return TextEmbedding(**kwargs)
+
+
+def estimate_model_bytes(model) -> int:
+    embedding = getattr(model, "embedding", None)  # wordllama
+    if embedding is not None and hasattr(embedding, "nbytes"):
+        return int(embedding.nbytes)
+    model_dir = getattr(getattr(model, "model", None), "_model_dir", None)  # fastembed onnx
+    if model_dir is not None:
+        from pathlib import Path
+        return sum(p.stat().st_size for p in Path(model_dir).rglob("*.onnx"))
+    return 0
+
+
+class _Entry:
+    def __init__(self):
+        self.model = None
+        self.released = None  # weak reference kept once unload_idle let go of the model
+        self.lock = threading.Lock()
+        self.load_seconds = 0.0
+        self.last_used = time.monotonic()
+        self.nbytes = 0
+
+    def current(self):
+        if self.model is not None:
+            return self.model
+        return self.released() if self.released is not None else None
+
+
+class ModelRegistry:
+    """Process-wide registry so each embedding model is loaded once and shared.
+
+    ``ModelRegistry.get("wordllama")`` loads lazily on first use; ``warm_up`` loads
+    ahead of time. Models unused for ``idle_seconds`` can be dropped by
+    :meth:`unload_idle` or by the background thread from :meth:`start_idle_unloader`.
+    The registry then keeps only a weak reference: a model some object still holds
+    stays in memory, and :meth:`get` hands that same instance back rather than
+    loading a second copy.
+    """
+
+    _loaders = {"wordllama": _load_wordllama, "fastembed": _load_fastembed}
+    _entries = {}
+    _lock = threading.Lock()
+    _unloader = None
+
+    @classmethod
+    def register_loader(cls, name, loader):
+        with cls._lock:
+            cls._loaders[name] = loader
+
+    @staticmethod
+    def _key(name, kwargs):
+        return name, tuple(sorted(kwargs.items()))
+
+    @classmethod
+    def get(cls, name="wordllama", **kwargs):
+        key = cls._key(name, kwargs)
+        with cls._lock:
+            if name not in cls._loaders:
+                raise KeyError(f"No loader registered for model {name!r}")
+            entry = cls._entries.setdefault(key, _Entry())
+            loader = cls._loaders[name]
+
+        with entry.lock:
+            if entry.model is None and entry.released is not None:
+                entry.model, entry.released = entry.released(), None
+            if entry.model is None:
+                start = time.perf_counter()
+                entry.model = loader(**kwargs)
+                entry.load_seconds = time.perf_counter() - start
+                entry.nbytes = estimate_model_bytes(entry.model)
+                logger.info(f"Loaded {name} in {entry.load_seconds:.2f}s ({entry.nbytes / 2 ** 20:.1f} MiB)")
+            entry.last_used = time.monotonic()
+            return entry.model
+
+    @classmethod
+    def warm_up(cls, *names, **kwargs):
+        for name in names or ("wordllama",):
+            cls.get(name, **kwargs)
+
+    @classmethod
+    def unload(cls, name="wordllama", **kwargs) -> bool:
+        with cls._lock:
+            entry = cls._entries.pop(cls._key(name, kwargs), None)
+        return entry is not None and entry.current() is not None
+
+    @classmethod
+    def unload_idle(cls, idle_seconds) -> list:
+        """Let go of models unused for ``idle_seconds``; returns the keys of those actually freed.
+
+        A model still held elsewhere is only weakly referenced until its holders drop it.
+        """
+        now = time.monotonic()
+        unloaded = []
+        with cls._lock:
+            for key, entry in cls._entries.items():
+                if not entry.lock.acquire(blocking=False):
+                    continue  # being loaded or handed out right now
+                try:
+                    if entry.model is not None and now - entry.last_used > idle_seconds:
+                        try:
+                            entry.released = weakref.ref(entry.model)
+                        except TypeError:  # no weak references: drop it outright
+                            entry.released = None
+                            unloaded.append(key)
+                        entry.model = None
+                    if entry.released is not None and entry.released() is None:
+                        unloaded.append(key)
+                finally:
+                    entry.lock.release()
+            for key in unloaded:
+                del cls._entries[key]
+        for name, _ in unloaded:
+            logger.info(f"Unloaded idle model {name}")
+        return unloaded
+
+    @classmethod
+    def start_idle_unloader(cls, idle_seconds=15 * 60, interval=60):
+        """Periodically call :meth:`unload_idle` with ``idle_seconds``."""
+        with cls._lock:
+            if cls._unloader is not None and cls._unloader.is_alive():
+                return cls._unloader
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    cls.unload_idle(idle_seconds)
+
+            cls._unloader = threading.Thread(target=run, name="pyopengenai-model-unloader", daemon=True)
+            cls._unloader.start()
+            return cls._unloader
+
+    @classmethod
+    def memory_usage(cls) -> dict:
+        with cls._lock:
+            entries = list(cls._entries.items())
+        return {
+            name if not kwargs else f"{name}{dict(kwargs)}": {
+                "bytes": entry.nbytes,
+                "load_seconds": round(entry.load_seconds, 3),
+                "idle_seconds": round(time.monotonic() - entry.last_used, 1),
+            }
+            for (name, kwargs), entry in entries if entry.current() is not None
+        }
@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .ann_index import normalize_rows, top_k_indices
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors, scale=None):
+    """Symmetric per-dimension int8 codes; returns ``(codes, scale)`` with ``vectors ~= codes * scale``."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if scale is None:
+        scale = np.maximum(np.abs(vectors).max(axis=0), 1e-12) / 127.0 if len(vectors) else None
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return codes, np.asarray(scale, dtype=np.float32)
+
+
+def quantize_binary(vectors) -> np.ndarray:
+    """One sign bit per dimension, packed eight to a byte."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def hamming_distances(codes, query_code) -> np.ndarray:
+    xor = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedIndex:
+    """Compressed store of normalized vectors searched in two passes.
+
+    ``mode="int8"`` keeps one byte per dimension (4x smaller than float32) and
+    ``mode="binary"`` one bit (32x smaller). A search first shortlists
+    ``k * oversample`` ids on the codes -- int8 dot products or Hamming
+    distances -- and then rescores the shortlist with the full-precision query.
+    ``full_precision`` (an array, e.g. a memmap, or a callable taking ids) gives
+    exact rescoring; without it the float query is scored against the codes.
+    Binary codes rank coarsely, so they default to a larger ``oversample``.
+    """
+
+    MODES = ("int8", "binary")
+
+    def __init__(self, mode="int8", oversample=None, full_precision=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown quantization mode: {mode!r}")
+        self.mode = mode
+        self.oversample = oversample or (10 if mode == "binary" else 4)
+        self.full_precision = full_precision
+        self.dim = None
+        self.scale = None
+        self.codes = None
+
+    def __len__(self):
+        return 0 if self.codes is None else len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.codes is None else self.codes.nbytes
+
+    @classmethod
+    def build(cls, vectors, **kwargs) -> "QuantizedIndex":
+        index = cls(**kwargs)
+        index.add(vectors)
+        return index
+
+    def add(self, vectors):
+        """Append vectors (normalized here); ids continue from the current size."""
+        vectors = normalize_rows(np.atleast_2d(vectors))
+        if len(vectors) == 0:
+            return
+        self.dim = vectors.shape[1]
+        if self.mode == "int8":
+            # Calibrated on the first vectors added; later ones are clipped to the same range.
+            codes, self.scale = quantize_int8(vectors, self.scale)
+        else:
+            codes = quantize_binary(vectors)
+        self.codes = codes if self.codes is None else np.concatenate([self.codes, codes])
+
+    def _coarse_scores(self, query):
+        if self.mode == "binary":
+            return -hamming_distances(self.codes, quantize_binary(query)).astype(np.float32)
+        weights = query * self.scale
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        # Blocks of ~1 MiB as float32 stay in cache between the cast and the product.
+        step = max(1, 2 ** 18 // self.dim)
+        for i in range(0, len(self.codes), step):
+            np.dot(self.codes[i:i + step].astype(np.float32), weights, out=scores[i:i + step])
+        return scores
+
+    def _rescore(self, ids, query, coarse):
+        if self.full_precision is not None:
+            source = self.full_precision
+            vectors = source(ids) if callable(source) else np.asarray(source[ids])
+            return normalize_rows(vectors) @ query
+        if self.mode == "int8":
+            return coarse[ids]
+        signs = np.unpackbits(self.codes[ids], axis=1, count=self.dim).astype(np.float32) * 2 - 1
+        return signs @ query / np.sqrt(self.dim)
+
+    def search(self, query, k=10, oversample=None):
+        """Return ``(ids, scores)`` of the ``k`` best vectors; a 2-D ``query`` returns one pair per row."""
+        query = np.asarray(query, dtype=np.float32)
+        if query.ndim == 2:
+            return [self.search(row, k, oversample) for row in query]
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        coarse = self._coarse_scores(query)
+        shortlist = top_k_indices(coarse, k * (oversample or self.oversample))
+        scores = self._rescore(shortlist, query, coarse)
+        best = top_k_indices(scores, k)
+        return shortlist[best], scores[best]
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {"mode": self.mode, "oversample": self.oversample, "dim": self.dim}
+        (path / "quantized.json").write_text(json.dumps(meta))
+        if self.codes is not None:
+            np.save(path / "codes.npy", self.codes)
+        if self.scale is not None:
+            np.save(path / "scale.npy", self.scale)
+
+    @classmethod
+    def load(cls, path, mmap=True, full_precision=None) -> "QuantizedIndex":
+        path = Path(path)
+        meta = json.loads((path / "quantized.json").read_text())
+        index = cls(mode=meta["mode"], oversample=meta["oversample"], full_precision=full_precision)
+        index.dim = meta["dim"]
+        if (path / "codes.npy").exists():
+            index.codes = np.load(path / "codes.npy", mmap_mode="r" if mmap else None)
+        if (path / "scale.npy").exists():
+            index.scale = np.load(path / "scale.npy")
+        return index
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    # python -m pyopengenai.retrieval.quantization [n_vectors] [dim]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    rng = np.random.default_rng(0)
+    centers = normalize_rows(rng.normal(size=(512, dim)))
+    data = normalize_rows(centers[rng.integers(0, 512, n)] + 0.6 / np.sqrt(dim) * rng.normal(size=(n, dim)))
+    queries = normalize_rows(data[rng.choice(n, 100, replace=False)] + 0.3 / np.sqrt(dim) * rng.normal(size=(100, dim)))
+    k = 10
+
+    start = time.perf_counter()
+    exact = [top_k_indices(data @ q, k) for q in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"float32: {data.nbytes / 2**20:.1f} MiB, {exact_ms:.2f} ms/query")
+
+    for mode in QuantizedIndex.MODES:
+        for full in (None, data):
+            index = QuantizedIndex.build(data, mode=mode, full_precision=full)
+            for oversample in (1, 4, 10):
+                start = time.perf_counter()
+                found = [index.search(q, k, oversample=oversample)[0] for q in queries]
+                ms = (time.perf_counter() - start) / len(queries) * 1000
+                recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, exact)])
+                rescore = "exact" if full is not None else "codes"
+                print(f"{mode:>6} {index.nbytes / 2**20:6.1f} MiB ({data.nbytes / index.nbytes:.0f}x), "
+                      f"rescore={rescore}, oversample={oversample:>2}: {ms:.2f} ms/query, recall@{k}={recall:.3f}")
@@ -2,6 +2,7 @@ from langchain_ollama import ChatOllama
 from .ai_searcher import AdvancedAISearcher
 
 from .query_master import SearchRetriever
+from .web_search.http_client import SharedHttpClient
 
 from langchain_huggy import HuggyLLM
     # llm = ChatOllama(model = "qwen2.5:1.5b-instruct",temperature = 0,num_predict=8_000)
@@ -16,8 +17,45 @@ def ai_search(query,verbose: bool|str= False,
               max_urls=5,
               n_key_sentences=25,
               topk=10,
-              n_web_queries_to_generate = 5
+              n_web_queries_to_generate = 5,
+              concurrent = False,
+              deadline = None
               ):
+    return SharedHttpClient.run(aai_search(query, verbose=verbose, llm=llm, chunk_overlap=chunk_overlap,
+                                           chunk_size=chunk_size, max_urls=max_urls,
+                                           n_key_sentences=n_key_sentences, topk=topk,
+                                           n_web_queries_to_generate=n_web_queries_to_generate,
+                                           concurrent=concurrent, deadline=deadline))
+
+def search(query,verbose: bool|str = False,
+           llm= None, deadline = None):
+    return SharedHttpClient.run(asearch(query, verbose=verbose, llm=llm, deadline=deadline))
+
+def fast_search(query,verbose: bool|str = False,
+                llm= None, deadline = None):
+    return SharedHttpClient.run(afast_search(query, verbose=verbose, llm=llm, deadline=deadline))
+
+def google_search(query,verbose: bool|str = False, deadline = None):
+    return SharedHttpClient.run(agoogle_search(query, verbose=verbose, deadline=deadline))
+
+def deep_google_search(query,verbose: bool|str = False, deadline = None):
+    return SharedHttpClient.run(adeep_google_search(query, verbose=verbose, deadline=deadline))
+
+
+
+# Async variants: no nested event loops, so they can be awaited from FastAPI handlers or Jupyter cells.
+# The sync functions above run these on SharedHttpClient's background loop.
+async def aai_search(query,verbose: bool|str= False,
+                     llm = None,
+                     chunk_overlap=25,
+                     chunk_size=250,
+                     max_urls=5,
+                     n_key_sentences=25,
+                     topk=10,
+                     n_web_queries_to_generate = 5,
+                     concurrent = False,
+                     deadline = None
+                     ):
     if llm is None:
         llm =base_llm
     rtr = AdvancedAISearcher(
@@ -25,23 +63,23 @@ def ai_search(query,verbose: bool|str= False,
         chunk_size=chunk_size,
         max_urls=max_urls,
         n_key_sentences=n_key_sentences,
-        topk=topk
+        topk=topk,
+        concurrent=concurrent
     )
     if isinstance(verbose,str): verbose = verbose.lower() == 'true'
-    res = rtr.generate_final_answer(llm, query,verbose=verbose,n_splits=n_web_queries_to_generate)
-    return res
+    return await rtr.agenerate_final_answer(llm, query,verbose=verbose,n_splits=n_web_queries_to_generate,
+                                             deadline=deadline)
 
-def search(query,verbose: bool|str = False,
-           llm= None):
+async def asearch(query,verbose: bool|str = False,
+                  llm= None, deadline = None):
     if llm is None:
         llm =base_llm
     rtr = AdvancedAISearcher()
     if isinstance(verbose,str): verbose = verbose.lower() == 'true'
-    res = rtr.search(llm,query,verbose=verbose)
-    return res
+    return await rtr.asearch(llm,query,verbose=verbose,deadline=deadline)
 
-def fast_search(query,verbose: bool|str = False,
-                llm= None):
+async def afast_search(query,verbose: bool|str = False,
+                       llm= None, deadline = None):
     if llm is None:
         llm = base_llm
     rtr = AdvancedAISearcher(chunk_overlap=20,
@@ -49,22 +87,20 @@ def fast_search(query,verbose: bool|str = False,
                              max_urls=2,
                              n_key_sentences=10)
     if isinstance(verbose,str): verbose = verbose.lower() == 'true'
-    res = rtr.search(llm,query,verbose=verbose)
-    return res
+    return await rtr.asearch(llm,query,verbose=verbose,deadline=deadline)
 
-def google_search(query,verbose: bool|str = False):
+async def agoogle_search(query,verbose: bool|str = False, deadline = None):
     retriever = SearchRetriever(
         chunk_overlap=20,
         chunk_size=100,
         max_urls=2,
     )
     if isinstance(verbose,str): verbose = verbose.lower() == 'true'
-    results = retriever.query_based_content_retrieval(query, topk=5,verbose=verbose)
+    results = await retriever.aquery_based_content_retrieval(query, topk=5,verbose=verbose,deadline=deadline)
     return "\n".join(results.topk_chunks)
 
-def deep_google_search(query,verbose: bool|str = False):
+async def adeep_google_search(query,verbose: bool|str = False, deadline = None):
     retriever = SearchRetriever()
     if isinstance(verbose,str): verbose = verbose.lower() == 'true'
-    results = retriever.query_based_content_retrieval(query, topk=5,verbose=verbose)
+    results = await retriever.aquery_based_content_retrieval(query, topk=5,verbose=verbose,deadline=deadline)
     return "\n".join(results.topk_chunks)
-
@@ -1,8 +1,11 @@
 from .embed_search import fast_embedding_search
 from .html_parser import FastHTMLParserV3
 from .optimized_multi_query_searcher import OptimizedMultiQuerySearcher
+from .search_backends import SearchBackend, HttpSearchBackend, SearchResult
+from .http_client import SharedHttpClient
 from .agent import WebSearchAgent,WebSearchArguments
 
 __all__ = ['fast_embedding_search', 'WebSearchAgent', 'FastHTMLParserV3', 'WebSearchArguments',
-           'OptimizedMultiQuerySearcher',
+           'OptimizedMultiQuerySearcher', 'SearchBackend', 'HttpSearchBackend', 'SearchResult',
+           'SharedHttpClient',
            ]
\ No newline at end of file
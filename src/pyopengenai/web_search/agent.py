@@ -6,7 +6,6 @@ from datetime import datetime
 import json
 import logging
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pydantic import BaseModel, Field
 from weasyprint import HTML
 import markdown
@@ -14,6 +13,7 @@ from langchain.prompts import PromptTemplate
 from langchain_ollama import ChatOllama
 from langchain.schema import StrOutputParser
 from .optimized_multi_query_searcher import OptimizedMultiQuerySearcher
+from ..retrieval.chunking import SpanChunker
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,12 +37,8 @@ class WebSearchHelper:
 
     @staticmethod
     def summarize_text(llm, text: str) -> str:
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=250,
-            chunk_overlap=25,
-            is_separator_regex=False,
-        )
-        chunks = text_splitter.split_text(text)
+        # Token counts are estimated from the text length; no tokenizer pass over the whole text
+        chunks = SpanChunker(chunk_size=250, chunk_overlap=25, unit="tokens").split_text(text)
 
         summarize_prompt = PromptTemplate.from_template(
             """Summarize the following [CHUNK], focusing on the main points:
@@ -0,0 +1,199 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    """A Chrome driver plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.monotonic()
+
+    def __getattr__(self, item):
+        return getattr(self.driver, item)
+
+
+class ChromeDriverPool:
+    """Process-wide, thread-safe pool of headless Chrome drivers.
+
+    Drivers are pre-warmed on a background thread after creation, health-checked
+    on checkout and recycled after ``max_pages_per_driver`` pages or when a search
+    reports a crash. Use :meth:`get_pool` to share one pool per
+    (chromedriver_path, animation). ``driver_factory`` replaces the Chrome setup
+    with any callable returning a webdriver-like object.
+    """
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, chromedriver_path="/usr/local/bin/chromedriver", pool_size=2,
+                 max_size=None, max_pages_per_driver=50, animation=False,
+                 checkout_timeout=30, driver_factory=None):
+        self.chromedriver_path = chromedriver_path
+        self.pool_size = pool_size
+        self.max_size = max(max_size or pool_size, pool_size)
+        self.max_pages_per_driver = max_pages_per_driver
+        self.animation = animation
+        self.checkout_timeout = checkout_timeout
+        self.driver_factory = driver_factory
+        self._idle = deque()
+        self._n_alive = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._prewarm_in_background()
+
+    @classmethod
+    def get_pool(cls, chromedriver_path="/usr/local/bin/chromedriver", animation=False, **kwargs):
+        key = (chromedriver_path, animation)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None or pool._closed:
+                pool = cls(chromedriver_path=chromedriver_path, animation=animation, **kwargs)
+                cls._pools[key] = pool
+            elif kwargs.get("max_size") and kwargs["max_size"] > pool.max_size:
+                with pool._cond:
+                    pool.max_size = kwargs["max_size"]
+                    pool._cond.notify_all()
+            return pool
+
+    @classmethod
+    def shutdown_all(cls):
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.shutdown()
+
+    def _setup_driver(self):
+        if self.driver_factory is not None:
+            return PooledDriver(self.driver_factory())
+        chrome_options = Options()
+        if not self.animation:
+            chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-images")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--start-maximized")
+        chrome_options.page_load_strategy = 'none'
+        service = Service(self.chromedriver_path)
+        return PooledDriver(webdriver.Chrome(service=service, options=chrome_options))
+
+    def prewarm(self):
+        """Start drivers until ``pool_size`` are alive; blocks for as long as Chrome takes to start."""
+        with self._cond:
+            missing = 0 if self._closed else max(self.pool_size - self._n_alive, 0)
+            self._n_alive += missing
+        for _ in range(missing):
+            try:
+                driver = self._setup_driver()
+            except Exception as e:
+                logger.error(f"Failed to start chrome driver: {str(e)}")
+                with self._cond:
+                    self._n_alive -= 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                if not self._closed:
+                    self._idle.append(driver)
+                    self._cond.notify()
+                    continue
+                self._n_alive -= 1
+            self._quit(driver)
+
+    def _prewarm_in_background(self):
+        # Starting Chrome takes seconds; callers of get_pool() and release() should not wait for it.
+        threading.Thread(target=self.prewarm, name="pyopengenai-driver-prewarm", daemon=True).start()
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            driver.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("ChromeDriverPool is shut down")
+                while not self._idle and self._n_alive >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a chrome driver")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    driver = self._idle.popleft()
+                else:
+                    driver = None
+                    self._n_alive += 1
+
+            if driver is None:
+                try:
+                    return self._setup_driver()
+                except Exception:
+                    with self._cond:
+                        self._n_alive -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(driver):
+                return driver
+            logger.warning("Discarding unhealthy chrome driver")
+            self._discard(driver)
+
+    def release(self, driver, crashed=False):
+        driver.pages_served += 1
+        recycle = crashed or driver.pages_served >= self.max_pages_per_driver
+        with self._cond:
+            if not recycle and not self._closed and len(self._idle) < self.max_size:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+        self._discard(driver)
+        if not self._closed:
+            self._prewarm_in_background()
+
+    def _discard(self, driver):
+        self._quit(driver)
+        with self._cond:
+            self._n_alive -= 1
+            self._cond.notify()
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
+        with self._cond:
+            self._n_alive -= len(idle)
+
+    def stats(self):
+        with self._cond:
+            return {"idle": len(self._idle), "alive": self._n_alive,
+                    "pool_size": self.pool_size, "max_size": self.max_size}
+
+
+atexit.register(ChromeDriverPool.shutdown_all)
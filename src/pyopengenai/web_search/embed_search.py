@@ -1,32 +1,22 @@
-from fastembed import TextEmbedding
 import numpy as np
 from typing import List, Tuple
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-
-from fastembed import TextEmbedding
-import numpy as np
-from typing import List, Tuple
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import normalize
 
+from ..retrieval.embedding_cache import cached_embed
+from ..retrieval.model_registry import ModelRegistry
+from ..retrieval.ann_index import top_k_indices
+from ..retrieval.chunking import SpanChunker
+
 
 def fast_embedding_search(text_corpus: str, query: str, top_k: int = 5, top_tfidf=10,
                           chunk_size=500, chunk_overlap=50) -> List[Tuple[str, float]]:
-    global embedding_model, tfidf_vectorizer
-
-    # Initialize models (only once)
-    if 'embedding_model' not in globals():
-        embedding_model = TextEmbedding()
-    if 'tfidf_vectorizer' not in globals():
-        tfidf_vectorizer = TfidfVectorizer(lowercase=True, stop_words='english')
-
-    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-    )
+    embedding_model = ModelRegistry.get("fastembed")
+    # Refit per call, so it is not shared between concurrent callers
+    tfidf_vectorizer = TfidfVectorizer(lowercase=True, stop_words='english')
+
+    text_splitter = SpanChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, unit="tokens")
 
     # Split the corpus into sentences
     sentences = text_splitter.split_text(text_corpus)
@@ -44,8 +34,8 @@ def fast_embedding_search(text_corpus: str, query: str, top_k: int = 5, top_tfid
     candidate_sentences = [sentences[i] for i in candidate_indices]
 
     # Batch encode the candidate sentences and query
-    candidate_embeddings = np.array(list(embedding_model.embed(candidate_sentences)))
-    query_embedding = np.array(list(embedding_model.embed([query])))[0]
+    candidate_embeddings = cached_embed(embedding_model, candidate_sentences)
+    query_embedding = cached_embed(embedding_model, [query])[0]
 
     # Normalize embeddings for faster cosine similarity computation
     candidate_embeddings = normalize(candidate_embeddings)
@@ -62,14 +52,9 @@ def fast_embedding_search(text_corpus: str, query: str, top_k: int = 5, top_tfid
 
 
 def fast_embed_backup(text_corpus: str, query: str, top_k: int = 1) -> List[Tuple[str, float]]:
-    # Initialize the TextEmbedding model
-    embedding_model = TextEmbedding()
+    embedding_model = ModelRegistry.get("fastembed")
 
-    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=500,
-        chunk_overlap=50,
-        separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-    )
+    text_splitter = SpanChunker(chunk_size=500, chunk_overlap=50, unit="tokens")
 
     # Split the corpus into sentences
     sentences = text_splitter.split_text(text_corpus)
@@ -77,8 +62,8 @@ def fast_embed_backup(text_corpus: str, query: str, top_k: int = 1) -> List[Tupl
     sentences = [sentence.strip() for sentence in sentences if sentence.strip()]
 
     # Encode the sentences and the query
-    sentence_embeddings = list(embedding_model.embed(sentences))
-    query_embedding = list(embedding_model.embed([query]))[0]
+    sentence_embeddings = cached_embed(embedding_model, sentences)
+    query_embedding = cached_embed(embedding_model, [query])[0]
 
     # Convert to numpy arrays for efficient computation
     sentence_embeddings = np.array(sentence_embeddings)
@@ -89,7 +74,7 @@ def fast_embed_backup(text_corpus: str, query: str, top_k: int = 1) -> List[Tupl
             np.linalg.norm(sentence_embeddings, axis=1) * np.linalg.norm(query_embedding)
     )
 
-    # Get the top-k results
-    top_results = sorted(zip(sentences, cosine_scores), key=lambda x: x[1], reverse=True)[:top_k]
+    # Get the top-k results without sorting every score
+    top_results = [(sentences[i], cosine_scores[i]) for i in top_k_indices(cosine_scores, top_k)]
 
     return top_results
\ No newline at end of file
@@ -0,0 +1,155 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import trafilatura
+
+from .text_filter import TextFilter
+
+logger = logging.getLogger(__name__)
+
+
+def extract_trafilatura_text(html):
+    """Module-level so it can be pickled into worker processes."""
+    text = trafilatura.extract(html, include_formatting=True)
+    if not text:
+        return ""
+    return TextFilter.filter_text(text)
+
+
+def _process_context():
+    # Forking a process that runs an event loop and helper threads can leave the child holding
+    # their locks; workers start from a clean interpreter and import this module instead.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ExtractionExecutor:
+    """Runs CPU-heavy page extraction off the event loop.
+
+    ``mode`` is ``"thread"`` (default), ``"process"`` or ``"inline"``. Executors are
+    shared per (mode, max_workers) through :meth:`get`.
+
+    ``"process"`` scales across cores but is opt-in: workers are started with
+    ``forkserver`` (``spawn`` where unavailable) and re-import the caller's
+    ``__main__``, so scripts using it must guard their entry point with
+    ``if __name__ == "__main__":``, and functions sent to workers must be
+    importable module-level names.
+    """
+
+    MODES = ("process", "thread", "inline")
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, mode="thread", max_workers=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown extraction mode: {mode!r}, expected one of {self.MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, mode="thread", max_workers=None):
+        key = (mode, max_workers)
+        with cls._shared_lock:
+            executor = cls._shared.get(key)
+            if executor is None:
+                executor = cls(mode=mode, max_workers=max_workers)
+                cls._shared[key] = executor
+            return executor
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None and self.mode != "inline":
+                if self.mode == "process":
+                    try:
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                             mp_context=_process_context())
+                    except (OSError, NotImplementedError) as e:
+                        logger.warning(f"Process pool unavailable ({str(e)}), falling back to threads")
+                        self.mode = "thread"
+                if self.mode == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="pyopengenai-extract")
+            return self._executor
+
+    async def run(self, fn, *args):
+        executor = self._get_executor()
+        if executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            logger.warning("Extraction process pool broke, restarting it")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return fn(*args)
+
+    def submit(self, fn, *args) -> Future:
+        executor = self._get_executor()
+        if executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return executor.submit(fn, *args)
+
+    def map(self, fn, items):
+        executor = self._get_executor()
+        if executor is None:
+            return [fn(item) for item in items]
+        return list(executor.map(fn, items))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @classmethod
+    def shutdown_all(cls):
+        with cls._shared_lock:
+            executors = list(cls._shared.values())
+            cls._shared.clear()
+        for executor in executors:
+            executor.shutdown()
+
+
+atexit.register(ExtractionExecutor.shutdown_all)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from pathlib import Path
+
+    # Re-import by package name so worker processes can unpickle the function.
+    from pyopengenai.web_search.extraction import ExtractionExecutor, extract_trafilatura_text
+
+    # python -m pyopengenai.web_search.extraction <dir with .html files>
+    fixtures = [p.read_text(encoding="utf-8", errors="ignore") for p in Path(sys.argv[1]).glob("*.html")]
+    print(f"{len(fixtures)} html fixtures")
+
+    async def bench(mode):
+        extractor = ExtractionExecutor(mode=mode)
+        await extractor.run(extract_trafilatura_text, fixtures[0])  # warm up workers
+        start = time.perf_counter()
+        await asyncio.gather(*[extractor.run(extract_trafilatura_text, html) for html in fixtures])
+        elapsed = time.perf_counter() - start
+        extractor.shutdown()
+        return elapsed
+
+    for mode in ExtractionExecutor.MODES:
+        elapsed = asyncio.run(bench(mode))
+        print(f"{mode:>8}: {elapsed:.2f}s  ({len(fixtures) / elapsed:.1f} pages/s)")
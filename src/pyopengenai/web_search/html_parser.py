@@ -1,6 +1,5 @@
 import asyncio
 import os
-from functools import lru_cache
 
 import aiohttp
 import trafilatura
@@ -15,7 +14,9 @@ from sumy.nlp.tokenizers import Tokenizer
 from sumy.summarizers.lsa import LsaSummarizer
 from sumy.nlp.stemmers import Stemmer
 from sumy.utils import get_stop_words
-from .text_filter import TextFilter
+from .http_client import SharedHttpClient
+from .extraction import ExtractionExecutor, extract_trafilatura_text
+from .page_cache import PageCache
 
 
 
@@ -134,26 +135,33 @@ class FastHTMLParserV2:
         return asyncio.run(self.__fetch_all_urls())
 
 class FastHTMLParserV3:
-    def __init__(self, urls, fast_response=False, max_length=None, summarize=False, summary_sentences=3):
+    def __init__(self, urls, fast_response=False, max_length=None, summarize=False, summary_sentences=3,
+                 extraction_mode="thread", extraction_workers=None, page_cache=None):
         self.urls = urls
         self.fast_response = fast_response
         self.max_length = max_length
         self.summarize = summarize
         self.summary_sentences = summary_sentences
+        # trafilatura is CPU bound; run it off the event loop so downloads keep flowing. extraction_mode="process"
+        # uses every core but needs an `if __name__ == "__main__":` guard in the calling script.
+        self.extractor = ExtractionExecutor.get(mode=extraction_mode, max_workers=extraction_workers)
+        self.page_cache = PageCache.default() if page_cache is True else page_cache
         if summarize:
             self.summarizer = LsaSummarizer(Stemmer('english'))
             self.summarizer.stop_words = get_stop_words('english')
 
-    @lru_cache
     async def _fetch_url(self, session, url, url_fetch_timeout=10):
         if self._is_avoid_urls(url):
             return ""
         try:
-            async with session.get(url, timeout=url_fetch_timeout) as response:
+            timeout = aiohttp.ClientTimeout(total=url_fetch_timeout)
+            if self.page_cache is not None:
+                return await self.page_cache.fetch_text(session, url, "html", self._extract_body, timeout=timeout)
+            async with session.get(url, timeout=timeout) as response:
                 if response.status == 200:
                     html = await response.text()
                     # return self._process_html(html)
-                    return self._process_trafili_html(html)
+                    return await self.extractor.run(extract_trafilatura_text, html)
                 else:
                     # print(f"Error fetching {url}: HTTP status {response.status}")
                     return ""
@@ -167,6 +175,10 @@ class FastHTMLParserV3:
             print(f"Unexpected error fetching {url}: {str(e)}")
             return ""
 
+    async def _extract_body(self, body, encoding):
+        html = body.decode(encoding, errors="replace")
+        return await self.extractor.run(extract_trafilatura_text, html)
+
     def _process_html(self, html):
         try:
             soup = BeautifulSoup(html, 'html.parser')
@@ -198,17 +210,18 @@ class FastHTMLParserV3:
             return text
 
     async def fetch_content(self,url_fetch_timeout=10):
-        async with aiohttp.ClientSession() as session:
-            if self.fast_response:
-                for url in self.urls:
-                    result = await self._fetch_url(session, url,url_fetch_timeout)
-                    if result:
-                        return [result]
-                return []
-            else:
-                tasks = [self._fetch_url(session, url,url_fetch_timeout) for url in self.urls]
-                return await asyncio.gather(*tasks)
-                # return [result for result in await asyncio.gather(*tasks) if result]
+        # Keep-alive connections and the DNS cache are shared process-wide.
+        session = await SharedHttpClient.get_session()
+        if self.fast_response:
+            for url in self.urls:
+                result = await self._fetch_url(session, url,url_fetch_timeout)
+                if result:
+                    return [result]
+            return []
+        else:
+            tasks = [self._fetch_url(session, url,url_fetch_timeout) for url in self.urls]
+            return await asyncio.gather(*tasks)
+            # return [result for result in await asyncio.gather(*tasks) if result]
 
 
     def _is_avoid_urls(self,url):
@@ -217,9 +230,7 @@ class FastHTMLParserV3:
         return False
 
     def _process_trafili_html(self, html):
-        text = trafilatura.extract(html, include_formatting=True)
-        text = TextFilter.filter_text(text)
-        return text
+        return extract_trafilatura_text(html)
 
 #
 # class FastHTMLParserV3:
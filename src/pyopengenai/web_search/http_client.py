@@ -0,0 +1,127 @@
+import asyncio
+import atexit
+import threading
+
+import aiohttp
+
+
+class SharedHttpClient:
+    """Long-lived aiohttp sessions shared by every fetcher in the process.
+
+    aiohttp sessions are bound to an event loop, so one session is kept per loop.
+    Synchronous callers go through :meth:`run`, which executes coroutines on a
+    dedicated background loop; its session (and therefore keep-alive connections
+    and the DNS cache) survives across calls instead of dying with ``asyncio.run``.
+    The session of any other loop is closed when that loop shuts down its async
+    generators, as ``asyncio.run`` does on exit.
+    """
+
+    limit = 100
+    limit_per_host = 8
+    ttl_dns_cache = 300
+    keepalive_timeout = 30
+    headers = {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                      "Chrome/128.0.0.0 Safari/537.36",
+    }
+
+    _sessions = {}
+    _closers = {}
+    _loop = None
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, limit=None, limit_per_host=None, ttl_dns_cache=None, keepalive_timeout=None):
+        """Change connector settings; only sessions created afterwards pick them up."""
+        if limit is not None:
+            cls.limit = limit
+        if limit_per_host is not None:
+            cls.limit_per_host = limit_per_host
+        if ttl_dns_cache is not None:
+            cls.ttl_dns_cache = ttl_dns_cache
+        if keepalive_timeout is not None:
+            cls.keepalive_timeout = keepalive_timeout
+
+    @classmethod
+    def _new_session(cls) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=cls.limit,
+            limit_per_host=cls.limit_per_host,
+            ttl_dns_cache=cls.ttl_dns_cache,
+            keepalive_timeout=cls.keepalive_timeout,
+            enable_cleanup_closed=True,
+        )
+        return aiohttp.ClientSession(connector=connector, headers=cls.headers)
+
+    @classmethod
+    async def get_session(cls) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.get(loop)
+        if session is None or session.closed:
+            session = cls._new_session()
+            with cls._lock:
+                # Loops closed without shutting down their async generators never ran their closer.
+                for closed in [other for other in cls._sessions if other.is_closed()]:
+                    cls._sessions.pop(closed)
+                    cls._closers.pop(closed, None)
+                cls._sessions[loop] = session
+            if loop is not cls._loop:
+                closer = cls._close_on_shutdown(loop, session)
+                await closer.__anext__()
+                cls._closers[loop] = closer
+        return session
+
+    @classmethod
+    async def _close_on_shutdown(cls, loop, session):
+        # An async generator parked at its first yield: loop.shutdown_asyncgens() finalizes it.
+        try:
+            yield
+        finally:
+            with cls._lock:
+                # A replaced session's closer leaves its successor alone.
+                if cls._sessions.get(loop) is session:
+                    del cls._sessions[loop]
+                    cls._closers.pop(loop, None)
+            await session.close()
+
+    @classmethod
+    def _background_loop(cls):
+        with cls._lock:
+            if cls._loop is None or cls._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="pyopengenai-http", daemon=True)
+                thread.start()
+                cls._loop, cls._thread = loop, thread
+            return cls._loop
+
+    @classmethod
+    def run(cls, coro):
+        """Run ``coro`` on the shared background loop and block until it finishes."""
+        loop = cls._background_loop()
+        if threading.current_thread() is cls._thread:
+            raise RuntimeError("SharedHttpClient.run() cannot be called from its own event loop; await instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    @classmethod
+    async def aclose(cls):
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            session = cls._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            loop, thread = cls._loop, cls._thread
+            cls._loop = cls._thread = None
+        if loop is None or loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(cls.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+atexit.register(SharedHttpClient.close)
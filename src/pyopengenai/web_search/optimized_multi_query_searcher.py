@@ -1,67 +1,80 @@
 import asyncio
 import logging
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import cpu_count
 from urllib.parse import quote_plus
 
 from nodriver.cdp.dom import query_selector
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from pydantic import BaseModel
 from typing import List
 
+from .driver_pool import ChromeDriverPool
+from .search_backends import SearchBackend, HttpSearchBackend, SearchResult, SEARCH_PARAMS
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 import time
-class SearchResult(BaseModel):
-    query: str
-    title_and_links: list = []
-    urls: list = []
-    search_provider: str  = ""
-    page_source:str = ""
-
-class OptimizedMultiQuerySearcher:
+
+class OptimizedMultiQuerySearcher(SearchBackend):
     def __init__(self, chromedriver_path="/usr/local/bin/chromedriver", max_workers=None,
-                 animation = False):
+                 animation = False,
+                 pool_size = 2,
+                 max_pages_per_driver = 50,
+                 shared_pool = True,
+                 backend: str | SearchBackend = "selenium",
+                 wait_timeout = 5):
         self.chromedriver_path = chromedriver_path
+        self.wait_timeout = wait_timeout
         self.max_workers = max_workers or min(32, cpu_count() -2)
         self.animation = animation
-        self.driver_pool = []
-        self.params = {
-            "bing":{"search":"b_results","find_element":".b_algo","head_selector":"h2"},
-            "google": {"search": "search", "find_element": "div.g", "head_selector": "h3"}
-        }
-
-    def _setup_driver(self):
-        chrome_options = Options()
-        if not self.animation:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-images")
-        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.page_load_strategy = 'none'
-        service = Service(self.chromedriver_path)
-        return webdriver.Chrome(service=service, options=chrome_options)
+        self.pool_size = pool_size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.shared_pool = shared_pool
+        self._driver_pool = None
+        self._driver_pool_lock = threading.Lock()
+        self.params = SEARCH_PARAMS
+        if backend == "selenium":
+            self.backend = None
+        elif backend == "http":
+            self.backend = HttpSearchBackend()
+        elif isinstance(backend, SearchBackend):
+            self.backend = backend
+        else:
+            raise ValueError(f"Unknown search backend: {backend!r}, expected 'selenium', 'http' or a SearchBackend")
+
+    @property
+    def driver_pool(self) -> ChromeDriverPool:
+        with self._driver_pool_lock:
+            if self._driver_pool is not None:
+                return self._driver_pool
+            pool_kwargs = dict(pool_size=self.pool_size,
+                               max_size=max(self.pool_size, self.max_workers),
+                               max_pages_per_driver=self.max_pages_per_driver)
+            if self.shared_pool:
+                self._driver_pool = ChromeDriverPool.get_pool(chromedriver_path=self.chromedriver_path,
+                                                              animation=self.animation,
+                                                              **pool_kwargs)
+            else:
+                self._driver_pool = ChromeDriverPool(chromedriver_path=self.chromedriver_path,
+                                                     animation=self.animation,
+                                                     **pool_kwargs)
+        return self._driver_pool
 
     def _get_driver(self):
-        if not self.driver_pool:
-            return self._setup_driver()
-        return self.driver_pool.pop()
+        return self.driver_pool.acquire()
 
-    def _return_driver(self, driver):
-        self.driver_pool.append(driver)
+    def _return_driver(self, driver, crashed=False):
+        self.driver_pool.release(driver, crashed=crashed)
 
     def cleanup(self):
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        # Shared pools outlive the searcher and are shut down at interpreter exit.
+        if not self.shared_pool and self._driver_pool is not None:
+            self._driver_pool.shutdown()
+            self._driver_pool = None
 
     def __enter__(self):
         return self
@@ -72,13 +85,16 @@ class OptimizedMultiQuerySearcher:
     def search_single_query(self, query, num_results=10,
                             search_provider="google"
                             ):
+        if self.backend is not None:
+            return self.backend.search_single_query(query, num_results, search_provider)
         driver = self._get_driver()
+        crashed = False
         try:
             encoded_query = quote_plus(query)
             search_url = f"https://www.{search_provider}.com/search?q={encoded_query}"
             driver.get(search_url)
 
-            WebDriverWait(driver, 5).until(
+            WebDriverWait(driver, self.wait_timeout).until(
                 EC.presence_of_element_located((By.ID, self.params[search_provider]["search"]))
             )
             urls,search_results = self.javascript_based(search_provider=search_provider,
@@ -95,16 +111,26 @@ class OptimizedMultiQuerySearcher:
             )
         except Exception as e:
             logger.error(f"An error occurred while searching '{query}': {str(e)}")
+            crashed = not isinstance(e, TimeoutException)
             return SearchResult(query=query)
         finally:
-            self._return_driver(driver)
+            self._return_driver(driver, crashed=crashed)
+
+    async def asearch_single_query(self, query, num_results=10, search_provider="google") -> SearchResult:
+        if self.backend is not None:
+            return await self.backend.asearch_single_query(query, num_results, search_provider)
+        return await super().asearch_single_query(query, num_results, search_provider)
 
     async def search_multiple_queries(self, queries: List[str], num_results=10,
                                       search_provider=None,return_only_urls = False
                                       ) -> List[SearchResult]:
+        providers_list = self.params.keys() if search_provider is None else [search_provider]
+        if isinstance(self.backend, HttpSearchBackend):
+            result = await self.backend.asearch_multiple_queries(queries, num_results=num_results,
+                                                                 providers=list(providers_list))
+            return self._collect_results(result, return_only_urls)
         loop = asyncio.get_event_loop()
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            providers_list = self.params.keys() if search_provider is None else [search_provider]
             tasks= [
                 loop.run_in_executor(
                     executor,
@@ -116,15 +142,15 @@ class OptimizedMultiQuerySearcher:
                 for query in queries for provider in providers_list
             ]
             result = await asyncio.gather(*tasks)
-            if return_only_urls:
-                all_urls = [url.urls for url in result]
-                filtered_urls = [y for x in zip(*all_urls) for y in x]
-                return filtered_urls
-            return result
-
-    # def __del__(self):
-    #     for driver in self.driver_pool:
-    #         driver.quit()
+            return self._collect_results(result, return_only_urls)
+
+    @staticmethod
+    def _collect_results(result, return_only_urls=False):
+        if return_only_urls:
+            all_urls = [url.urls for url in result]
+            filtered_urls = [y for x in zip(*all_urls) for y in x]
+            return filtered_urls
+        return result
 
     def javascript_based(self, driver=None, search_provider=None, num_results=None):
         script = """
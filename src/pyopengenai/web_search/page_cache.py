@@ -0,0 +1,244 @@
+import asyncio
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import aiohttp
+
+
+class CachedPage:
+    def __init__(self, url, content_hash, etag, last_modified, encoding, fetched_at):
+        self.url = url
+        self.content_hash = content_hash
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encoding = encoding
+        self.fetched_at = fetched_at
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Content-addressed on-disk cache of fetched pages and their extracted text.
+
+    Raw bodies are stored under their sha256, extracted text under
+    ``<sha256>.<kind>`` so identical content reached through different URLs is
+    stored and extracted once. Pages younger than ``ttl`` are served without
+    touching the network; older ones are revalidated with a conditional GET
+    (ETag / Last-Modified). Pages older than ``max_age`` are dropped and the
+    blob store is kept under ``max_bytes`` by evicting least recently used content.
+    Both sweeps run each time ``sweep_bytes`` (default ``max_bytes // 16``) have been
+    written, so the store can overshoot ``max_bytes`` by that much in between.
+    :meth:`fetch_text` does its SQLite and file I/O on the loop's default executor.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, cache_dir="~/.cache/pyopengenai/pages", ttl=24 * 60 * 60,
+                 max_age=7 * 24 * 60 * 60, max_bytes=512 * 1024 * 1024, sweep_bytes=None):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.sweep_bytes = max_bytes // 16 if sweep_bytes is None else sweep_bytes
+        self._unswept_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY, content_hash TEXT, etag TEXT, last_modified TEXT,
+                encoding TEXT, fetched_at REAL);
+            CREATE TABLE IF NOT EXISTS blobs (
+                key TEXT PRIMARY KEY, content_hash TEXT, size INTEGER, accessed_at REAL);
+            CREATE INDEX IF NOT EXISTS blobs_content_hash ON blobs(content_hash);
+        """)
+        self._db.commit()
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @staticmethod
+    def content_hash(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    def _blob_path(self, key) -> Path:
+        return self.blob_dir / key[:2] / key
+
+    def _write_blob(self, key, content_hash, data: bytes, now):
+        path = self._blob_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        self._unswept_bytes += len(data)
+        self._db.execute("INSERT OR REPLACE INTO blobs (key, content_hash, size, accessed_at) VALUES (?, ?, ?, ?)",
+                         (key, content_hash, len(data), now))
+
+    def _read_blob(self, key):
+        try:
+            data = self._blob_path(key).read_bytes()
+        except FileNotFoundError:
+            self._db.execute("DELETE FROM blobs WHERE key = ?", (key,))
+            return None
+        self._db.execute("UPDATE blobs SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return data
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT content_hash, etag, last_modified, encoding, fetched_at "
+                                   "FROM pages WHERE url = ?", (url,)).fetchone()
+        # Expired pages may outlive max_age until the next sweep; never serve them.
+        if row is None or (self.max_age is not None and time.time() - row[-1] > self.max_age):
+            return None
+        return CachedPage(url, *row)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at <= self.ttl
+
+    def get_body(self, content_hash):
+        with self._lock:
+            body = self._read_blob(content_hash)
+            self._db.commit()
+            return body
+
+    def get_text(self, content_hash, kind):
+        with self._lock:
+            data = self._read_blob(f"{content_hash}.{kind}")
+            self._db.commit()
+        return None if data is None else data.decode("utf-8")
+
+    def store(self, url, body: bytes, etag=None, last_modified=None, encoding=None) -> str:
+        content_hash = self.content_hash(body)
+        now = time.time()
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM blobs WHERE key = ?", (content_hash,)).fetchone()
+            if exists is None or not self._blob_path(content_hash).exists():
+                self._write_blob(content_hash, content_hash, body, now)
+            self._db.execute("INSERT OR REPLACE INTO pages (url, content_hash, etag, last_modified, encoding, fetched_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", (url, content_hash, etag, last_modified, encoding, now))
+            if self._unswept_bytes >= self.sweep_bytes:
+                self._evict(now)
+                self._unswept_bytes = 0
+            self._db.commit()
+        return content_hash
+
+    def store_text(self, content_hash, kind, text: str):
+        with self._lock:
+            self._write_blob(f"{content_hash}.{kind}", content_hash, text.encode("utf-8"), time.time())
+            self._db.commit()
+
+    def touch(self, url):
+        with self._lock:
+            self._db.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def forget(self, url):
+        with self._lock:
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._db.commit()
+
+    def _evict(self, now):
+        if self.max_age is not None:
+            self._db.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.max_age,))
+            orphans = self._db.execute("SELECT DISTINCT content_hash FROM blobs WHERE content_hash NOT IN "
+                                       "(SELECT content_hash FROM pages)").fetchall()
+            for (content_hash,) in orphans:
+                self._drop_content(content_hash)
+
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        if total <= self.max_bytes:
+            return
+        groups = self._db.execute("SELECT content_hash, SUM(size) FROM blobs GROUP BY content_hash "
+                                  "ORDER BY MAX(accessed_at) ASC").fetchall()
+        for content_hash, size in groups:
+            if total <= self.max_bytes:
+                break
+            self._drop_content(content_hash)
+            self._db.execute("DELETE FROM pages WHERE content_hash = ?", (content_hash,))
+            total -= size
+
+    def _drop_content(self, content_hash):
+        keys = self._db.execute("SELECT key FROM blobs WHERE content_hash = ?", (content_hash,)).fetchall()
+        for (key,) in keys:
+            self._blob_path(key).unlink(missing_ok=True)
+        self._db.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+
+    async def fetch_text(self, session: aiohttp.ClientSession, url, kind, extract, timeout=None) -> str:
+        """Return extracted text for ``url``, hitting the network only when needed.
+
+        ``extract`` is an async callable ``(body: bytes, encoding: str) -> str``.
+        Non-200/304 responses return ``""`` and are not cached.
+        """
+        loop = asyncio.get_running_loop()
+        page = await loop.run_in_executor(None, self.lookup, url)
+        if page is not None and self.is_fresh(page):
+            text = await loop.run_in_executor(None, self.get_text, page.content_hash, kind)
+            if text is not None:
+                with self._stats_lock:
+                    self.hits += 1
+                return text
+
+        headers = page.conditional_headers() if page is not None else {}
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status == 304 and page is not None:
+                with self._stats_lock:
+                    self.revalidated += 1
+                await loop.run_in_executor(None, self.touch, url)
+                content_hash, encoding = page.content_hash, page.encoding
+                body = None
+            elif response.status == 200:
+                with self._stats_lock:
+                    self.misses += 1
+                body = await response.read()
+                encoding = None if kind.startswith("pdf") else response.get_encoding()
+                store = functools.partial(self.store, url, body, etag=response.headers.get("ETag"),
+                                          last_modified=response.headers.get("Last-Modified"),
+                                          encoding=encoding)
+                content_hash = await loop.run_in_executor(None, store)
+            else:
+                return ""
+
+        text = await loop.run_in_executor(None, self.get_text, content_hash, kind)
+        if text is not None:
+            return text
+        if body is None:
+            body = await loop.run_in_executor(None, self.get_body, content_hash)
+            if body is None:
+                # Revalidated but the body was evicted meanwhile; refetch unconditionally.
+                await loop.run_in_executor(None, self.forget, url)
+                return await self.fetch_text(session, url, kind, extract, timeout)
+        text = await extract(body, encoding or "utf-8")
+        await loop.run_in_executor(None, self.store_text, content_hash, kind, text or "")
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            (pages,) = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()
+            (size,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        with self._stats_lock:
+            return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                    "pages": pages, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
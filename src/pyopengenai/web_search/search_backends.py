@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import List
+from urllib.parse import quote_plus, urljoin, urlparse, parse_qs
+
+import aiohttp
+from bs4 import BeautifulSoup
+from pydantic import BaseModel
+
+from .http_client import SharedHttpClient
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PARAMS = {
+    "bing": {"search": "b_results", "find_element": ".b_algo", "head_selector": "h2"},
+    "google": {"search": "search", "find_element": "div.g", "head_selector": "h3"}
+}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/128.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class SearchResult(BaseModel):
+    query: str
+    title_and_links: list = []
+    urls: list = []
+    search_provider: str  = ""
+    page_source:str = ""
+
+
+class SearchBackend(ABC):
+    params = SEARCH_PARAMS
+
+    @abstractmethod
+    def search_single_query(self, query, num_results=10, search_provider="google") -> SearchResult:
+        pass
+
+    async def asearch_single_query(self, query, num_results=10, search_provider="google") -> SearchResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.search_single_query, query, num_results, search_provider)
+
+
+class HttpSearchBackend(SearchBackend):
+    """Fetches the results page over plain HTTP and parses it in Python, no browser involved."""
+
+    def __init__(self, search_url_template="https://www.{search_provider}.com/search?q={query}",
+                 headers=None, timeout=10, max_concurrency=64):
+        self.search_url_template = search_url_template
+        self.headers = headers or DEFAULT_HEADERS
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+
+    def search_single_query(self, query, num_results=10, search_provider="google") -> SearchResult:
+        return SharedHttpClient.run(self.asearch_single_query(query, num_results, search_provider))
+
+    async def asearch_single_query(self, query, num_results=10, search_provider="google",
+                                   session=None) -> SearchResult:
+        if session is None:
+            session = await SharedHttpClient.get_session()
+
+        search_url = self.search_url_template.format(search_provider=search_provider,
+                                                     query=quote_plus(query))
+        try:
+            async with session.get(search_url, headers=self.headers,
+                                   timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status != 200:
+                    logger.error(f"Search '{query}' on {search_provider} returned HTTP {response.status}")
+                    return SearchResult(query=query, search_provider=search_provider)
+                html = await response.text()
+        except Exception as e:
+            logger.error(f"An error occurred while searching '{query}': {str(e)}")
+            return SearchResult(query=query, search_provider=search_provider)
+
+        search_results = self.parse_results(html, search_url, search_provider, num_results)
+        return SearchResult(
+            query=query,
+            title_and_links=search_results,
+            urls=[x['link'] for x in search_results],
+            search_provider=search_provider,
+            page_source=html
+        )
+
+    async def asearch_multiple_queries(self, queries: List[str], num_results=10,
+                                       providers=("google",)) -> List[SearchResult]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(session, query, provider):
+            async with semaphore:
+                return await self.asearch_single_query(query, num_results, provider, session)
+
+        session = await SharedHttpClient.get_session()
+        tasks = [bounded(session, query, provider) for query in queries for provider in providers]
+        return await asyncio.gather(*tasks)
+
+    def parse_results(self, html, base_url, search_provider, num_results):
+        params = self.params[search_provider]
+        soup = BeautifulSoup(html, 'html.parser')
+        results = []
+        for element in soup.select(params["find_element"]):
+            if len(results) >= num_results:
+                break
+            title_element = element.select_one(params["head_selector"])
+            link_element = element.select_one('a[href]')
+            if title_element is None or link_element is None:
+                continue
+            link = self._clean_link(link_element['href'], base_url)
+            if link:
+                results.append({"title": title_element.get_text(), "link": link})
+        return results
+
+    @staticmethod
+    def _clean_link(href, base_url):
+        link = urljoin(base_url, href)
+        parsed = urlparse(link)
+        # Non-JS Google result pages wrap targets as /url?q=<target>&...
+        if parsed.path == "/url":
+            target = parse_qs(parsed.query).get("q") or parse_qs(parsed.query).get("url")
+            link = target[0] if target else ""
+        if not link.startswith(("http://", "https://")):
+            return ""
+        return link
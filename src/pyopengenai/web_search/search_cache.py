@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class SearchResultCache:
+    """Two-tier cache of search result URLs keyed on (normalized query, provider, num_results).
+
+    The in-memory tier is an LRU bounded by ``max_entries``; the optional SQLite tier
+    (``db_path``) survives restarts and is bounded by ``max_db_entries``. Entries older
+    than ``ttl`` seconds are treated as misses in both tiers.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_entries=1024, ttl=6 * 60 * 60, db_path=None, max_db_entries=100_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_db_entries = max_db_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._db = None
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS serp_cache ("
+                             "key TEXT PRIMARY KEY, urls TEXT, created_at REAL, accessed_at REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS serp_cache_accessed ON serp_cache(accessed_at)")
+            self._db.commit()
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def make_key(self, query, search_provider, num_results) -> str:
+        return f"{search_provider}|{num_results}|{self.normalize_query(query)}"
+
+    def _expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, query, search_provider="google", num_results=10):
+        key = self.make_key(query, search_provider, num_results)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, urls = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return list(urls)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT urls, created_at FROM serp_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    urls, created_at = json.loads(row[0]), row[1]
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE serp_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created_at, urls)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return list(urls)
+                    self._db.execute("DELETE FROM serp_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, query, urls, search_provider="google", num_results=10):
+        key = self.make_key(query, search_provider, num_results)
+        now = time.time()
+        urls = list(urls)
+        with self._lock:
+            self._remember(key, now, urls)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO serp_cache (key, urls, created_at, accessed_at) "
+                                 "VALUES (?, ?, ?, ?)", (key, json.dumps(urls), now, now))
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key, created_at, urls):
+        self._memory[key] = (created_at, urls)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM serp_cache WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM serp_cache").fetchone()
+        if count > self.max_db_entries:
+            self._db.execute("DELETE FROM serp_cache WHERE key IN ("
+                             "SELECT key FROM serp_cache ORDER BY accessed_at ASC, rowid ASC LIMIT ?)",
+                             (count - self.max_db_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM serp_cache")
+                self._db.commit()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "memory_entries": len(self._memory)}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,55 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from pyopengenai.retrieval.model_registry import ModelRegistry
+
+
+def _make_pdf(page_texts) -> bytes:
+    """A minimal PDF with one line of Helvetica text per page."""
+    n = len(page_texts)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n))
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {5 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class HashingModel:
+    def __init__(self, dim=128):
+        self.embedding = np.eye(dim, dtype=np.float32)
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.embedding.shape[0]), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.strip(".").encode()) % len(vectors[row])] += 1
+        return vectors
+
+
+@pytest.fixture
+def fake_wordllama(monkeypatch):
+    monkeypatch.setitem(ModelRegistry._loaders, "wordllama", HashingModel)
+    ModelRegistry.unload("wordllama")
+    yield
+    ModelRegistry.unload("wordllama")
+
+
+@pytest.fixture
+def make_pdf():
+    return _make_pdf
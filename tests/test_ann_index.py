@@ -0,0 +1,70 @@
+import numpy as np
+
+from pyopengenai.retrieval.ann_index import IVFFlatIndex, normalize_rows, top_k_indices
+
+
+def clustered(n, dim=32, n_centers=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.normal(size=(n_centers, dim)))
+    return normalize_rows(centers[rng.integers(0, n_centers, n)] + 0.6 / np.sqrt(dim) * rng.normal(size=(n, dim)))
+
+
+def exact(data, query, k):
+    return top_k_indices(data @ query, k)
+
+
+def test_top_k_indices_matches_full_sort():
+    scores = np.random.default_rng(1).normal(size=1000)
+    assert list(top_k_indices(scores, 7)) == list(np.argsort(-scores)[:7])
+    assert len(top_k_indices(scores[:3], 10)) == 3
+
+
+def test_small_index_is_exact():
+    data = clustered(500)
+    index = IVFFlatIndex.build(data)
+    assert index.is_exact
+    ids, scores = index.search(data[3], k=5)
+    assert list(ids) == list(exact(data, data[3], 5))
+    assert ids[0] == 3 and np.isclose(scores[0], 1.0)
+
+
+def test_ivf_recall_and_full_probe_is_exact():
+    data = clustered(4000)
+    queries = data[:50]
+    index = IVFFlatIndex.build(data, exact_threshold=1000, n_lists=40)
+    assert not index.is_exact
+    recall = np.mean([len(set(index.search(q, 10, nprobe=4)[0]) & set(exact(data, q, 10))) / 10
+                      for q in queries])
+    assert recall > 0.9
+    for q in queries[:5]:
+        assert set(index.search(q, 10, nprobe=40)[0]) == set(exact(data, q, 10))
+
+
+def test_incremental_add_and_save_load(tmp_path):
+    data = clustered(3000)
+    index = IVFFlatIndex.build(data[:2000], exact_threshold=1000, n_lists=20)
+    index.add(data[2000:])
+    assert len(index) == 3000
+    index.save(tmp_path / "ann")
+    loaded = IVFFlatIndex.load(tmp_path / "ann")
+    for q in data[2990:]:
+        assert list(loaded.search(q, 5)[0]) == list(index.search(q, 5)[0])
+    assert loaded.search(data[2999], 1)[0][0] == 2999
+
+
+def test_small_adds_regroup_and_retrain(tmp_path):
+    data = clustered(6000)
+    index = IVFFlatIndex(exact_threshold=500, retrain_factor=4)
+    for start in range(0, len(data), 50):
+        index.add(data[start:start + 50])
+    assert len(index) == 6000
+    # Trained at 500 vectors, then retrained on all of them once there were 4x as many.
+    assert index._trained_size == 2000 and len(index.centroids) == int(np.sqrt(2000))
+    for q in data[::997]:
+        assert set(index.search(q, 10, nprobe=len(index.centroids))[0]) == set(exact(data, q, 10))
+    assert index.search(data[5999], 1)[0][0] == 5999
+
+    index.save(tmp_path / "ann")
+    loaded = IVFFlatIndex.load(tmp_path / "ann")
+    loaded.add(data[:10])
+    assert len(loaded) == 6010 and loaded.search(data[3], 2)[0].tolist() in ([3, 6003], [6003, 3])
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from pyopengenai.retrieval.chunking import Span, SpanChunker
+
+
+def sample_text(n=20_000, seed=0):
+    rng = random.Random(seed)
+    words = ["search", "page", "crawl", "é", "漢字", "index", "https://example.com/a.b", "3.14"]
+    paragraphs = []
+    while sum(map(len, paragraphs)) < n:
+        sentences = (" ".join(rng.choice(words) for _ in range(rng.randint(1, 40))) + rng.choice(".!?")
+                     for _ in range(rng.randint(1, 8)))
+        paragraphs.append(rng.choice([" ", "\n"]).join(sentences))
+    return "\n\n".join(paragraphs) + "\n" + "x" * 700
+
+
+@pytest.mark.parametrize("chunker", [
+    SpanChunker(100, 20),
+    SpanChunker(250, 0),
+    SpanChunker(60, 10, unit="tokens"),
+    SpanChunker(40, 8, unit="tokens", tokenizer=lambda text: len(text.split())),
+], ids=["chars", "no-overlap", "token-estimate", "tokenizer"])
+def test_spans_fit_and_cover_the_text(chunker):
+    text = sample_text()
+    spans = chunker.spans(text, doc_id=3)
+    covered = bytearray(len(text))
+    for span in spans:
+        chunk = SpanChunker.text_of(span, {3: text})
+        assert span.doc_id == 3 and chunk == chunk.strip() and chunk
+        assert chunker.length(chunk) <= chunker.chunk_size
+        covered[span.start:span.end] = b"\1" * (span.end - span.start)
+    assert all(covered[i] or text[i].isspace() for i in range(len(text)))
+    assert all(a.start < b.start for a, b in zip(spans, spans[1:]))
+
+
+def test_prefers_paragraphs_then_sentences():
+    text = "First paragraph here.\n\nSecond one is a bit longer. It has two sentences."
+    assert SpanChunker(40, 0).split_text(text) == [
+        "First paragraph here.", "Second one is a bit longer.", "It has two sentences."]
+    # Overlap repeats the whole trailing pieces that fit in it, not partial ones.
+    assert SpanChunker(60, 30).split_text("Aa bb. Cc dd. Ee ff. " * 5)[1].startswith("Cc dd. Ee ff.")
+
+
+def test_many_documents():
+    texts = ["one. two.", "", "three four five"]
+    chunker = SpanChunker(9, 0)
+    spans = list(chunker.iter_spans(texts))
+    assert spans == [Span(0, 0, 9), Span(2, 0, 5), Span(2, 6, 15)]
+    assert chunker.split_texts(texts) == ["one. two.", "three", "four five"]
+    with pytest.raises(ValueError):
+        SpanChunker(10, 10)
@@ -0,0 +1,37 @@
+import asyncio
+
+from pyopengenai.deadline import Deadline
+
+
+def test_unbounded_deadline_never_truncates():
+    deadline = Deadline.coerce(None)
+    assert not deadline.bounded and not deadline.expired
+    assert deadline.budget(share=0.5, cap=3) == 3
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    assert asyncio.run(deadline.run(work(), "search")) == "done"
+    assert deadline.truncated_stages == []
+
+
+def test_slow_stage_falls_back_and_is_recorded():
+    deadline = Deadline(0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "late"
+
+    assert asyncio.run(deadline.run(slow(), "refine", fallback="query")) == "query"
+    assert deadline.truncated_stages == ["refine"]
+
+
+def test_child_shares_truncations_and_leaves_budget():
+    deadline = Deadline(10)
+    child = deadline.child(share=0.5)
+    assert child.remaining() <= 5.0 < deadline.remaining()
+    child.truncate("fetch")
+    child.truncate("fetch")
+    assert deadline.truncated_stages == ["fetch"]
+    assert Deadline.coerce(deadline) is deadline
@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+import pytest
+
+from pyopengenai.retrieval.dedup import DedupStats, NearDuplicateFilter, minhash_signatures
+
+
+def corpus(n=300, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(2000)]
+    originals = [" ".join(rng.choice(vocabulary) for _ in range(60)) for _ in range(n)]
+    copies = []
+    for text in originals[:n // 3]:
+        # Syndicated copy: one word changed and different casing and punctuation.
+        words = text.split()
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        copies.append(" ".join(words).upper() + "!")
+    return originals, copies
+
+
+@pytest.mark.parametrize("method", NearDuplicateFilter.METHODS)
+def test_copies_point_to_their_original(method):
+    originals, copies = corpus()
+    dedup = NearDuplicateFilter(0.8, method=method)
+    representatives = dedup.representatives(originals + copies)
+    assert np.array_equal(representatives[:len(originals)], np.arange(len(originals)))
+    caught = representatives[len(originals):] == np.arange(len(copies))
+    assert caught.mean() > 0.9
+    assert dedup.stats == DedupStats(len(originals) + len(copies), len(originals) + int((~caught).sum()),
+                                     int(caught.sum()))
+    assert dedup.filter(originals + copies)[:len(originals)] == originals
+
+
+def test_signature_agreement_tracks_jaccard():
+    words = [f"w{i}" for i in range(200)]
+    half = words[:100] + [f"x{i}" for i in range(100)]
+    signatures = minhash_signatures([" ".join(words), " ".join(half)], num_perm=256)
+    # 98 of the 198 + 198 - 98 distinct 3-word shingles are shared.
+    assert abs(np.mean(signatures[0] == signatures[1]) - 98 / 298) < 0.08
+
+
+def test_edge_cases():
+    dedup = NearDuplicateFilter()
+    assert dedup.filter([]) == [] and dedup.stats == DedupStats(0, 0, 0)
+    assert dedup.filter(["", "a", "", "A.", "b"]) == ["", "a", "b"]
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(method="exact")
+
+
+@pytest.mark.parametrize("method", NearDuplicateFilter.METHODS)
+def test_wordless_texts_keep_their_own_shingle(method):
+    dedup = NearDuplicateFilter(method=method)
+    # Last text without word characters: its single shingle must not run past the end.
+    texts = ["Prices rose sharply in 2024.", "See the table below:", "***"]
+    assert dedup.filter(texts) == texts
+    assert dedup.filter(["a b c", ""]) == ["a b c", ""]
+    # In the middle, it must not borrow the next text's first word and match a one-word text.
+    assert dedup.filter(["x y z", "", "q", "***", "q!"]) == ["x y z", "", "q"]
+    assert dedup.stats == DedupStats(5, 3, 2)
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from pyopengenai.web_search.driver_pool import ChromeDriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.crashed = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise RuntimeError("chrome not reachable")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeFactory:
+    def __init__(self, started=None):
+        self.drivers = []
+        self.started = started
+
+    def __call__(self):
+        if self.started is not None:
+            self.started.wait()
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+
+def _wait_for(pool, idle):
+    deadline = time.monotonic() + 2
+    while pool.stats()["idle"] != idle:
+        assert time.monotonic() < deadline, pool.stats()
+        time.sleep(0.005)
+
+
+def test_checkout_and_release_reuse_prewarmed_drivers():
+    factory = FakeFactory()
+    pool = ChromeDriverPool(pool_size=2, driver_factory=factory)
+    _wait_for(pool, idle=2)
+    first, second = pool.acquire(), pool.acquire()
+    assert {first.driver, second.driver} == set(factory.drivers)
+    pool.release(first)
+    assert pool.acquire() is first and first.pages_served == 1
+    pool.release(first)
+    pool.release(second)
+    pool.shutdown()
+    assert all(driver.quit_called for driver in factory.drivers)
+    with pytest.raises(RuntimeError, match="shut down"):
+        pool.acquire()
+
+
+def test_crashed_and_unhealthy_drivers_are_replaced():
+    factory = FakeFactory()
+    pool = ChromeDriverPool(pool_size=2, driver_factory=factory)
+    _wait_for(pool, idle=2)
+    driver = pool.acquire()
+    pool.release(driver, crashed=True)
+    assert driver.driver.quit_called
+    _wait_for(pool, idle=2)
+    assert len(factory.drivers) == 3 and pool.stats()["alive"] == 2
+
+    for pooled in list(pool._idle):
+        pooled.driver.crashed = True
+    fresh = pool.acquire()
+    assert fresh.driver is factory.drivers[-1] and not fresh.driver.crashed
+    assert all(d.quit_called for d in factory.drivers[1:3])
+    pool.shutdown()
+
+
+def test_checkout_waits_at_max_size():
+    pool = ChromeDriverPool(pool_size=1, max_size=2, checkout_timeout=0.05, driver_factory=FakeFactory())
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    assert pool.stats()["alive"] == 2
+
+    threading.Timer(0.01, pool.release, args=(held[0],)).start()
+    pool.checkout_timeout = 1
+    assert pool.acquire() is held[0]
+    pool.shutdown()
+
+
+def test_prewarm_does_not_block_pool_creation():
+    started = threading.Event()
+    factory = FakeFactory(started)
+    pool = ChromeDriverPool.get_pool(chromedriver_path="fake", pool_size=2, driver_factory=factory)
+    # Returned while the factory is still blocked starting drivers on the prewarm thread.
+    assert not started.is_set() and pool.stats()["idle"] == 0
+    assert ChromeDriverPool.get_pool(chromedriver_path="fake") is pool
+    started.set()
+    _wait_for(pool, idle=2)
+    ChromeDriverPool.shutdown_all()
+    assert all(driver.quit_called for driver in factory.drivers)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from pyopengenai.retrieval.embedding_cache import EmbeddingCache, _DiskTier
+
+
+class CountingEmbedder:
+    def __init__(self, dim=8, dtype=np.float64):
+        self.dim = dim
+        self.dtype = dtype
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        seeds = [sum(map(ord, text)) for text in texts]
+        vectors = np.stack([np.random.default_rng(seed).normal(size=self.dim) for seed in seeds])
+        if self.dtype == np.uint64:
+            return np.packbits(vectors > 0, axis=1).view(np.uint64)
+        return vectors.astype(self.dtype)
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = EmbeddingCache(max_memory_items=2)
+    embed = CountingEmbedder()
+    first = cache.embed(["a", "b", "a"], embed, "m")
+    assert first.dtype == np.float32 and first.shape == (3, 8)
+    assert np.array_equal(first[0], first[2])
+    assert embed.calls == [["a", "b"]]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    cache.embed(["c"], embed, "m")  # evicts "a", the least recently used
+    cache.embed(["b", "a"], embed, "m")
+    assert embed.calls[-1] == ["a"]
+    assert cache.stats()["memory_items"] == 2
+    # Another model id never shares entries.
+    cache.embed(["b"], embed, "other")
+    assert embed.calls[-1] == ["b"]
+
+
+def test_disk_round_trip_and_reopen(tmp_path):
+    embed = CountingEmbedder()
+    vectors = EmbeddingCache(tmp_path).embed(["x", "y"], embed, "model/v1")
+
+    reopened = EmbeddingCache(tmp_path)
+    again = reopened.embed(["y", "x", "z"], embed, "model/v1")
+    assert embed.calls == [["x", "y"], ["z"]]
+    assert np.allclose(again[:2], vectors[::-1], atol=1e-2)
+    assert reopened.stats()["hits"] == 2
+
+
+def test_binary_embeddings_keep_their_dtype(tmp_path):
+    embed = CountingEmbedder(dim=128, dtype=np.uint64)
+    vectors = EmbeddingCache(tmp_path).embed(["x", "y"], embed, "binary")
+    assert vectors.dtype == np.uint64
+    assert np.array_equal(vectors, embed(["x", "y"]))
+    assert np.array_equal(EmbeddingCache(tmp_path).embed(["x", "y"], embed, "binary"), vectors)
+
+
+def test_disk_tiers_sharing_a_directory_agree_on_rows(tmp_path):
+    # Two handles stand in for two processes appending to the same store.
+    first, second = _DiskTier(tmp_path), _DiskTier(tmp_path)
+    first.add(["a", "b"], np.array([[1, 1], [2, 2]], dtype=np.float32))
+    second.add(["c", "a"], np.array([[3, 3], [9, 9]], dtype=np.float32))
+    first.add(["d"], np.array([[4, 4]], dtype=np.float32))
+    for tier in (first, second, _DiskTier(tmp_path)):
+        found = tier.get(["a", "b", "c", "d"])
+        assert {key: vector[0] for key, vector in found.items()} == {"a": 1, "b": 2, "c": 3, "d": 4}
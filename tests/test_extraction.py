@@ -0,0 +1,35 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from pyopengenai.web_search.extraction import ExtractionExecutor, extract_trafilatura_text
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return [p.read_text(encoding="utf-8") for p in sorted(FIXTURES.glob("article_*.html"))]
+
+
+def test_process_workers_extract_the_same_text_as_threads(pages):
+    process = ExtractionExecutor(mode="process", max_workers=2)
+    thread = ExtractionExecutor(mode="thread", max_workers=2)
+    try:
+        expected = thread.map(extract_trafilatura_text, pages)
+        assert all(expected) and process.map(extract_trafilatura_text, pages) == expected
+        assert process._executor._mp_context.get_start_method() != "fork"
+
+        async def run_all(executor):
+            return await asyncio.gather(*[executor.run(extract_trafilatura_text, html) for html in pages])
+
+        assert asyncio.run(run_all(process)) == expected
+    finally:
+        process.shutdown()
+        thread.shutdown()
+
+
+def test_library_default_does_not_start_processes():
+    # Process workers re-import the caller's __main__; only callers that guard it should opt in.
+    assert ExtractionExecutor().mode == ExtractionExecutor.get().mode == "thread"
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from pyopengenai.query_master.heirarchical_tree import HierarchicalSentenceTree
+
+
+def corpus(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = [[f"t{t}w{i}" for i in range(12)] for t in range(8)]
+    return [" ".join(rng.choice(topics[i % 8], 6)) + "." for i in range(n)]
+
+
+def test_flat_layout_is_consistent(fake_wordllama):
+    sentences = corpus()
+    tree = HierarchicalSentenceTree(sentences, max_depth=4)
+    leaves = tree.leaf_sentence[tree.leaf_sentence >= 0]
+    assert sorted(leaves.tolist()) == list(range(len(sentences)))
+    assert tree.child_offsets[0] == 1 and tree.child_offsets[-1] == tree.n_nodes
+    assert np.all(np.diff(tree.child_offsets) >= 0)
+    assert np.allclose(np.linalg.norm(tree.unit, axis=1), 1, atol=1e-5)
+
+
+def test_search_finds_exact_sentence_and_batch_matches(fake_wordllama):
+    sentences = corpus()
+    tree = HierarchicalSentenceTree(sentences)
+    results = tree.top_k_with_scores(sentences[17], k=5)
+    assert results[0][0] == sentences[17] and results[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert [s for _, s in results] == sorted((s for _, s in results), reverse=True)
+
+    queries = sentences[:20]
+    single = [sorted(s for _, s in tree.top_k_with_scores(q, 5)) for q in queries]
+    batched = tree.search_tree_batch(tree.wl.embed(queries), k=5)
+    assert all(np.allclose(a, sorted(s for _, s in b), atol=1e-5) for a, b in zip(single, batched))
+
+
+def test_empty_tree(fake_wordllama):
+    tree = HierarchicalSentenceTree([])
+    assert tree.top_k("anything") == []
+    assert tree.top_k_batch(["a", "b"]) == [[], []]
+
+
+def test_save_load_roundtrip(fake_wordllama, tmp_path):
+    sentences = corpus()
+    tree = HierarchicalSentenceTree(sentences)
+    tree.save(tmp_path / "tree")
+
+    loaded = HierarchicalSentenceTree.load(tmp_path / "tree", text_or_chunks=sentences)
+    assert isinstance(loaded.unit, np.memmap)
+    for query in sentences[:10]:
+        assert loaded.top_k_with_scores(query, 5) == tree.top_k_with_scores(query, 5)
+
+    with pytest.raises(ValueError, match="different corpus"):
+        HierarchicalSentenceTree.load(tmp_path / "tree", text_or_chunks=sentences[:-1])
+
+
+def test_load_or_build_rebuilds_on_corpus_change(fake_wordllama, tmp_path):
+    sentences = corpus()
+    first = HierarchicalSentenceTree.load_or_build(sentences, tmp_path / "tree")
+    again = HierarchicalSentenceTree.load_or_build(sentences, tmp_path / "tree")
+    assert isinstance(again.unit, np.memmap) and again.n_nodes == first.n_nodes
+
+    changed = HierarchicalSentenceTree.load_or_build(sentences + ["t0w1 t0w2 new."], tmp_path / "tree")
+    assert len(changed.sentences) == len(sentences) + 1
+    assert HierarchicalSentenceTree.load(tmp_path / "tree").sentences == changed.sentences
+
+
+def test_add_inserts_without_rebuild(fake_wordllama):
+    sentences = corpus(600)
+    tree = HierarchicalSentenceTree(sentences[:300], max_depth=4)
+    assert tree.add(sentences[300:]) == 300
+    assert tree.add([]) == 0
+
+    leaves = tree.leaf_sentence[tree.leaf_sentence >= 0]
+    assert sorted(leaves.tolist()) == list(range(600)) and tree.sentences == sentences
+    assert tree.child_offsets[0] == 1 and tree.child_offsets[-1] == tree.n_nodes
+    embeddings = tree.wl.embed(sentences)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    assert np.allclose(tree.unit[0] * tree.norms[0], embeddings.mean(axis=0), atol=1e-4)
+
+    children, _, counts, leaf_sentence, depth = tree._editable_tree()
+    assert counts[0] == 600
+    assert all(len(kids) <= tree.split_threshold or depth[node] >= tree.max_depth
+               for node, kids in enumerate(children) if kids and leaf_sentence[kids[0]] >= 0)
+    results = tree.top_k_with_scores(sentences[450], k=3)
+    assert results[0][0] == sentences[450] and results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_rebalance_keeps_concurrent_additions(fake_wordllama):
+    sentences = corpus(300)
+    tree = HierarchicalSentenceTree(sentences[:100])
+    tree.add(sentences[100:200])
+    build_layout = tree._build_layout
+
+    def build_while_adding(snapshot):
+        layout = build_layout(snapshot)
+        tree.add(sentences[200:])  # lands while the rebuild is in flight
+        return layout
+
+    tree._build_layout = build_while_adding
+    tree.rebalance()
+    leaves = tree.leaf_sentence[tree.leaf_sentence >= 0]
+    assert sorted(leaves.tolist()) == list(range(300))
+    assert tree._added_since_rebalance == 100
+    assert tree.top_k(sentences[250], k=1) == [sentences[250]]
+
+
+def test_single_topic_batch_is_split_into_small_clusters(fake_wordllama):
+    tree = HierarchicalSentenceTree(corpus(80))
+    rng = np.random.default_rng(1)
+    words = [f"t0w{i}" for i in range(12)]
+    tree.add([" ".join(rng.choice(words, 6)) + "." for _ in range(400)])
+
+    children, _, counts, leaf_sentence, depth = tree._editable_tree()
+    assert counts[0] == 480
+    bottom = [node for node, kids in enumerate(children) if kids and leaf_sentence[kids[0]] >= 0]
+    assert all(len(children[node]) <= tree.split_threshold or depth[node] >= tree.max_depth for node in bottom)
+
+
+def test_save_replaces_previous_tree_whole(fake_wordllama, tmp_path):
+    old = HierarchicalSentenceTree(corpus(400))
+    old.save(tmp_path / "tree")
+    reader = HierarchicalSentenceTree.load(tmp_path / "tree")
+    new = HierarchicalSentenceTree(corpus(120, seed=1))
+    new.save(tmp_path / "tree")
+
+    assert [p.name for p in tmp_path.iterdir()] == ["tree"]
+    assert HierarchicalSentenceTree.load(tmp_path / "tree").n_nodes == new.n_nodes
+    assert reader.top_k(old.sentences[3], k=1) == [old.sentences[3]]
+
+
+def test_load_rejects_arrays_that_do_not_fit(fake_wordllama, tmp_path):
+    sentences = corpus()
+    HierarchicalSentenceTree(sentences).save(tmp_path / "tree")
+    leaf_sentence = np.load(tmp_path / "tree" / "leaf_sentence.npy")
+    np.save(tmp_path / "tree" / "leaf_sentence.npy", leaf_sentence[:-1])
+    with pytest.raises(ValueError, match="corrupt"):
+        HierarchicalSentenceTree.load(tmp_path / "tree")
+
+    leaf_sentence[leaf_sentence.argmax()] = len(sentences)
+    np.save(tmp_path / "tree" / "leaf_sentence.npy", leaf_sentence)
+    with pytest.raises(ValueError, match="past"):
+        HierarchicalSentenceTree.load(tmp_path / "tree")
+    assert HierarchicalSentenceTree.load_or_build(sentences, tmp_path / "tree").leaf_sentence.max() < len(sentences)
@@ -0,0 +1,39 @@
+import asyncio
+import gc
+
+from pyopengenai.web_search.http_client import SharedHttpClient
+
+
+def test_sessions_of_finished_loops_are_closed_and_released():
+    async def session_twice():
+        session = await SharedHttpClient.get_session()
+        assert await SharedHttpClient.get_session() is session
+        return session
+
+    sessions = [asyncio.run(session_twice()) for _ in range(5)]
+    assert len(set(map(id, sessions))) == 5
+    assert all(session.closed for session in sessions)
+    assert not [loop for loop in SharedHttpClient._sessions if loop is not SharedHttpClient._loop]
+    assert not SharedHttpClient._closers
+
+
+def test_background_loop_keeps_its_session():
+    first = SharedHttpClient.run(SharedHttpClient.get_session())
+    assert SharedHttpClient.run(SharedHttpClient.get_session()) is first
+    assert not first.closed
+    SharedHttpClient.close()
+    assert first.closed and not SharedHttpClient._sessions
+
+
+def test_replacing_a_closed_session_keeps_the_new_one_open():
+    async def main():
+        first = await SharedHttpClient.get_session()
+        await SharedHttpClient.aclose()
+        second = await SharedHttpClient.get_session()
+        gc.collect()
+        await asyncio.sleep(0)
+        assert first.closed and not second.closed
+        assert await SharedHttpClient.get_session() is second
+        return second
+
+    assert asyncio.run(main()).closed
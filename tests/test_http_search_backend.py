@@ -0,0 +1,61 @@
+import asyncio
+from pathlib import Path
+
+from aiohttp import web
+
+from pyopengenai.web_search.search_backends import HttpSearchBackend
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+async def _serve_fixtures():
+    async def handler(request):
+        provider = request.match_info["provider"]
+        html = (FIXTURES / f"serp_{provider}.html").read_text(encoding="utf-8")
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{provider}/search", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, port
+
+
+def _run_search(queries, providers, num_results=10):
+    async def main():
+        runner, port = await _serve_fixtures()
+        try:
+            backend = HttpSearchBackend(
+                search_url_template=f"http://127.0.0.1:{port}/{{search_provider}}/search?q={{query}}")
+            return await backend.asearch_multiple_queries(queries, num_results=num_results,
+                                                          providers=providers)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_google_serp_parsing():
+    [result] = _run_search(["python asyncio"], ["google"])
+    assert result.search_provider == "google"
+    assert result.urls == [
+        "https://docs.python.org/3/library/asyncio.html",
+        "https://realpython.com/async-io-python/",
+        "https://en.wikipedia.org/wiki/Asynchronous_I/O",
+    ]
+    assert result.title_and_links[0]["title"] == "asyncio — Asynchronous I/O"
+
+
+def test_bing_serp_parsing_and_num_results():
+    [result] = _run_search(["python asyncio"], ["bing"], num_results=1)
+    assert result.urls == ["https://docs.python.org/3/library/asyncio.html"]
+
+
+def test_many_concurrent_queries():
+    queries = [f"query {i}" for i in range(50)]
+    results = _run_search(queries, ["google", "bing"])
+    assert len(results) == 100
+    assert all(len(r.urls) in (2, 3) for r in results)
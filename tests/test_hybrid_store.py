@@ -0,0 +1,92 @@
+import zlib
+
+import numpy as np
+
+from pyopengenai.retrieval.hybrid_store import HybridDocumentStore
+
+
+class BagOfWordsModel:
+    """Deterministic stand-in for WordLlama: hashed bag-of-words vectors."""
+
+    def __init__(self, dim=1024):
+        self.embedding = np.arange(dim * 4, dtype=np.float32).reshape(-1, dim)
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.embedding.shape[1]), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % vectors.shape[1]] += 1
+        return vectors
+
+
+PAGES = [
+    ("https://a.example/python", "python is a programming language with dynamic typing"),
+    ("https://b.example/rust", "rust is a systems programming language focused on memory safety"),
+    ("https://c.example/cooking", "slow cooking tomato sauce needs garlic and olive oil"),
+]
+
+
+def make_store(path=None):
+    store = HybridDocumentStore(path=path, embed_model=BagOfWordsModel(), chunk_size=8, chunk_overlap=2)
+    store.add_many(PAGES)
+    return store
+
+
+def test_hybrid_search_ranks_matching_page_first():
+    store = make_store()
+    for mode in ("hybrid", "bm25", "dense"):
+        hits = store.search("memory safety in rust", k=2, mode=mode)
+        assert hits[0].url == "https://b.example/rust", mode
+    hit = store.search("garlic sauce", k=1)[0]
+    assert hit.url == "https://c.example/cooking"
+    assert hit.bm25_rank == 0 and hit.dense_rank == 0
+
+
+def test_delete_and_readd_are_incremental():
+    store = make_store()
+    assert store.delete("https://c.example/cooking")
+    assert all(hit.url != "https://c.example/cooking" for hit in store.search("garlic sauce", k=5))
+    assert "garlic" not in store.postings
+
+    store.add("https://a.example/python", "garlic bread recipe")
+    hits = store.search("garlic", k=5, mode="bm25")
+    assert [hit.url for hit in hits] == ["https://a.example/python"]
+    assert len(store) == 2
+
+    store.compact()
+    assert store.n_chunks == len(store.chunk_texts)
+    assert store.search("rust memory", k=1)[0].url == "https://b.example/rust"
+
+
+def test_save_and_open_roundtrip(tmp_path):
+    store = make_store(tmp_path / "store")
+    store.delete("https://a.example/python")
+    store.save()
+
+    loaded = HybridDocumentStore.open(tmp_path / "store", embed_model=store.embed_model)
+    assert len(loaded) == 2
+    for query in ("tomato garlic", "systems programming"):
+        assert [h.model_dump() for h in loaded.search(query, k=3)] == \
+               [h.model_dump() for h in store.search(query, k=3)]
+
+    empty = HybridDocumentStore.open(tmp_path / "missing", embed_model=BagOfWordsModel())
+    assert len(empty) == 0 and empty.search("anything") == []
+
+
+def test_url_repeated_in_one_batch_keeps_its_last_text():
+    store = HybridDocumentStore(embed_model=BagOfWordsModel(), chunk_size=8, chunk_overlap=2)
+    assert store.add_many([("https://a", "first draft about rust"), ("https://b", "garlic sauce"),
+                           ("https://a", "final python page")]) == 2
+    assert store.n_chunks == len(store.chunk_texts) == 2
+    assert [hit.text for hit in store.search("rust python", k=5, mode="bm25")] == ["final python page"]
+
+
+def test_save_replaces_the_previous_store_whole(tmp_path):
+    store = make_store(tmp_path / "store")
+    store.save()
+    store.add("https://d.example/tea", "green tea brewing temperature")
+    store.save()
+    assert [p.name for p in tmp_path.iterdir()] == ["store"]
+    loaded = HybridDocumentStore.open(tmp_path / "store", embed_model=store.embed_model)
+    assert len(loaded) == 4 and len(loaded._vectors) == len(loaded.chunk_texts)
+    assert loaded.search("green tea", k=1)[0].url == "https://d.example/tea"
@@ -0,0 +1,51 @@
+import random
+import re
+import string
+from collections import Counter
+
+import pytest
+
+from pyopengenai.ai_searcher.key_sentences import KeySentenceExtractor
+
+STOP_WORDS = {"the", "a", "of", "and", "is"}
+split_sentences = re.compile(r"(?<=[.!?])\s+").split
+
+
+def extractor(method="frequency", **kwargs):
+    return KeySentenceExtractor(method, stop_words=STOP_WORDS, sentence_splitter=split_sentences, **kwargs)
+
+
+def previous_key_sentences(texts, n):
+    # AdvancedAISearcher's scoring before the count matrix: word frequencies summed per sentence.
+    sentences = []
+    for text in texts:
+        for original in split_sentences(text):
+            cleaned = original.translate(str.maketrans('', '', string.punctuation)).lower()
+            sentences.append((original, [word for word in cleaned.split() if word not in STOP_WORDS]))
+    frequency = Counter(word for _, words in sentences for word in words)
+    scored = [(original, sum(frequency[word] for word in words)) for original, words in sentences]
+    return [original for original, _ in sorted(scored, key=lambda x: x[-1], reverse=True)[:n]]
+
+
+def test_frequency_matches_previous_scoring():
+    rng = random.Random(0)
+    words = ["Search", "ranking", "the", "a", "index,", "Index", "crawl!", "é", "of", "x\x00y", "\x00", "3.5"]
+    for _ in range(200):
+        texts = [" ".join(" ".join(rng.choice(words) for _ in range(rng.randint(0, 8))) + rng.choice(".!?")
+                          for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        n = rng.randint(1, 12)
+        assert extractor().extract(texts, n) == previous_key_sentences(texts, n)
+
+
+def test_textrank_and_mmr():
+    texts = ["Solar panels convert sunlight into electricity. Solar panels need sunlight.",
+             "Wind turbines convert wind into electricity. Cats sleep.",
+             "Solar panels convert sunlight into electricity!"]
+    central = extractor("textrank").extract(texts, 2)
+    assert central[0].startswith("Solar panels convert sunlight") and "Cats sleep." not in central
+    # The top sentence is repeated verbatim; MMR takes a different one second.
+    picked = extractor("mmr", mmr_lambda=0.5).extract(texts, 3)
+    assert len({sentence.rstrip(".!") for sentence in picked}) == 3
+    assert extractor("textrank").extract([], 5) == [] and extractor("mmr").extract(["."], 5) == ["."]
+    with pytest.raises(ValueError):
+        KeySentenceExtractor("lexrank")
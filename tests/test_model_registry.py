@@ -0,0 +1,75 @@
+import threading
+import time
+
+import numpy as np
+
+from pyopengenai.retrieval.model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, dim=8):
+        self.embedding = np.zeros((100, dim), dtype=np.float32)
+
+
+def test_model_is_loaded_once_across_threads():
+    loads = []
+
+    def loader(**kwargs):
+        loads.append(kwargs)
+        time.sleep(0.05)
+        return FakeModel(**kwargs)
+
+    ModelRegistry.register_loader("fake-once", loader)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(ModelRegistry.get("fake-once", dim=4)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert all(m is models[0] for m in models)
+    assert ModelRegistry.memory_usage()["fake-once{'dim': 4}"]["bytes"] == 100 * 4 * 4
+    assert ModelRegistry.unload("fake-once", dim=4)
+
+
+def test_idle_models_are_unloaded():
+    loads = []
+    ModelRegistry.register_loader("fake-idle", lambda: loads.append(1) or FakeModel())
+    ModelRegistry.get("fake-idle")
+    assert ModelRegistry.unload_idle(idle_seconds=60) == []
+    time.sleep(0.02)
+    assert ("fake-idle", ()) in ModelRegistry.unload_idle(idle_seconds=0.01)
+    assert "fake-idle" not in ModelRegistry.memory_usage()
+    ModelRegistry.get("fake-idle")
+    assert len(loads) == 2
+    ModelRegistry.unload("fake-idle")
+
+
+def test_models_still_held_are_not_unloaded():
+    ModelRegistry.register_loader("fake-held", FakeModel)
+    held = ModelRegistry.get("fake-held")
+    time.sleep(0.02)
+    # Dropping it would free nothing and the next get() would load a second copy.
+    assert ("fake-held", ()) not in ModelRegistry.unload_idle(idle_seconds=0.01)
+    assert ModelRegistry.get("fake-held") is held
+    del held
+    time.sleep(0.02)
+    assert ("fake-held", ()) in ModelRegistry.unload_idle(idle_seconds=0.01)
+
+
+def test_released_model_is_freed_once_its_last_holder_lets_go():
+    ModelRegistry.register_loader("fake-weak", FakeModel)
+    held = ModelRegistry.get("fake-weak")
+    time.sleep(0.02)
+    assert ("fake-weak", ()) not in ModelRegistry.unload_idle(idle_seconds=0.01)
+    assert "fake-weak" in ModelRegistry.memory_usage()  # still resident through its holder
+    del held
+    assert ("fake-weak", ()) in ModelRegistry.unload_idle(idle_seconds=60)
+    assert "fake-weak" not in ModelRegistry.memory_usage()
+
+    ModelRegistry.register_loader("fake-unweakrefable", lambda: (1, 2))
+    ModelRegistry.get("fake-unweakrefable")
+    time.sleep(0.02)
+    assert ("fake-unweakrefable", ()) in ModelRegistry.unload_idle(idle_seconds=0.01)
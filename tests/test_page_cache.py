@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+from aiohttp import web, ClientSession
+
+from pyopengenai.web_search.page_cache import PageCache
+
+BODY = b"<html><body><p>cached page</p></body></html>"
+
+
+async def _serve(counter):
+    async def handler(request):
+        counter["requests"] += 1
+        if request.headers.get("If-None-Match") == '"v1"':
+            counter["not_modified"] += 1
+            return web.Response(status=304)
+        return web.Response(body=BODY, content_type="text/html", headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/{name}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def _fetch_twice(cache, urls):
+    counter = {"requests": 0, "not_modified": 0, "extracted": 0}
+
+    async def extract(body, encoding):
+        counter["extracted"] += 1
+        return body.decode(encoding).upper()
+
+    async def main():
+        runner, port = await _serve(counter)
+        try:
+            async with ClientSession() as session:
+                texts = []
+                for _ in range(2):
+                    for name in urls:
+                        texts.append(await cache.fetch_text(session, f"http://127.0.0.1:{port}/{name}",
+                                                            "html", extract))
+                return texts
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main()), counter
+
+
+def test_fresh_entries_skip_network_and_extraction(tmp_path):
+    cache = PageCache(cache_dir=tmp_path)
+    texts, counter = _fetch_twice(cache, ["a"])
+    assert texts == [BODY.decode().upper()] * 2
+    assert counter == {"requests": 1, "not_modified": 0, "extracted": 1}
+
+
+def test_stale_entries_revalidate_with_etag(tmp_path):
+    cache = PageCache(cache_dir=tmp_path, ttl=0)
+    texts, counter = _fetch_twice(cache, ["a"])
+    assert texts[0] == texts[1]
+    assert counter == {"requests": 2, "not_modified": 1, "extracted": 1}
+
+
+def test_identical_content_is_stored_and_extracted_once(tmp_path):
+    cache = PageCache(cache_dir=tmp_path)
+    _, counter = _fetch_twice(cache, ["mirror-1", "mirror-2"])
+    assert counter["extracted"] == 1
+    assert cache.stats()["pages"] == 2
+
+
+def test_disk_budget_evicts_least_recently_used(tmp_path):
+    cache = PageCache(cache_dir=tmp_path, max_bytes=150)
+    cache.store("https://a", b"a" * 100)
+    cache.store("https://b", b"b" * 100)
+    assert cache.lookup("https://a") is None
+    assert cache.get_body(cache.lookup("https://b").content_hash) == b"b" * 100
+
+
+def test_disk_io_runs_off_the_event_loop(tmp_path):
+    cache = PageCache(cache_dir=tmp_path, ttl=0)
+    threads = set()
+    for name in ("lookup", "get_text", "get_body", "store", "store_text", "touch"):
+        method = getattr(cache, name)
+        setattr(cache, name, lambda *args, _method=method, **kwargs: threads.add(threading.get_ident())
+                or _method(*args, **kwargs))
+    _fetch_twice(cache, ["a"])
+    assert threads and threading.get_ident() not in threads
+    assert cache.stats()["misses"] == 1 and cache.stats()["revalidated"] == 1
+
+
+def test_expired_pages_are_swept_in_batches(tmp_path):
+    cache = PageCache(cache_dir=tmp_path, max_age=60, sweep_bytes=250)
+    cache.store("https://old", b"o" * 100)
+    cache._db.execute("UPDATE pages SET fetched_at = fetched_at - 120")
+    assert cache.lookup("https://old") is None
+    cache.store("https://b", b"b" * 100)
+    assert cache.stats()["pages"] == 2  # below sweep_bytes: the expired page is still on disk
+    cache.store("https://c", b"c" * 100)
+    assert cache.stats() == {"hits": 0, "revalidated": 0, "misses": 0, "pages": 2, "bytes": 200}
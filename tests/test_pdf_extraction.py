@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from pyopengenai.web_search.pdf_extraction import PDFTextExtractor
+
+
+TEXTS = [f"Page number {i} of the paper" for i in range(23)]
+
+
+@pytest.fixture
+def pdf_path(tmp_path, make_pdf):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(make_pdf(TEXTS))
+    return path
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_pages_come_in_order_from_bytes_and_paths(pdf_path, mode):
+    extractor = PDFTextExtractor(mode=mode, max_workers=3, tasks_per_worker=2)
+    pages = list(extractor.iter_pages(pdf_path.read_bytes()))
+    assert [i for i, _ in pages] == list(range(len(TEXTS)))
+    assert [text.strip() for _, text in pages] == TEXTS
+    assert extractor.extract(pdf_path) == extractor.extract(str(pdf_path)) == "".join(text for _, text in pages)
+    assert asyncio.run(extractor.aextract(pdf_path.read_bytes())) == extractor.extract(pdf_path)
+
+
+def test_max_pages_and_max_bytes_cut_in_page_order(pdf_path):
+    pdf = pdf_path.read_bytes()
+    assert [i for i, _ in PDFTextExtractor(mode="thread", max_pages=5).iter_pages(pdf)] == [0, 1, 2, 3, 4]
+    assert [i for i, _ in PDFTextExtractor(mode="thread").iter_pages(pdf, max_pages=2)] == [0, 1]
+
+    page_bytes = len(dict(PDFTextExtractor(mode="inline").iter_pages(pdf))[0].encode())
+    extractor = PDFTextExtractor(mode="thread", max_workers=4, max_bytes=3 * page_bytes)
+    # The page reaching the cap is the last one, whichever range finished first.
+    assert [i for i, _ in extractor.iter_pages(pdf)] == [0, 1, 2]
+    pages = asyncio.run(_collect(extractor.aiter_pages(pdf)))
+    assert [i for i, _ in pages] == [0, 1, 2]
+
+
+async def _collect(pages):
+    return [page async for page in pages]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from pyopengenai.retrieval.ann_index import normalize_rows, top_k_indices
+from pyopengenai.retrieval.quantization import QuantizedIndex, hamming_distances, quantize_binary, quantize_int8
+from pyopengenai.query_master.wordllama_embeds import WordLLamaRetriever
+
+
+def clustered(n=5000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.normal(size=(50, dim)))
+    return normalize_rows(centers[rng.integers(0, 50, n)] + 0.5 / np.sqrt(dim) * rng.normal(size=(n, dim)))
+
+
+def test_codes():
+    vectors = clustered(100)
+    codes, scale = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and np.abs(codes * scale - vectors).max() <= scale.max() / 2 + 1e-6
+    bits = quantize_binary(vectors)
+    assert bits.shape == (100, 8)
+    expected = ((vectors > 0) != (vectors[0] > 0)).sum(axis=1)
+    assert np.array_equal(hamming_distances(bits, bits[0]), expected)
+
+
+@pytest.mark.parametrize("mode,ratio,exact_rescore", [("int8", 4, False), ("binary", 32, True)])
+def test_search_recall_and_memory(mode, ratio, exact_rescore):
+    data = clustered()
+    queries = data[:50]
+    index = QuantizedIndex.build(data, mode=mode, full_precision=data if exact_rescore else None)
+    assert data.nbytes / index.nbytes == ratio
+    exact = [set(top_k_indices(data @ q, 10)) for q in queries]
+    found = [set(ids) for ids, _ in index.search(queries, k=10)]
+    assert np.mean([len(f & e) / 10 for f, e in zip(found, exact)]) >= 0.95
+
+    # Exact rescoring over the shortlist returns true cosine scores.
+    index.full_precision = data
+    ids, scores = index.search(queries[0], k=5)
+    assert ids[0] == 0 and np.allclose(scores, data[ids] @ queries[0], atol=1e-5)
+
+
+def test_save_load(tmp_path):
+    data = clustered(500)
+    index = QuantizedIndex.build(data, mode="int8")
+    index.save(tmp_path / "q")
+    loaded = QuantizedIndex.load(tmp_path / "q")
+    assert isinstance(loaded.codes, np.memmap)
+    assert np.array_equal(loaded.search(data[3], 5)[0], index.search(data[3], 5)[0])
+
+
+def test_quantized_retriever(fake_wordllama):
+    sents = [f"w{i} w{i + 1} w{i * 7 % 13}." for i in range(500)]
+    for mode in QuantizedIndex.MODES:
+        retriever = WordLLamaRetriever(sents, quantization=mode)
+        assert retriever.embeds is None and isinstance(retriever.index, QuantizedIndex)
+        assert retriever.top_k(sents[123], k=1) == [sents[123]]
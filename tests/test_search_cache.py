@@ -0,0 +1,44 @@
+import time
+
+from pyopengenai.web_search.search_cache import SearchResultCache
+
+
+def test_normalized_query_hits_memory_tier():
+    cache = SearchResultCache()
+    cache.set("Who is  Modi?", ["https://a", "https://b"])
+    assert cache.get("who is modi?") == ["https://a", "https://b"]
+    assert cache.get("who is modi?", search_provider="bing") is None
+    assert cache.get("who is modi?", num_results=5) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_and_ttl_eviction():
+    cache = SearchResultCache(max_entries=2, ttl=0.05)
+    cache.set("a", ["https://a"])
+    cache.set("b", ["https://b"])
+    cache.get("a")
+    cache.set("c", ["https://c"])
+    assert cache.get("b") is None
+    assert cache.get("a") == ["https://a"]
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = tmp_path / "serp.sqlite"
+    cache = SearchResultCache(db_path=db_path)
+    cache.set("python asyncio", ["https://docs.python.org"])
+    cache.close()
+
+    reopened = SearchResultCache(db_path=db_path)
+    assert reopened.get("Python   asyncio") == ["https://docs.python.org"]
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_size_bound(tmp_path):
+    cache = SearchResultCache(max_entries=1, db_path=tmp_path / "serp.sqlite", max_db_entries=3)
+    for i in range(5):
+        cache.set(f"query {i}", [f"https://{i}"])
+    assert cache.get("query 0") is None
+    assert cache.get("query 4") == ["https://4"]
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from pyopengenai.query_master.search_retriever import SearchRetriever
+from pyopengenai.researcher_ai.main.search_provider.searcher import RealTimeGoogleSearchProvider
+from pyopengenai.retrieval.dedup import NearDuplicateFilter
+from pyopengenai.retrieval.model_registry import ModelRegistry
+
+
+def retriever():
+    # Ranking only needs the embedding model, not the search provider or parser.
+    instance = SearchRetriever.__new__(SearchRetriever)
+    instance.splitter = ModelRegistry.get("wordllama")
+    return instance
+
+
+def test_rank_many_matches_one_query_at_a_time(fake_wordllama):
+    rng = np.random.default_rng(0)
+    splits = [" ".join(rng.choice([f"w{i}" for i in range(30)], 5)) for _ in range(200)]
+    queries = ["w1 w2 w3", "w4 w5", "w10 w20 w29", "w7"]
+    r = retriever()
+    embeds = r.splitter.embed(splits)
+    embeds /= np.linalg.norm(embeds, axis=1, keepdims=True)
+    batched = r.rank_many(queries, splits, topk=5)
+    for query, top in zip(queries, batched):
+        q = r.splitter.embed([query])[0]
+        assert top == [splits[i] for i in np.argsort(-(embeds @ q), kind="stable")[:5]]
+
+    allowed = [list(range(0, 100)), list(range(50, 200)), [], list(range(200))]
+    restricted = r.rank_many(queries, splits, topk=[5, 5, 5, 0], allowed=allowed)
+    assert all(splits.index(s) < 100 for s in restricted[0]) and restricted[2:] == [[], []]
+
+
+def test_rank_many_dedupe(fake_wordllama):
+    splits = ["w1 w2", "w1 w2 w3", "w3 w4", "w4 w5", "w5 w6", "w1"]
+    r = retriever()
+    ranked = r.rank_many(["w1 w2", "w1 w3", "w4"], splits, topk=2, dedupe=True)
+    chunks = [s for top in ranked for s in top]
+    assert len(chunks) == len(set(chunks)) == 6
+    assert ranked[0][0] == "w1 w2"
+    assert r.rank_many(["w1"], ["w1", "w1", "w2"], topk=3) == [["w1", "w2"]]
+
+
+def test_drop_near_duplicates_remaps_allowed(fake_wordllama):
+    r = retriever()
+    r.near_duplicates = NearDuplicateFilter(0.8)
+    page = "the crawl returned the same syndicated article text on two different hosts today"
+    splits = ["alpha beta gamma delta", page, "unrelated words on the second page", page + "."]
+    kept, allowed, removed = r.drop_near_duplicates(splits, allowed=[[0, 1], [2, 3]])
+    assert kept == splits[:3] and removed == 1
+    assert allowed == [[0, 1], [2, 1]]
+    r.near_duplicates = None
+    assert r.drop_near_duplicates(splits) == (splits, None, 0)
+
+
+class FakeSearcher:
+    def __init__(self, urls_per_query):
+        self.urls_per_query = urls_per_query
+
+    async def aperform_search(self, query, max_urls=5):
+        return self.urls_per_query[query][:max_urls]
+
+    async def aperform_multi_search(self, queries, max_urls=None):
+        return [self.urls_per_query[query][:max_urls] for query in queries]
+
+
+class FakeParser:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    async def aiter_parse(self, urls, **kwargs):
+        for url in urls:
+            self.fetched.append(url)
+            yield url, self.pages[url]
+
+
+def pipeline():
+    r = retriever()
+    r.searcher = FakeSearcher({"w1 w2": ["a", "shared"], "w5 w6": ["shared", "b"]})
+    r.parser = FakeParser({"a": "w1 w2 w3. w2 w3 w4. w1 w4.", "shared": "w2 w5. w5 w6 w7. w1 w6.",
+                           "b": "w6 w7 w8. w5 w8. w7 w9."})
+    r.max_urls, r.fetch_deadline, r.first_k_pages = 5, None, None
+    r.chunk_size, r.chunk_overlap, r.store, r.near_duplicates = 3, 0, None, None
+    return r
+
+
+def test_async_retrieval_runs_on_the_callers_loop(fake_wordllama):
+    r = pipeline()
+
+    async def handler():
+        # As from a FastAPI handler: awaited on a running loop, no nested asyncio.run
+        return await r.aquery_based_content_retrieval("w1 w2", topk=3)
+
+    result = asyncio.run(handler())
+    assert result.urls == ["a", "shared"] and len(result.topk_chunks) == 3
+    assert r.query_based_content_retrieval("w1 w2", topk=3) == result
+
+
+def test_multi_query_fetches_shared_urls_once(fake_wordllama):
+    r = pipeline()
+    first, second = r.multi_query_content_retrieval(["w1 w2", "w5 w6"], topk=2)
+    assert sorted(r.parser.fetched) == ["a", "b", "shared"]
+    assert first.urls == ["a", "shared"] and second.urls == ["shared", "b"]
+    assert set(first.all_contents) == {r.parser.pages["a"], r.parser.pages["shared"]}
+    assert set(second.all_contents) == {r.parser.pages["shared"], r.parser.pages["b"]}
+    assert len(first.topk_chunks) == len(second.topk_chunks) == 2
+
+
+def test_batch_search_interleaves_results_before_dropping_fragments():
+    provider = RealTimeGoogleSearchProvider(cache=False)
+
+    class FakeMultiQuerySearcher:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        async def search_multiple_queries(self, queries, **kwargs):
+            results = {"q1": ["a", "#top", "b"], "q2": ["c", "d"]}
+            return [SimpleNamespace(urls=results[query]) for query in queries]
+
+    provider._searcher = FakeMultiQuerySearcher
+    # Rounds stop at the shortest list; "#top" strips to nothing and is dropped afterwards.
+    assert provider.perform_batch_search(["q1", "q2"]) == ["a", "c", "d"]
+    assert provider.perform_batch_search(["q1", "q2"], max_urls=2) == ["a", "c"]
@@ -0,0 +1,27 @@
+import random
+import re
+
+from pyopengenai.web_search.text_filter import TextFilter
+
+
+def previous_filter_text(text):
+    text = text.replace("\n\n", "\n")
+    for match in re.findall(r'\w+\n\w+\n', text):
+        text = text.replace(match, match.replace('\n', " "))
+    return text.replace("\n\n", "\n")
+
+
+def test_matches_previous_implementation_on_random_text():
+    rng = random.Random(0)
+    # Few distinct words so that joined pairs recur elsewhere, overlap and nest as suffixes.
+    pieces = ["a", "b", "ab", "ba", "é", "_1", "\n", "\n", "\n", "\n\n", " ", ".", "-"]
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+        assert TextFilter.filter_text(text) == previous_filter_text(text), repr(text)
+
+
+def test_repeated_menu_is_joined_like_before():
+    menu = "Home\nAbout\nContact\nBlog\n"
+    text = f"{menu}\nSome article text.\n\nMenu\n{menu}Footer"
+    assert TextFilter.filter_text(text) == previous_filter_text(text)
+    assert TextFilter.filter_text(text).startswith("Home About Contact Blog ")
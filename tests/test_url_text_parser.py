@@ -0,0 +1,69 @@
+import asyncio
+
+from aiohttp import web
+
+from pyopengenai.researcher_ai.main.parse_url.html_parser import UrlTextParser
+
+
+async def _serve(pdf, delays):
+    async def handler(request):
+        await asyncio.sleep(delays.get(request.match_info["name"], 0))
+        return web.Response(body=pdf, content_type="application/pdf")
+
+    app = web.Application()
+    app.router.add_get("/{name}.pdf", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def _parse(pdf, delays, **kwargs):
+    async def main():
+        runner, base = await _serve(pdf, delays)
+        try:
+            parser = UrlTextParser(pdf_extraction_mode="inline")
+            urls = [f"{base}/{name}.pdf" for name in ("slow", "fast")]
+            return [(url.rsplit("/", 1)[1], text) async for url, text in parser.aiter_parse(urls, **kwargs)]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_pdf_downloads_respect_url_fetch_timeout(make_pdf):
+    pdf = make_pdf(["A short paper"])
+    pages = _parse(pdf, {"slow": 1.5}, url_fetch_timeout=0.3)
+    assert [name for name, _ in pages] == ["fast.pdf", "slow.pdf"]
+    assert pages[0][1].strip() == "A short paper" and pages[1][1] == ""
+
+
+class _LocalArxivParser(UrlTextParser):
+    """Rewrites ``/abs/<name>`` to ``/<name>.pdf`` on the test server, like arXiv abs -> pdf."""
+
+    def _arxiv_url_fix(self, url):
+        return url.replace("/abs/", "/") + ".pdf" if "/abs/" in url else url
+
+
+def test_pages_stream_as_they_finish_under_the_urls_passed_in(make_pdf):
+    async def main():
+        runner, base = await _serve(make_pdf(["A short paper"]), {"slow": 0.5})
+        try:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            urls = [f"{base}/abs/slow", f"{base}/abs/fast"]
+            parser = _LocalArxivParser(pdf_extraction_mode="inline")
+            return urls, [(url, text.strip(), loop.time() - start) async for url, text in parser.aiter_parse(urls)]
+        finally:
+            await runner.cleanup()
+
+    urls, pages = asyncio.run(main())
+    assert [url for url, _, _ in pages] == urls[::-1]
+    assert all(text == "A short paper" for _, text, _ in pages)
+    assert pages[0][2] < 0.4 <= pages[1][2]
+
+
+def test_pdfs_are_extracted_on_threads_unless_processes_are_requested():
+    assert UrlTextParser().pdf_extractor.executor.mode == "thread"
+    assert UrlTextParser(pdf_extraction_mode="process").pdf_extractor.executor.mode == "process"
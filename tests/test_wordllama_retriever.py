@@ -0,0 +1,57 @@
+import numpy as np
+
+from pyopengenai.query_master.wordllama_embeds import WordLLamaRetriever
+from pyopengenai.retrieval.embedding_cache import EmbeddingCache
+
+
+def sentences(n=1000):
+    return [f"w{i} w{i + 1} w{i * 7 % 13}." for i in range(n)]
+
+
+def test_embeddings_keep_sentence_order(fake_wordllama):
+    sents = sentences()
+    retriever = WordLLamaRetriever(sents, batch_size=None, max_workers=4)
+    expected = retriever.wl.embed(sents)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    embeds, _ = retriever.get_embeds(sents)
+    assert embeds.dtype == np.float32 and embeds.shape == expected.shape
+    assert np.allclose(embeds, expected, atol=1e-6)
+    assert retriever.top_k(sents[321], k=1) == [sents[321]]
+
+
+def test_float16_and_fixed_batches(fake_wordllama):
+    sents = sentences(100)
+    retriever = WordLLamaRetriever(" ".join(sents), batch_size=7, dtype=np.float16)
+    assert retriever.get_embeds(sents)[0].dtype == np.float16 and retriever.tuned_batch_size == 7
+    assert retriever.top_k(sents[42], k=1) == [" " + sents[42]]
+    assert WordLLamaRetriever("").top_k("anything") == []
+
+
+def test_index_holds_the_only_copy_of_the_vectors(fake_wordllama):
+    sents = sentences(500)
+    shared = EmbeddingCache()
+    EmbeddingCache.set_default(shared)
+    try:
+        retriever = WordLLamaRetriever(sents, dtype=np.float16)
+        assert retriever.embeds is None
+        assert retriever.index._rows.nbytes == len(sents) * retriever.wl.embedding.shape[1] * 4
+        assert retriever.top_k(sents[123], k=1) == [sents[123]]
+        assert shared.stats()["memory_items"] == retriever._cache.stats()["memory_items"] == 0
+    finally:
+        EmbeddingCache.set_default(None)
+
+
+def test_quantized_retriever_keeps_only_codes_resident(fake_wordllama):
+    sents = sentences(500)
+    shared = EmbeddingCache()
+    EmbeddingCache.set_default(shared)
+    try:
+        retriever = WordLLamaRetriever(sents, quantization="int8", batch_size=64)
+        assert retriever.embeds is None
+        assert retriever.index.nbytes == len(sents) * retriever.wl.embedding.shape[0]
+        assert retriever.top_k(sents[123], k=1) == [sents[123]]
+        # Neither the build nor the rescoring leaves float vectors in a memory tier.
+        assert shared.stats()["memory_items"] == 0
+        assert retriever._cache.stats()["memory_items"] == 0
+    finally:
+        EmbeddingCache.set_default(None)